@@ -1,5 +1,6 @@
 """Base Agent definitions using the official Google ADK library."""
 from typing import Any, Dict, List, Optional, Union
+from contextlib import aclosing
 import asyncio
 import os
 
@@ -9,20 +10,25 @@ from google.adk.agents import (
     LlmAgent, 
     SequentialAgent, 
     ParallelAgent, 
-    InvocationContext
+    InvocationContext,
+    RunConfig
 )
+from google.adk.agents.run_config import StreamingMode
 from google.adk import Runner
 from google.adk.sessions.session import Session
 from google.adk.events.event import Event
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 
 import config
 from context.models import ProjectState
+from .session_service import BoundedSessionService, session_service as shared_session_service
 
 # Configure LiteLLM for OpenAI support within ADK
 os.environ["OPENAI_API_KEY"] = config.OPENAI_API_KEY
 
+_artifact_service = InMemoryArtifactService()
+
+
 def create_adk_session(state: ProjectState) -> Session:
     """Bridges our ProjectState to an ADK Session."""
     session = Session(
@@ -37,16 +43,16 @@ def create_adk_session(state: ProjectState) -> Session:
         session.state["project_id"] = state.project_id
         
     if hasattr(state, 'adk_events'):
-        session.events = state.adk_events
+        session.events = list(state.adk_events)  # a copy: new events are told apart by position
         
     return session
 
 class MetaForgeRunner:
     """Wrapper for the official ADK Runner to interact with NiceGUI."""
-    def __init__(self, root_agent: BaseAgent):
-        # Runner requires session_service and artifact_service
-        self.session_service = InMemorySessionService()
-        self.artifact_service = InMemoryArtifactService()
+    def __init__(self, root_agent: BaseAgent, session_service: Optional[BoundedSessionService] = None):
+        # Runner requires session_service and artifact_service; sessions are shared and only held during a run
+        self.session_service = session_service or shared_session_service
+        self.artifact_service = _artifact_service
         
         self.runner = Runner(
             app_name="MetaForge",
@@ -56,19 +62,19 @@ class MetaForgeRunner:
         )
         self.root_agent = root_agent
         
-    async def run(self, problem: str, session: Session):
-        """Executes the ADK pipeline and yields events for the UI."""
-        # Manual registration in InMemorySessionService
-        app_name = session.app_name
+    async def run(self, problem: str, session: Session, streaming: bool = True):
+        """Executes the ADK pipeline and yields events for the UI.
+
+        With streaming enabled the model output is requested over SSE and the
+        token deltas arrive as `partial` events ahead of the final event.
+        The ADK event stream is closed deterministically when the caller stops
+        iterating or is cancelled, which closes any in-flight model streams.
+        """
+        # Hold the session in the shared service for this run only; the caller keeps `session`,
+        # which receives every event and state change, and copies it back to ProjectState
         user_id = session.user_id
         session_id = session.id
-        
-        if app_name not in self.session_service.sessions:
-            self.session_service.sessions[app_name] = {}
-        if user_id not in self.session_service.sessions[app_name]:
-            self.session_service.sessions[app_name][user_id] = {}
-            
-        self.session_service.sessions[app_name][user_id][session_id] = session
+        self.session_service.register(session)
         
         # The official Runner.run_async() yields events
         from google.genai import types
@@ -77,9 +83,18 @@ class MetaForgeRunner:
             parts=[types.Part(text=problem)]
         )
         
-        async for event in self.runner.run_async(
-            user_id=user_id,
-            session_id=session_id,
-            new_message=msg_content
-        ):
-            yield event
+        run_config = RunConfig(
+            streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE
+        )
+        
+        try:
+            async with aclosing(self.runner.run_async(
+                user_id=user_id,
+                session_id=session_id,
+                new_message=msg_content,
+                run_config=run_config
+            )) as events:
+                async for event in events:
+                    yield event
+        finally:
+            self.session_service.release(session)
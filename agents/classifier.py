@@ -0,0 +1,104 @@
+"""Cheap local classification of prompts and plans for the pipeline fast paths."""
+import re
+from typing import Any, List, Optional, Union
+
+import config
+from context.models import RequirementSpec, TechStack, FileSpec
+
+# Anything hinting at server-side state or integrations rules out the fast path
+BACKEND_HINTS = re.compile(
+    r"\b(api|apis|backend|back-end|server|database|db|sql|login|log in|sign up|signup|auth\w*|"
+    r"account|accounts|users|multiplayer|upload|fastapi|flask|django|express|rest|crud|"
+    r"webhook|email|payment\w*|sync\w*|admin)\b",
+    re.IGNORECASE,
+)
+
+# Backend values a plan uses to say there is no server component
+NO_BACKEND_VALUES = {"", "none", "n/a", "na", "null", "no", "not required", "not needed", "no backend"}
+NO_BACKEND_PHRASES = ("no backend", "not required", "not needed", "client-side only", "none")
+
+# (category, keyword pattern, frontend stack, functional components)
+TRIVIAL_CATEGORIES = [
+    (
+        "canvas game",
+        r"\b(snake|tetris|pong|breakout|flappy|asteroids|space invaders|2048|minesweeper|"
+        r"tic[- ]?tac[- ]?toe|memory (card )?game|whack[- ]a[- ]mole|sudoku)\b",
+        "Single-page Interactive Canvas (React + requestAnimationFrame)",
+        ["Game loop", "Keyboard and pointer input", "Game state (start, playing, paused, game over)",
+         "Score tracking", "Canvas rendering"],
+    ),
+    (
+        "utility",
+        r"\b(calculator|stopwatch|timer|pomodoro|clock|counter|unit converter|color picker|"
+        r"password generator|dice roller|random quote)\b",
+        "React (single-file index.html)",
+        ["Main UI", "Core logic", "Keyboard support", "Local state persistence"],
+    ),
+    (
+        "static page",
+        r"\b(landing page|portfolio|personal website|resume|cv page|coming soon page)\b",
+        "React + Tailwind (single-file index.html)",
+        ["Hero section", "Content sections", "Responsive layout", "Navigation"],
+    ),
+]
+
+MAX_TRIVIAL_PROMPT_CHARS = 400
+
+
+def classify_prompt(problem: str) -> Optional[RequirementSpec]:
+    """Return a frontend-only spec for trivially classifiable prompts, else None.
+
+    Only short prompts matching a known self-contained category and carrying no
+    backend hints qualify; everything else goes through the Planner.
+    """
+    if len(problem) > MAX_TRIVIAL_PROMPT_CHARS or BACKEND_HINTS.search(problem):
+        return None
+    for category, pattern, frontend, components in TRIVIAL_CATEGORIES:
+        if re.search(pattern, problem, re.IGNORECASE):
+            return RequirementSpec(
+                functional_components=list(components),
+                tech_stack=TechStack(frontend=frontend, backend="none", database="none"),
+                clarifications=[],
+                complexity="simple",
+            )
+    return None
+
+
+def needs_backend(spec: Union[RequirementSpec, dict, Any, None]) -> bool:
+    """Whether a plan calls for a backend coder at all.
+
+    Missing or unreadable plans default to True so the full pipeline runs.
+    """
+    if spec is None:
+        return True
+    if isinstance(spec, RequirementSpec):
+        spec = spec.model_dump()
+    if not isinstance(spec, dict):
+        return True
+    backend = str((spec.get("tech_stack") or {}).get("backend", "")).strip().lower()
+    if backend in NO_BACKEND_VALUES or any(phrase in backend for phrase in NO_BACKEND_PHRASES):
+        return False
+    # Simple plans whose "backend" is just browser storage are still frontend-only
+    if str(spec.get("complexity", "")).lower() == "simple" and re.search(
+        r"\b(localstorage|local storage|in-browser|browser storage|client-side)\b", backend
+    ):
+        return False
+    return True
+
+
+def manifest_files(spec: Union[RequirementSpec, dict, Any, None]) -> List[FileSpec]:
+    """Files to generate one-by-one from the plan's manifest, or [] to use the whole-app coders.
+
+    Backend-owned entries are dropped for frontend-only plans, and manifests
+    below config.MANIFEST_MIN_FILES are not worth fanning out.
+    """
+    if isinstance(spec, dict):
+        try:
+            spec = RequirementSpec.model_validate(spec)
+        except Exception:
+            return []
+    if not isinstance(spec, RequirementSpec):
+        return []
+    backend = needs_backend(spec)
+    files = [f for f in spec.file_manifest if backend or f.owner.lower() != "backend"]
+    return files if len(files) >= config.MANIFEST_MIN_FILES else []
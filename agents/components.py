@@ -1,10 +1,52 @@
 """Specialized Agents implementation using the official Google ADK."""
+from typing import Optional
+from google.genai import types
 from .base import LlmAgent
-from context.models import RequirementSpec, FileList, ProgressStatus
+from .classifier import needs_backend, manifest_files
+from .routing import model_router
+from .resilience import build_model
+from context.models import RequirementSpec, FileList, GeneratedFile, ProgressStatus
 import config
 
-# Use the 'openai/' prefix for LiteLLM resolution in ADK
-MODEL_ID = f"openai/{config.MODEL_NAME}"
+# Session state keys shared with the orchestrator
+PLAN_SOURCE_KEY = "plan_source"  # who produced state["requirements"]: "planner" or a fast path
+
+
+def _skip(output_json: str) -> types.Content:
+    """Content returned from a before_agent_callback skips the agent.
+
+    ADK still saves that content under the agent's output_key, so it must be
+    valid JSON for the agent's output_schema.
+    """
+    return types.Content(role="model", parts=[types.Part(text=output_json)])
+
+
+def skip_planner_if_planned(callback_context) -> Optional[types.Content]:
+    """Skip the Planner when a fast path already put requirements into session state."""
+    source = callback_context.state.get(PLAN_SOURCE_KEY)
+    requirements = callback_context.state.get("requirements")
+    if source and source != "planner" and requirements:
+        return _skip(RequirementSpec.model_validate(requirements).model_dump_json())
+    return None
+
+
+def skip_backend_if_unneeded(callback_context) -> Optional[types.Content]:
+    """Skip the BackendCoder (emitting an empty FileList) when the plan is frontend-only
+    and no backend exists yet."""
+    state = callback_context.state
+    existing = state.get("backend_files") or {}
+    if (isinstance(existing, dict) and existing.get("files")) or needs_backend(state.get("requirements")):
+        return None
+    return _skip(FileList(files=[]).model_dump_json())
+
+
+def skip_coders_for_manifest(callback_context) -> Optional[types.Content]:
+    """Skip the whole-app coders when the plan's manifest is built file-by-file instead."""
+    files = manifest_files(callback_context.state.get("requirements"))
+    if files:
+        return _skip(f"Deferring {len(files)} manifest files to per-file generation")
+    return None
+
 
 class PlannerAgent(LlmAgent):
     """Agent responsible for requirements analysis and planning."""
@@ -14,9 +56,13 @@ class PlannerAgent(LlmAgent):
             name="Planner",
             description="Analyzes requirements and creates a technical plan",
             instruction=config.REQUIREMENTS_ANALYZER_PROMPT,
-            model=MODEL_ID,
+            model=build_model("Planner"),
+            before_model_callback=model_router.before_model,
+            after_model_callback=model_router.after_model,
+            on_model_error_callback=model_router.on_model_error,
             output_key="requirements",
-            output_schema=RequirementSpec
+            output_schema=RequirementSpec,
+            before_agent_callback=skip_planner_if_planned
         )
 
 class FrontendAgent(LlmAgent):
@@ -27,7 +73,10 @@ class FrontendAgent(LlmAgent):
             name="FrontendCoder",
             description="Generates React frontend code",
             instruction=config.FRONTEND_GENERATOR_PROMPT,
-            model=MODEL_ID,
+            model=build_model("FrontendCoder"),
+            before_model_callback=model_router.before_model,
+            after_model_callback=model_router.after_model,
+            on_model_error_callback=model_router.on_model_error,
             output_key="frontend_files",
             output_schema=FileList
         )
@@ -40,7 +89,30 @@ class BackendAgent(LlmAgent):
             name="BackendCoder",
             description="Generates Flask/FastAPI backend code",
             instruction=config.BACKEND_GENERATOR_PROMPT,
-            model=MODEL_ID,
+            model=build_model("BackendCoder"),
+            before_model_callback=model_router.before_model,
+            after_model_callback=model_router.after_model,
+            on_model_error_callback=model_router.on_model_error,
             output_key="backend_files",
-            output_schema=FileList
+            output_schema=FileList,
+            before_agent_callback=skip_backend_if_unneeded
+        )
+
+
+class FileCoderAgent(LlmAgent):
+    """Agent responsible for generating a single manifest file."""
+    
+    def __init__(self, owner: str = "frontend"):
+        base_prompt = config.BACKEND_GENERATOR_PROMPT if owner == "backend" else config.FRONTEND_GENERATOR_PROMPT
+        name = f"{owner.title()}FileCoder"
+        super().__init__(
+            name=name,
+            description=f"Generates one {owner} file from the build manifest",
+            instruction=f"{base_prompt}\n\n{config.FILE_GENERATOR_PROMPT}",
+            model=build_model(name),
+            before_model_callback=model_router.before_model,
+            after_model_callback=model_router.after_model,
+            on_model_error_callback=model_router.on_model_error,
+            output_key="generated_file",
+            output_schema=GeneratedFile
         )
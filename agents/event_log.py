@@ -0,0 +1,131 @@
+"""Compacted ADK event history with a compressed raw log per session"""
+import gzip
+import json
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+from google.adk.events.event import Event
+from google.genai import types
+
+import config
+from context.memory import memory_guard
+from .prompts import HEAL_TASK, PROJECT_HEADER
+from utils.blocking import run_blocking
+
+SUMMARY_INVOCATION = "compacted-history"
+SUMMARY_HEADER = "Earlier conversation in this project, summarized"
+LINE_CHARS = 160
+
+
+def _text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(p.text for p in event.content.parts if getattr(p, "text", None))
+
+
+def summarize_event(event: Event) -> str:
+    """One line for the summary: who said what, without the project context prompts repeat"""
+    text = _text(event).strip()
+    if text.startswith(PROJECT_HEADER.strip()):
+        if "User change request:" in text:
+            text = "change request: " + text.rsplit("User change request:", 1)[1]
+        elif HEAL_TASK in text:
+            text = "fix validation errors: " + text.split("Validation Errors:", 1)[-1]
+    elif text.startswith("{"):
+        try:
+            files = json.loads(text).get("files")
+            if isinstance(files, list):
+                paths = [str(f.get("path")) for f in files if isinstance(f, dict)]
+                text = "wrote " + ", ".join(paths) if paths else "no file changes"
+        except (ValueError, AttributeError):
+            pass
+    text = " ".join(text.split()) or "(no text)"
+    if len(text) > LINE_CHARS:
+        text = text[:LINE_CHARS - 3] + "..."
+    return f"- {event.author}: {text}"
+
+
+def is_summary(event: Event) -> bool:
+    return event.invocation_id == SUMMARY_INVOCATION
+
+
+class EventLog:
+    """Keeps what ADK is handed on resume bounded, and the full history on disk.
+
+    ProjectState.adk_events holds at most one summary event plus the last
+    `window` events. Older events are folded into the summary, one line
+    each, keeping only the newest `summary_lines` lines. Resuming a session
+    therefore costs the same on turn 50 as on turn 2. Every raw event is
+    appended once to `<directory>/<session_id>.jsonl.gz`; gzip members
+    concatenate, so the file is append-only and `read()` replays it.
+    """
+
+    def __init__(self, directory: Path, window: int = 12, summary_lines: int = 40):
+        self.directory = Path(directory)
+        self.window = window
+        self.summary_lines = summary_lines
+
+    def path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id.replace('/', '_')}.jsonl.gz"
+
+    def append(self, session_id: str, events: Sequence[Event]):
+        """Append raw events to the session's compressed log (blocking)"""
+        if not events:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = "".join(e.model_dump_json(exclude_none=True) + "\n" for e in events)
+        with gzip.open(self.path(session_id), "at", encoding="utf-8") as f:
+            f.write(lines)
+
+    def read(self, session_id: str) -> Iterator[Event]:
+        """The session's full raw history, oldest first"""
+        path = self.path(session_id)
+        if not path.exists():
+            return
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield Event.model_validate_json(line)
+
+    def compact(self, events: Sequence[Event], window: Optional[int] = None) -> List[Event]:
+        """At most one summary event followed by the last `window` events"""
+        window = self.window if window is None else max(1, window)
+        summary = next((e for e in events if is_summary(e)), None)
+        recent = [e for e in events if not is_summary(e)]
+        if len(recent) <= window:
+            return list(events)
+        folded, recent = recent[:-window], recent[-window:]
+
+        lines, count = [], 0
+        if summary is not None:
+            lines = _text(summary).splitlines()[1:]
+            count = (summary.custom_metadata or {}).get("compacted_events", len(lines))
+        lines += [summarize_event(e) for e in folded]
+        count += len(folded)
+        if len(lines) > self.summary_lines:
+            lines = [f"- ({count - self.summary_lines + 1} older events omitted)"] + lines[-(self.summary_lines - 1):]
+
+        summary = Event(
+            author="user",
+            invocation_id=SUMMARY_INVOCATION,
+            timestamp=folded[-1].timestamp,
+            custom_metadata={"compacted_events": count},
+            content=types.Content(role="user", parts=[types.Part(text="\n".join([f"{SUMMARY_HEADER}:", *lines]))]),
+        )
+        return [summary, *recent]
+
+    async def record(self, session_id: str, history: Sequence[Event], new_events: Sequence[Event]) -> List[Event]:
+        """Archive a run's new events and return the compacted history to keep on ProjectState"""
+        raw = [e for e in new_events if not is_summary(e)]
+        await run_blocking(self.append, session_id, raw)
+        return self.compact([*history, *new_events])
+
+
+def _compact_for_memory(state):
+    """Memory guard compactor: keep a quarter of the usual window (the raw events are on disk already)"""
+    state.adk_events = event_log.compact(state.adk_events, event_log.window // 4)
+
+
+# Global event log instance
+event_log = EventLog(config.EVENT_LOG_DIR, config.ADK_EVENT_WINDOW, config.ADK_SUMMARY_MAX_LINES)
+memory_guard.add_compactor(_compact_for_memory)
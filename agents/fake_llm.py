@@ -0,0 +1,130 @@
+"""Deterministic local model provider for offline runs and resilience testing."""
+import asyncio
+import json
+import random
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+from .prompts import shared_prefix_chars
+
+
+class FakeProviderError(ConnectionError):
+    """Injected transient failure (retryable like a dropped connection)"""
+
+
+class FakeLlm(BaseLlm):
+    """Answers every structured-output request with canned, schema-valid JSON.
+
+    Latency, jitter, transient failures and hangs can be injected to exercise
+    the resilience layer without a network, and the number and size of the
+    generated files scale the pipeline work for benchmarks. Like a provider prefix cache, it
+    reports the prompt's longest shared prefix with a recent prompt as cached
+    tokens. Select it for all agents with METAFORGE_LLM_PROVIDER=fake.
+    """
+
+    model: str = "fake/metaforge"
+    latency: float = 0.05         # seconds before the first chunk
+    jitter: float = 0.0           # extra uniform random latency
+    failure_rate: float = 0.0     # probability a call raises FakeProviderError
+    hang_rate: float = 0.0        # probability a call never answers
+    chunk_chars: int = 64         # streamed delta size
+    seed: Optional[int] = None
+    cache_entries: int = 16       # recent prompts kept for simulated prefix caching
+    output_files: int = 1         # files per FileList answer (index.html plus scripts)
+    file_bytes: int = 0           # pad each file to about this size (0 keeps the tiny canned files)
+
+    _rng: random.Random = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+    _recent_prompts: list = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"fake/.*"]
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    async def generate_content_async(
+        self, llm_request, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self._calls += 1
+        roll = self._rng.random()
+        await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        if roll < self.hang_rate:
+            await asyncio.Event().wait()
+        if roll < self.hang_rate + self.failure_rate:
+            raise FakeProviderError("injected provider failure")
+
+        prompt = self._prompt_text(llm_request)
+        cached_chars = max((shared_prefix_chars(p, prompt) for p in self._recent_prompts), default=0)
+        self._recent_prompts = (self._recent_prompts + [prompt])[-self.cache_entries:]
+
+        text = json.dumps(self.payload_for(llm_request))
+        if stream:
+            for i in range(0, len(text), self.chunk_chars):
+                await asyncio.sleep(0)
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text[i:i + self.chunk_chars])]),
+                    partial=True,
+                )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=len(prompt) // 4,
+                cached_content_token_count=cached_chars // 4,
+                candidates_token_count=len(text) // 4,
+            ),
+        )
+
+    def payload_for(self, llm_request) -> dict:
+        """Schema-valid output for the request's response_schema"""
+        schema = llm_request.config.response_schema if llm_request.config else None
+        name = getattr(schema, "__name__", "")
+        if name == "RequirementSpec":
+            return {
+                "functional_components": ["Main UI", "Core logic"],
+                "tech_stack": {"frontend": "React", "backend": "none", "database": "none"},
+                "clarifications": [],
+                "complexity": "simple",
+                "file_manifest": [],
+                "shared_interfaces": [],
+            }
+        if name == "GeneratedFile":
+            return self.make_file("app.js", "javascript")
+        files = [self.make_file("index.html", "html")]
+        files += [self.make_file(f"src/module_{i}.js", "javascript") for i in range(1, self.output_files)]
+        return {"files": files}
+
+    def make_file(self, path: str, language: str) -> dict:
+        body = ""
+        if self.file_bytes:
+            lines, size, i = [], 0, 0
+            while size < self.file_bytes:
+                line = f"const value{i} = {{ id: {i}, label: \"item {i}\" }};\n"
+                lines.append(line)
+                size += len(line)
+                i += 1
+            body = "".join(lines)
+        if language == "html":
+            script = f"<script>\n{body}</script>\n" if body else ""
+            content = ("<!DOCTYPE html>\n<html>\n<head><title>Fake</title></head>\n"
+                       f"<body><div id=\"root\"></div>\n{script}</body>\n</html>\n")
+        else:
+            content = "const state = { ready: true };\n" + body
+        return {"path": path, "content": content, "language": language, "size": len(content)}
+
+    @staticmethod
+    def _prompt_text(llm_request) -> str:
+        """System instruction followed by every content part, as the provider would see it"""
+        system = llm_request.config.system_instruction if llm_request.config else None
+        parts = [system if isinstance(system, str) else ""]
+        parts.extend(p.text or "" for c in llm_request.contents or [] for p in c.parts or [])
+        return "\n".join(parts)
@@ -1,9 +1,110 @@
 """Orchestrator implementation using official Google ADK library."""
 import asyncio
-from .base import MetaForgeRunner, create_adk_session, SequentialAgent, ParallelAgent
-from .components import PlannerAgent, FrontendAgent, BackendAgent
+import time
+from typing import Any, Callable, List, Optional, Union
+from .base import MetaForgeRunner, create_adk_session, SequentialAgent, ParallelAgent, Session
+from .components import (
+    PlannerAgent, FrontendAgent, BackendAgent, FileCoderAgent,
+    PLAN_SOURCE_KEY, skip_coders_for_manifest
+)
+from .classifier import classify_prompt, needs_backend, manifest_files
+from .routing import TASK_TYPE_KEY, TASK_SIZE_KEY
+from .streaming import FileListStreamParser
+from .prompts import refine_prompt, heal_prompt, requirements_json, template_prompt
+from .resilience import call_stats
+from .event_log import event_log
 from context.session_manager import session_manager
-from context.models import ProjectState, ProgressStatus, RequirementSpec, FileList
+from context.project_index import project_index
+from context.models import ProjectState, ProgressStatus, RequirementSpec, FileList, GeneratedFile
+from utils.stats import LatencyStats
+from utils.telemetry import get_logger, log_sampled, span, traced
+import config
+
+logger = get_logger("orchestrator")
+
+# ADK output_keys that carry FileList results from the coders
+FILE_OUTPUT_KEYS = ("frontend_files", "backend_files")
+
+# Called with each file as soon as it lands in ProjectState.files
+FileCallback = Callable[[GeneratedFile], Any]
+
+
+def merge_instructions(instructions: Union[str, List[str]]) -> str:
+    """Combine buffered chat instructions into one change request, oldest first."""
+    if isinstance(instructions, str):
+        return instructions
+    instructions = [i.strip() for i in instructions if i and i.strip()]
+    if len(instructions) == 1:
+        return instructions[0]
+    numbered = "\n".join(f"{n}. {text}" for n, text in enumerate(instructions, 1))
+    return (
+        "Apply ALL of the following changes together, in order "
+        "(a later change wins where two conflict):\n" + numbered
+    )
+
+
+def _event_text(event) -> str:
+    """Concatenate the text parts of an ADK event."""
+    if not event.content or not getattr(event.content, 'parts', None):
+        return ""
+    return "".join(p.text for p in event.content.parts if hasattr(p, 'text') and p.text)
+
+
+def _event_files(event) -> dict[str, list[GeneratedFile]]:
+    """Extract FileList outputs written by this event's state delta, per output_key."""
+    delta = event.actions.state_delta if event.actions else None
+    if not delta:
+        return {}
+    outputs = {}
+    for key in FILE_OUTPUT_KEYS:
+        if key in delta:
+            val = delta[key]
+            if isinstance(val, dict):
+                outputs[key] = FileList(**val).files
+            elif hasattr(val, "files"):
+                outputs[key] = list(val.files)
+    return outputs
+
+
+class IncompleteManifestError(RuntimeError):
+    """Manifest files still failed after their retry; the build must not ship without them"""
+
+    def __init__(self, failures: list[tuple[str, BaseException]]):
+        self.failures = failures
+        super().__init__("; ".join(f"{path}: {error}" for path, error in failures))
+
+
+class _FilePublisher:
+    """Upserts files into a ProjectState during one run and reports time to first file."""
+
+    def __init__(self, state: ProjectState, stage: str, on_file: Optional[FileCallback] = None):
+        self.state = state
+        self.stage = stage
+        self.on_file = on_file
+        self.started = time.perf_counter()
+        self.first_file_seen = False
+
+    def publish(self, files: list[GeneratedFile]):
+        changed = self.state.files.upsert_many(files)
+        if changed and not self.first_file_seen:
+            self.first_file_seen = True
+            elapsed = self.elapsed()
+            self.state.timings[f"{self.stage}.time_to_first_file"] = elapsed
+            self.state.update_progress(
+                "First file ready", ProgressStatus.IN_PROGRESS,
+                f"{changed[0]} after {elapsed:.1f}s"
+            )
+            logger.info("%s: first file %s ready after %.2fs", self.stage, changed[0], elapsed)
+        if self.on_file:
+            for path in changed:
+                self.on_file(self.state.files[path])
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def finish(self):
+        """Record `<stage>.total` in state.timings"""
+        self.state.timings[f"{self.stage}.total"] = self.elapsed()
 
 class MetaForgeOrchestrator:
     """The 'Team Leader' agent that orchestrates the entire application build."""
@@ -24,7 +125,8 @@ class MetaForgeOrchestrator:
                 self.planner,
                 ParallelAgent(
                     name="Coders",
-                    sub_agents=[self.frontend_coder, self.backend_coder]
+                    sub_agents=[self.frontend_coder, self.backend_coder],
+                    before_agent_callback=skip_coders_for_manifest
                 )
             ]
         )
@@ -39,8 +141,167 @@ class MetaForgeOrchestrator:
         self.runner = MetaForgeRunner(root_agent=self.team_pipeline)
         self.refine_runner = MetaForgeRunner(root_agent=self.refine_pipeline)
         
-    async def orchestrate(self, problem_description: str, session_id: str) -> ProjectState:
-        """Execute the ADK pipeline using official patterns."""
+        # Manifest-driven generation: one single-file agent per owner, run concurrently per file
+        self.file_runners = {
+            owner: MetaForgeRunner(root_agent=FileCoderAgent(owner))
+            for owner in ("frontend", "backend")
+        }
+        
+        # Agents whose streamed output is a FileList we can parse incrementally
+        self.file_agents = {self.frontend_coder.name, self.backend_coder.name}
+        
+        # End-to-end orchestrate latency per pipeline path
+        # ("full", "frontend_only", "classified", "retrieval", "manifest")
+        self.path_stats: dict[str, LatencyStats] = {}
+        
+    async def _persist_adk(self, state: ProjectState, adk_session: Session, stage: str):
+        """Copy a finished run's ADK state to ProjectState and snapshot the files as a new version.
+
+        The ADK history is archived raw and kept compacted.
+        """
+        state.history.snapshot(state.files, stage)
+        state.adk_state = dict(adk_session.state)
+        new_events = adk_session.events[len(state.adk_events):]  # the run only appends
+        state.adk_events = await event_log.record(state.project_id, state.adk_events, new_events)
+    
+    async def _stream_events(
+        self,
+        runner: MetaForgeRunner,
+        prompt: str,
+        adk_session,
+        publisher: "_FilePublisher",
+    ):
+        """Run `runner`, publishing files while the coders are still writing.
+
+        Partial (streamed) events from the coders are fed to a per-agent
+        FileListStreamParser, so each file reaches `publisher` as soon as its
+        JSON object closes. The final FileList in each state delta is published
+        afterwards, which is a no-op for files that already streamed in
+        unchanged. Yields only the complete (non-partial) events.
+        """
+        parsers: dict[str, FileListStreamParser] = {}
+
+        async for event in runner.run(prompt, adk_session):
+            if event.partial:
+                if event.author in self.file_agents:
+                    parser = parsers.setdefault(event.author, FileListStreamParser())
+                    files = parser.feed(_event_text(event))
+                    if files:
+                        publisher.publish(files)
+                continue
+
+            # A complete response ends this agent's turn; the next turn starts a fresh document
+            parsers.pop(event.author, None)
+            for files in _event_files(event).values():
+                publisher.publish(files)
+            yield event
+
+    @traced("manifest")
+    async def _generate_from_manifest(
+        self, state: ProjectState, problem: str, publisher: "_FilePublisher",
+        template: Optional[dict[str, str]] = None,
+    ):
+        """Generate every manifest file as its own concurrent agent task.
+
+        Concurrency is bounded by config.MAX_PARALLEL_FILES. Every task gets the
+        full manifest and the shared interfaces, so files written in parallel
+        agree on routes, props and ids. Results are published as each task
+        finishes, so wall time approaches that of the longest single file.
+        Failed files are retried once; if any still fail, the files this run
+        published are removed again and IncompleteManifestError is raised, so
+        the caller never ships a project missing part of its manifest. The
+        removals show in state.files.changed_since(), so callers that already
+        wrote streamed files out can delete them too.
+        """
+        spec = state.requirements
+        files = manifest_files(spec)
+        semaphore = asyncio.Semaphore(config.MAX_PARALLEL_FILES)
+        manifest = "\n".join(f"- {f.path} ({f.owner}): {f.responsibility}" for f in spec.file_manifest)
+        contracts = "\n".join(f"- {c}" for c in spec.shared_interfaces) or "- (none declared)"
+        durations: dict[str, float] = {}
+        published: set[str] = set()
+
+        async def build_one(file_spec) -> None:
+            started = time.perf_counter()
+            runner = self.file_runners["backend" if file_spec.owner.lower() == "backend" else "frontend"]
+            session = Session(app_name="MetaForge", user_id="default_user",
+                              id=f"{state.project_id}:{file_spec.path}")
+            session.state.update({TASK_TYPE_KEY: "file", "requirements": spec.model_dump()})
+            prompt = (
+                f"Original request: {problem}\n\n"
+                f"Requirements (JSON): {requirements_json(spec, exclude={'file_manifest', 'shared_interfaces'})}\n\n"
+                f"Full file manifest:\n{manifest}\n\n"
+                f"Shared interfaces (must match exactly):\n{contracts}\n\n"
+                f"YOUR FILE: {file_spec.path}\nResponsibility: {file_spec.responsibility}\n"
+            )
+            if template and file_spec.path in template:
+                prompt += f"\nTemplate from a similar past project (adapt it):\n{template[file_spec.path]}\n"
+            generated = None
+            async for event in runner.run(prompt, session, streaming=False):
+                delta = event.actions.state_delta if event.actions else {}
+                if "generated_file" in delta:
+                    generated = GeneratedFile(**delta["generated_file"])
+                    generated.path = file_spec.path  # the manifest owns the path
+                    publisher.publish([generated])
+                    published.add(generated.path)
+            if generated is None:
+                raise RuntimeError("the agent returned no file")
+            durations[file_spec.path] = time.perf_counter() - started
+            state.update_progress(f"Generated {file_spec.path}", ProgressStatus.IN_PROGRESS,
+                                  f"{durations[file_spec.path]:.1f}s")
+
+        async def build(file_spec) -> None:
+            async with semaphore:
+                with span("manifest_file", path=file_spec.path, owner=file_spec.owner):
+                    await build_one(file_spec)
+
+        state.update_progress("Per-file generation", ProgressStatus.IN_PROGRESS,
+                              f"{len(files)} files, up to {config.MAX_PARALLEL_FILES} in parallel")
+        fanout_started = time.perf_counter()
+        results = await asyncio.gather(*(build(f) for f in files), return_exceptions=True)
+        failed = [f for f, r in zip(files, results) if isinstance(r, Exception)]
+        if failed:
+            state.update_progress("Retrying failed files", ProgressStatus.IN_PROGRESS,
+                                  ", ".join(f.path for f in failed))
+            results = await asyncio.gather(*(build(f) for f in failed), return_exceptions=True)
+            failures = [(f.path, r) for f, r in zip(failed, results) if isinstance(r, Exception)]
+            if failures:
+                for path, error in failures:
+                    state.update_progress(f"Failed to generate {path}", ProgressStatus.ERROR, str(error))
+                for path in published:
+                    state.files.delete(path)
+                raise IncompleteManifestError(failures)
+
+        if durations:
+            state.timings["orchestrate.manifest.wall"] = time.perf_counter() - fanout_started
+            state.timings["orchestrate.manifest.longest_file"] = max(durations.values())
+            state.timings["orchestrate.manifest.sum_files"] = sum(durations.values())
+            logger.info("Manifest: %d files in %.1fs (longest file %.1fs, sequential sum %.1fs)", len(durations),
+                        state.timings["orchestrate.manifest.wall"], state.timings["orchestrate.manifest.longest_file"],
+                        state.timings["orchestrate.manifest.sum_files"])
+
+    async def _generate_with_coders(
+        self, state: ProjectState, problem: str, adk_session, publisher: "_FilePublisher",
+    ):
+        """Generate the whole app with the frontend and backend coders, ignoring the manifest"""
+        prompt = (
+            f"{problem}\n\n"
+            f"Requirements (JSON): {requirements_json(state.requirements, exclude={'file_manifest', 'shared_interfaces'})}\n"
+        )
+        async for event in self._stream_events(self.refine_runner, prompt, adk_session, publisher):
+            delta = event.actions.state_delta if event.actions else {}
+            for key in FILE_OUTPUT_KEYS:
+                if key in delta:
+                    state.update_progress(f"{key.replace('_', ' ').title()} generated", ProgressStatus.IN_PROGRESS)
+        if not state.files:
+            raise RuntimeError("Whole-app coders produced no files")
+
+    @traced("orchestrate")
+    async def orchestrate(self, problem_description: str, session_id: str, on_file: Optional[FileCallback] = None) -> ProjectState:
+        """Execute the ADK pipeline using official patterns.
+
+        `on_file` is called with each generated file as soon as it is available.
+        """
         state = session_manager.get_session(session_id)
         if not state:
             raise ValueError(f"Session {session_id} not found")
@@ -48,117 +309,162 @@ class MetaForgeOrchestrator:
         # Bridge to official ADK Session
         adk_session = create_adk_session(state)
         
+        # Fast paths skip the Planner call entirely: a near-duplicate past project
+        # (its plan, plus its files as a template) or a trivially classifiable prompt
+        prompt = problem_description
+        plan_source = "planner"
+        template: list[GeneratedFile] = []
+        match = project_index.lookup(problem_description, exclude=state.project_id)
+        if match:
+            seeded, plan_source = match.requirements, "retrieval"
+            template = project_index.load_template(match, config.RETRIEVAL_MAX_TEMPLATE_CHARS)
+            detail = f"Reused plan of a similar project ({match.similarity:.2f}), planner skipped"
+        else:
+            seeded = classify_prompt(problem_description)
+            if seeded:
+                plan_source = "classifier"
+                detail = "Classified locally, planner skipped"
+        if seeded:
+            state.requirements = seeded
+            adk_session.state["requirements"] = seeded.model_dump()
+            prompt += f"\n\nRequirements (JSON): {requirements_json(seeded)}\n"
+            if template:
+                prompt += "\n" + template_prompt(template, match.similarity)
+            state.update_progress("Requirements analyzed", ProgressStatus.IN_PROGRESS, detail)
+        adk_session.state[PLAN_SOURCE_KEY] = plan_source
+        adk_session.state[TASK_TYPE_KEY] = "build"
+        
         try:
             state.update_progress("Starting official ADK Pipeline", ProgressStatus.IN_PROGRESS)
             
             # Execute via official Runner
-            async for event in self.runner.run(problem_description, adk_session):
-                # Terminal Logging for Visibility
-                print(f"[ADK] Agent [{event.author}] is thinking...")
-                import sys
-                sys.stdout.flush()
-                
+            publisher = _FilePublisher(state, "orchestrate", on_file)
+            async for event in self._stream_events(self.runner, prompt, adk_session, publisher):
                 # Observability: Log internal ADK events to the progress panel
                 if event.author != "user" and event.content:
-                     # Correctly extract text from Content object
-                     text = ""
-                     if hasattr(event.content, 'parts') and event.content.parts:
-                          text = "".join(p.text for p in event.content.parts if hasattr(p, 'text') and p.text)
-                     
+                     text = _event_text(event)
                      if text:
-                         print(f"[ADK] {event.author}: {text[:150]}...")
-                         sys.stdout.flush()
+                         log_sampled(logger, f"event:{event.author}", "[ADK] %s: %s...", event.author, text[:150])
                          log_msg = f"[{event.author}] {text[:100]}..."
                          state.update_progress(f"ADK: {event.author} active", ProgressStatus.IN_PROGRESS, log_msg)
                 
-                # Sync results from ADK session state back to our UI state
+                # Sync results from ADK state deltas back to our UI state
                 
                 # Planner output
-                if "requirements" in adk_session.state:
-                     reqs = adk_session.state["requirements"]
+                delta = event.actions.state_delta if event.actions else {}
+                if "requirements" in delta:
+                     reqs = delta["requirements"]
                      if isinstance(reqs, dict):
                           state.requirements = RequirementSpec(**reqs)
                           state.update_progress("Requirements analyzed", ProgressStatus.IN_PROGRESS)
                      else:
                           state.requirements = reqs
                 
-                # Coder outputs
-                all_files = []
-                for key in ["frontend_files", "backend_files"]:
-                    if key in adk_session.state:
-                         val = adk_session.state[key]
-                         if isinstance(val, dict):
-                              file_list = FileList(**val)
-                              all_files.extend(file_list.files)
-                              state.update_progress(f"{key.replace('_', ' ').title()} generated", ProgressStatus.IN_PROGRESS)
-                         elif hasattr(val, "files"):
-                              all_files.extend(val.files)
-                
-                if all_files:
-                    # Smart Merge: Update existing files by path or add new ones
-                    current_files_map = {f.path.replace('\\', '/').strip('/'): f for f in state.files}
-                    for new_file in all_files:
-                         norm_path = new_file.path.replace('\\', '/').strip('/')
-                         # Normalize the internal path as well for consistency
-                         new_file.path = norm_path
-                         current_files_map[norm_path] = new_file
-                    
-                    state.files = list(current_files_map.values())
+                # Coder outputs are merged by _stream_events as they arrive
+                for key in FILE_OUTPUT_KEYS:
+                    if key in delta:
+                        state.update_progress(f"{key.replace('_', ' ').title()} generated", ProgressStatus.IN_PROGRESS)
+            
+            # The Coders step deferred to the manifest: build each planned file concurrently
+            manifest_mode = bool(manifest_files(state.requirements))
+            if manifest_mode:
+                try:
+                    await self._generate_from_manifest(
+                        state, problem_description, publisher, {f.path: f.content for f in template}
+                    )
+                except IncompleteManifestError as e:
+                    logger.warning("Manifest build incomplete, falling back to the whole-app coders: %s", e)
+                    state.update_progress("Falling back to whole-app generation", ProgressStatus.IN_PROGRESS,
+                                          f"{len(e.failures)} manifest files failed")
+                    manifest_mode = False
+                    await self._generate_with_coders(state, problem_description, adk_session, publisher)
+            publisher.finish()
             
-            # Persist ADK-specific state and history to ProjectState
-            state.adk_state = dict(adk_session.state)
-            state.adk_events = list(adk_session.events)
+            # Persist ADK-specific state and (compacted) history to ProjectState
+            await self._persist_adk(state, adk_session, "orchestrate")
+            
+            self._record_path(state, plan_source, manifest_mode)
                 
             state.update_progress("Project Built via Google ADK", ProgressStatus.COMPLETED)
             return state
             
+        except asyncio.CancelledError:
+            state.update_progress("ADK Orchestration cancelled", ProgressStatus.ERROR, "Superseded before completion")
+            raise
         except Exception as e:
             state.update_progress("ADK Orchestration Failed", ProgressStatus.ERROR, str(e))
             raise
 
-    async def refine(self, instruction: str, session_id: str) -> ProjectState:
-        """Handle iterative updates: reuse existing requirements and update code only."""
+    def _record_path(self, state: ProjectState, plan_source: str, manifest_mode: bool = False):
+        """Attribute this build's latency to the pipeline path it took."""
+        if plan_source == "retrieval":
+            path = "retrieval"
+        elif plan_source == "classifier":
+            path = "classified"
+        elif manifest_mode:
+            path = "manifest"
+        elif needs_backend(state.requirements):
+            path = "full"
+        else:
+            path = "frontend_only"
+        state.pipeline_path = path
+        total = state.timings.get("orchestrate.total")
+        if total is None:
+            return
+        self.path_stats.setdefault(path, LatencyStats()).record(total)
+        summary = ", ".join(
+            f"{name}: p50 {stats.percentile(50):.1f}s (n={stats.count})"
+            for name, stats in sorted(self.path_stats.items())
+        )
+        logger.info("Pipeline path '%s' took %.1fs | %s", path, total, summary)
+        state.update_progress("Pipeline path", ProgressStatus.COMPLETED, f"{path} in {total:.1f}s")
+
+    def path_latency_report(self) -> dict[str, dict]:
+        """Latency summary per pipeline path, to compare fast paths with the full pipeline."""
+        return {path: stats.snapshot() for path, stats in self.path_stats.items()}
+
+    def retrieval_report(self) -> dict:
+        """Project index hit rate and lookup cost, with the planner time the hits saved."""
+        report = project_index.report()
+        planner = call_stats.get(self.planner.name)
+        planner_p50 = planner.latency.percentile(50) if planner else None
+        report["planner_p50"] = planner_p50
+        report["estimated_latency_saved"] = round(planner_p50 * report["hits"], 3) if planner_p50 else 0.0
+        return report
+
+    @traced("refine")
+    async def refine(
+        self, instruction: Union[str, List[str]], session_id: str, on_file: Optional[FileCallback] = None
+    ) -> ProjectState:
+        """Handle iterative updates: reuse existing requirements and update code only.
+
+        A list of instructions (chat messages buffered while debouncing or while
+        a previous refine ran) is merged into a single model round-trip.
+        """
         state = session_manager.get_session(session_id)
         if not state:
             raise ValueError(f"Session {session_id} not found")
+        if not isinstance(instruction, str):
+            if len(instruction) > 1:
+                logger.info("Coalesced %d chat instructions into one refinement", len(instruction))
+            instruction = merge_instructions(instruction)
             
         # Continue with the same ADK session state (requirements + prior events)
         adk_session = create_adk_session(state)
+        adk_session.state.update({TASK_TYPE_KEY: "refine", TASK_SIZE_KEY: len(instruction)})
         
-        # Build a refinement prompt that preserves the existing spec and provides full file context
-        existing_reqs = state.requirements.model_dump() if state.requirements else None
-        
-        # Include file contents so the LLM can actually edit them
-        files_context = ""
-        for f in state.files:
-            files_context += f"--- FILE: {f.path} ---\n{f.content}\n\n"
-
-        prompt = (
-            "You are refining an existing project. Use the provided code as context.\n"
-            "Do NOT re-plan the spec; keep requirements mostly as-is unless specific changes are needed.\n"
-            "Return ONLY the files that need to be updated or added to implement the requested change.\n"
-            "Ensure you return the FULL content of each modified file.\n\n"
-            f"Existing requirements (JSON): {existing_reqs}\n"
-            "Current Project Files:\n"
-            f"{files_context}\n"
-            f"User change request: {instruction}\n"
-        )
+        # Stable prefix (spec + files sorted by path) first, the instruction last
+        prompt = refine_prompt(state.requirements, state.files, instruction)
 
         try:
             state.update_progress("Refinement: applying changes", ProgressStatus.IN_PROGRESS)
 
-            async for event in self.refine_runner.run(prompt, adk_session):
-                print(f"[ADK] Agent [{event.author}] is thinking...")
-                import sys
-                sys.stdout.flush()
+            publisher = _FilePublisher(state, "refine", on_file)
+            async for event in self._stream_events(self.refine_runner, prompt, adk_session, publisher):
+                log_sampled(logger, f"event:{event.author}", "[ADK] Agent [%s] is thinking...", event.author)
 
                 if event.author != "user" and event.content:
-                    text = ""
-                    if hasattr(event.content, 'parts') and event.content.parts:
-                        text = "".join(
-                            p.text for p in event.content.parts
-                            if hasattr(p, 'text') and p.text
-                        )
+                    text = _event_text(event)
                     if text:
                         log_msg = f"[{event.author}] {text[:100]}..."
                         state.update_progress(
@@ -167,35 +473,23 @@ class MetaForgeOrchestrator:
                             log_msg,
                         )
 
-                # Sync coder outputs only (requirements should not be overwritten here)
-                all_files = []
-                for key in ["frontend_files", "backend_files"]:
-                    if key in adk_session.state:
-                        val = adk_session.state[key]
-                        if isinstance(val, dict):
-                            file_list = FileList(**val)
-                            all_files.extend(file_list.files)
-                        elif hasattr(val, "files"):
-                            all_files.extend(val.files)
-
-                if all_files:
-                    current_files_map = {f.path.replace('\\', '/').strip('/'): f for f in state.files}
-                    for new_file in all_files:
-                        norm_path = new_file.path.replace('\\', '/').strip('/')
-                        new_file.path = norm_path
-                        current_files_map[norm_path] = new_file
-                    state.files = list(current_files_map.values())
-
-            state.adk_state = dict(adk_session.state)
-            state.adk_events = list(adk_session.events)
+                # Coder outputs are synced by _stream_events (requirements are not overwritten here)
+
+            publisher.finish()
+            await self._persist_adk(state, adk_session, "refine")
             state.update_progress("Refinement complete", ProgressStatus.COMPLETED)
             return state
 
+        except asyncio.CancelledError:
+            state.update_progress("Refinement cancelled", ProgressStatus.ERROR, "Superseded before completion")
+            raise
         except Exception as e:
             state.update_progress("Refinement failed", ProgressStatus.ERROR, str(e))
             raise
     
-    async def self_heal(self, session_id: str, validation_errors: list[str], max_retries: int = 2) -> ProjectState:
+    @traced("self_heal")
+    async def self_heal(self, session_id: str, validation_errors: list[str], max_retries: int = 2,
+                        on_file: Optional[FileCallback] = None) -> ProjectState:
         """Self-healing: retry code generation with validation error feedback (max 2 retries)."""
         state = session_manager.get_session(session_id)
         if not state:
@@ -212,68 +506,34 @@ class MetaForgeOrchestrator:
             
             # Build a prompt that includes the errors and asks for fixes
             adk_session = create_adk_session(state)
+            adk_session.state[TASK_TYPE_KEY] = "heal"
             
-            # Include file contents so the LLM can see the errors in context
-            files_context = ""
-            for f in state.files:
-                files_context += f"--- FILE: {f.path} ---\n{f.content}\n\n"
-            
-            heal_prompt = (
-                "CRITICAL: The previous code generation had validation errors. "
-                "You MUST fix these errors in your output.\n\n"
-                f"Validation Errors:\n{errors_summary}\n\n"
-                "Current Code Context:\n"
-                f"{files_context}\n\n"
-                "Please regenerate the affected files with these errors fixed. "
-                "Ensure all syntax is correct, tags are closed, and code is valid.\n"
-            )
-            
-            # If we have requirements, include them; otherwise use existing files as context
-            if state.requirements:
-                existing_reqs = state.requirements.model_dump()
-                heal_prompt += f"\nExisting requirements (keep these): {existing_reqs}\n"
+            # Same stable prefix as refine; the errors go in the volatile tail
+            prompt = heal_prompt(state.requirements, state.files, validation_errors[:20])
             
             try:
-                async for event in self.refine_runner.run(heal_prompt, adk_session):
-                    if event.author != "user" and event.content:
-                        text = ""
-                        if hasattr(event.content, 'parts') and event.content.parts:
-                            text = "".join(
-                                p.text for p in event.content.parts
-                                if hasattr(p, 'text') and p.text
-                            )
-                        if text:
-                            state.update_progress(
-                                f"Self-heal [{attempt + 1}]: {event.author} fixing errors",
-                                ProgressStatus.IN_PROGRESS,
-                                text[:100]
-                            )
-                
-                # Sync updated files
-                all_files = []
-                for key in ["frontend_files", "backend_files"]:
-                    if key in adk_session.state:
-                        val = adk_session.state[key]
-                        if isinstance(val, dict):
-                            file_list = FileList(**val)
-                            all_files.extend(file_list.files)
-                        elif hasattr(val, "files"):
-                            all_files.extend(val.files)
-                
-                if all_files:
-                    current_files_map = {f.path.replace('\\', '/').strip('/'): f for f in state.files}
-                    for new_file in all_files:
-                        norm_path = new_file.path.replace('\\', '/').strip('/')
-                        new_file.path = norm_path
-                        current_files_map[norm_path] = new_file
-                    state.files = list(current_files_map.values())
+                with span("heal_attempt", attempt=attempt + 1, errors=len(validation_errors)):
+                    # Updated files are synced by _stream_events as they arrive
+                    publisher = _FilePublisher(state, "self_heal", on_file)
+                    async for event in self._stream_events(self.refine_runner, prompt, adk_session, publisher):
+                        if event.author != "user" and event.content:
+                            text = _event_text(event)
+                            if text:
+                                state.update_progress(
+                                    f"Self-heal [{attempt + 1}]: {event.author} fixing errors",
+                                    ProgressStatus.IN_PROGRESS,
+                                    text[:100]
+                                )
                 
-                state.adk_state = dict(adk_session.state)
-                state.adk_events = list(adk_session.events)
+                    publisher.finish()
+                    await self._persist_adk(state, adk_session, "self_heal")
                 
-                # Return updated state for re-validation
-                return state
+                    # Return updated state for re-validation
+                    return state
                 
+            except asyncio.CancelledError:
+                state.update_progress("Self-heal cancelled", ProgressStatus.ERROR, "Superseded before completion")
+                raise
             except Exception as e:
                 state.update_progress(
                     f"Self-heal attempt {attempt + 1} failed",
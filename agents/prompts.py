@@ -0,0 +1,83 @@
+"""Deterministic prompt assembly for refine and self-heal calls.
+
+Providers cache the longest previously seen prompt prefix, so every prompt is
+laid out stable-first: the agent's system prompt (set on the agent, sent
+first by ADK), then a fixed project header, the requirements as sorted JSON,
+the files sorted by path with their content hashes, and only then the
+volatile tail (the user's instruction or the validation errors). Two
+consecutive calls on an unchanged project therefore share everything up to
+the tail.
+"""
+import json
+from typing import Iterable, List, Optional
+
+from context.models import GeneratedFile, RequirementSpec, content_hash
+
+PROJECT_HEADER = (
+    "You are working on an existing project. Use the provided code as context.\n"
+    "Do NOT re-plan the spec; keep requirements as-is unless the task needs a change.\n"
+    "Return ONLY the files that need to be updated or added, with the FULL content of each.\n"
+)
+
+REFINE_TASK = "TASK: implement the user's change request below."
+
+HEAL_TASK = (
+    "TASK: the previous code generation had validation errors. You MUST fix them.\n"
+    "Regenerate the affected files with these errors fixed. "
+    "Ensure all syntax is correct, tags are closed, and code is valid."
+)
+
+
+def requirements_json(spec: Optional[RequirementSpec], **dump_options) -> str:
+    """Requirements as canonical JSON (sorted keys, fixed separators)"""
+    if spec is None:
+        return "null"
+    return json.dumps(spec.model_dump(mode="json", **dump_options), sort_keys=True, separators=(", ", ": "))
+
+
+def files_block(files: Iterable[GeneratedFile]) -> str:
+    """All files sorted by path, each headed by its content hash"""
+    parts = []
+    for f in sorted(files, key=lambda f: f.path):
+        parts.append(f"--- FILE: {f.path} [sha256:{content_hash(f.content)[:16]}] ---\n{f.content}\n")
+    return "\n".join(parts)
+
+
+def project_prefix(spec: Optional[RequirementSpec], files: Iterable[GeneratedFile]) -> str:
+    """The cacheable part shared by every refine/heal call on the same project state"""
+    return (
+        f"{PROJECT_HEADER}\n"
+        f"Existing requirements (JSON): {requirements_json(spec)}\n\n"
+        f"Current Project Files:\n{files_block(files)}\n"
+    )
+
+
+def refine_prompt(spec: Optional[RequirementSpec], files: Iterable[GeneratedFile], instruction: str) -> str:
+    return f"{project_prefix(spec, files)}\n{REFINE_TASK}\nUser change request: {instruction}\n"
+
+
+def heal_prompt(spec: Optional[RequirementSpec], files: Iterable[GeneratedFile], errors: List[str]) -> str:
+    error_lines = "\n".join(errors)
+    return f"{project_prefix(spec, files)}\n{HEAL_TASK}\n\nValidation Errors:\n{error_lines}\n"
+
+
+def template_prompt(files: Iterable[GeneratedFile], similarity: float) -> str:
+    """A similar past project's files, offered as a starting point for a new build"""
+    return (
+        f"A previous project matched this request (similarity {similarity:.2f}). "
+        "Use its files below as a template: keep what fits, change whatever this request asks for.\n"
+        f"Template Files:\n{files_block(files)}\n"
+    )
+
+
+def shared_prefix_chars(previous: str, current: str) -> int:
+    """Length of the common prefix of two prompts (what a prefix cache could reuse)"""
+    # Binary search over slice comparisons keeps this in C for large prompts
+    low, high = 0, min(len(previous), len(current))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if previous[:mid] == current[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
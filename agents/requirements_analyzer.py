@@ -5,6 +5,9 @@ from google import genai
 from google.genai import types
 import config
 from context.models import RequirementSpec
+from utils.telemetry import get_logger
+
+logger = get_logger("requirements_analyzer")
 
 
 class RequirementsAnalyzer:
@@ -58,7 +61,7 @@ Respond in JSON format:
             )
             
         except Exception as e:
-            print(f"Error in requirements analysis: {e}")
+            logger.error("Error in requirements analysis: %s", e)
             # Return default requirements on error
             return RequirementSpec(
                 functional_components=["Basic UI", "Core functionality"],
@@ -108,7 +111,7 @@ Respond in JSON format:
             )
             
         except Exception as e:
-            print(f"Error in requirements analysis: {e}")
+            logger.error("Error in requirements analysis: %s", e)
             return RequirementSpec(
                 functional_components=["Basic UI", "Core functionality"],
                 tech_stack={"frontend": "React", "backend": "Flask"},
@@ -0,0 +1,409 @@
+"""Resilient model calls: timeouts, retries with backoff, circuit breaking and hedging."""
+import asyncio
+import json
+import random
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+import config
+from utils.stats import LatencyStats
+from utils.telemetry import AGENT_CALLS_IN_FLIGHT, get_logger, record_agent_call, registry
+
+logger = get_logger("resilience")
+
+# Provider errors worth retrying, matched by class name so litellm is not imported here
+RETRYABLE_ERRORS = {
+    "TimeoutError", "Timeout", "APIConnectionError", "APITimeoutError", "RateLimitError",
+    "ServiceUnavailableError", "InternalServerError", "BadGatewayError", "ConnectionError",
+    "FakeProviderError", "InvalidStructuredOutput",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit is open"""
+
+
+class InvalidStructuredOutput(ValueError):
+    """A complete response that is not valid JSON for a structured-output request"""
+
+
+@dataclass
+class CallPolicy:
+    """How one agent's model calls are bounded and retried"""
+    timeout: float = 180.0        # seconds per attempt
+    max_retries: int = 2
+    backoff_base: float = 1.0     # first retry waits up to this long (full jitter)
+    backoff_max: float = 20.0
+    hedge: bool = False           # fire a duplicate request after the observed p95
+    hedge_min_samples: int = 20   # latency samples needed before hedging starts
+
+    @classmethod
+    def for_agent(cls, agent_name: str) -> "CallPolicy":
+        return cls(
+            timeout=config.AGENT_TIMEOUTS.get(agent_name, config.MODEL_CALL_TIMEOUT),
+            max_retries=config.MODEL_MAX_RETRIES,
+            hedge=config.HEDGE_REQUESTS,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through after a cool-down.
+
+    While half-open, calls other than the probe are rejected until the probe
+    resolves: success closes the circuit, a failure re-opens it, and a probe
+    ending any other way (cancelled, non-retryable error) frees the slot.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out; taking the probe slot when half-open"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def end_probe(self):
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+
+
+class CallStats:
+    """Counters and tail latency for one agent's calls"""
+
+    def __init__(self):
+        self.latency = LatencyStats()             # full successful call, including retries
+        self.first_response = {True: LatencyStats(), False: LatencyStats()}  # per attempt, by stream mode
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+        self.wasted_requests = 0
+        self.rejected = 0                         # refused by an open circuit
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges_fired": self.hedges_fired,
+            "hedge_wins": self.hedge_wins,
+            "wasted_requests": self.wasted_requests,
+            "rejected": self.rejected,
+            "latency": self.latency.snapshot(),
+        }
+
+
+# Shared across instances: per agent name and per provider model
+call_stats: Dict[str, CallStats] = {}
+breakers: Dict[str, CircuitBreaker] = {}
+
+
+def resilience_report() -> dict:
+    """Per-agent tail latency, retry/hedge/wasted-request counts and circuit states"""
+    return {
+        "agents": {name: stats.snapshot() for name, stats in call_stats.items()},
+        "circuits": {
+            model: {"state": b.state, "failures": b.failures, "times_opened": b.times_opened}
+            for model, b in breakers.items()
+        },
+    }
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+class _Contender:
+    """One in-flight provider request pumping its responses into a queue"""
+
+    def __init__(self, agen: AsyncGenerator[LlmResponse, None]):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._pump(agen))
+        self.next_item = asyncio.ensure_future(self.queue.get())
+
+    async def _pump(self, agen):
+        try:
+            async with aclosing(agen) as responses:
+                async for response in responses:
+                    await self.queue.put(("item", response))
+            await self.queue.put(("done", None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.queue.put(("error", e))
+
+    def cancel(self):
+        self.next_item.cancel()
+        self.task.cancel()
+
+
+class ResilientLlm(BaseLlm):
+    """Wraps a provider BaseLlm with per-agent timeouts, retries and optional hedging.
+
+    Each attempt is bounded by `policy.timeout`. Retryable failures are retried
+    with exponential backoff and full jitter, but only before any response has
+    been handed to ADK, since a half-delivered stream cannot be replayed.
+    A circuit breaker per provider model stops calling a provider that keeps
+    failing. With hedging on, a duplicate request fires once an attempt has
+    waited longer than the observed p95 for its first response. The first
+    usable response wins and the loser is cancelled and counted as wasted.
+    """
+
+    inner: BaseLlm
+    agent_name: str
+    policy: CallPolicy
+
+    _stats: CallStats = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        self._stats = call_stats.setdefault(self.agent_name, CallStats())
+
+    @property
+    def capabilities(self):
+        return self.inner.capabilities
+
+    @property
+    def stats(self) -> CallStats:
+        return self._stats
+
+    def _breaker(self, llm_request) -> CircuitBreaker:
+        model = llm_request.model or self.inner.model
+        if model not in breakers:
+            breakers[model] = CircuitBreaker(config.CIRCUIT_FAILURE_THRESHOLD, config.CIRCUIT_RESET_SECONDS)
+        return breakers[model]
+
+    async def generate_content_async(
+        self, llm_request, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Instrumented entry point: an agent_call span with model, tokens and outcome"""
+        model = llm_request.model or self.inner.model
+        started = time.perf_counter()
+        outcome, usage = "error", None
+        AGENT_CALLS_IN_FLIGHT.inc(agent=self.agent_name)
+        try:
+            async with aclosing(self._generate(llm_request, stream)) as responses:
+                async for response in responses:
+                    if response.usage_metadata and not response.partial:
+                        usage = response.usage_metadata
+                    yield response
+            outcome = "ok"
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        finally:
+            AGENT_CALLS_IN_FLIGHT.dec(agent=self.agent_name)
+            record_agent_call(
+                self.agent_name, model, time.perf_counter() - started, outcome,
+                prompt_tokens=(usage.prompt_token_count or 0) if usage else 0,
+                completion_tokens=(usage.candidates_token_count or 0) if usage else 0,
+                cached_tokens=(usage.cached_content_token_count or 0) if usage else 0,
+            )
+
+    async def _generate(self, llm_request, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        stats = self._stats
+        breaker = self._breaker(llm_request)
+        stats.calls += 1
+        started = time.perf_counter()
+
+        for attempt in range(self.policy.max_retries + 1):
+            probe = breaker.state == "half_open"
+            if not breaker.allow():
+                stats.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {llm_request.model or self.inner.model}")
+            delivered = False
+            try:
+                async for response in self._attempt(llm_request, stream):
+                    delivered = True
+                    yield response
+                breaker.record_success()
+                stats.latency.record(time.perf_counter() - started)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.failures += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    stats.timeouts += 1
+                if _is_retryable(e):
+                    breaker.record_failure()
+                if delivered or not _is_retryable(e) or attempt == self.policy.max_retries:
+                    raise
+                delay = self.policy.backoff(attempt)
+                stats.retries += 1
+                logger.warning("%s call failed (%s: %s); retry %d/%d in %.1fs", self.agent_name,
+                               type(e).__name__, e, attempt + 1, self.policy.max_retries, delay)
+                await asyncio.sleep(delay)
+            finally:
+                if probe:
+                    breaker.end_probe()
+
+    def _hedge_delay(self, stream: bool) -> Optional[float]:
+        if not self.policy.hedge:
+            return None
+        samples = self._stats.first_response[stream]
+        if samples.count < self.policy.hedge_min_samples:
+            return None
+        return samples.percentile(95)
+
+    def _usable(self, response: LlmResponse, llm_request, stream: bool) -> bool:
+        """Streams are committed on their first chunk; whole responses must be valid structured output"""
+        if stream or response.partial:
+            return True
+        schema = llm_request.config.response_schema if llm_request.config else None
+        if not schema:
+            return True
+        text = "".join(p.text or "" for p in (response.content.parts if response.content else []) or [])
+        try:
+            json.loads(text)
+            return True
+        except ValueError:
+            return False
+
+    def _start(self, llm_request, stream: bool, copy: bool) -> _Contender:
+        request = llm_request.model_copy(deep=True) if copy else llm_request
+        return _Contender(self.inner.generate_content_async(request, stream=stream))
+
+    async def _attempt(self, llm_request, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        """One attempt: race the primary (and maybe a hedge) to a first usable response, then drain the winner"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.policy.timeout
+        hedge_delay = self._hedge_delay(stream)
+        primary = self._start(llm_request, stream, copy=hedge_delay is not None)
+        contenders = [primary]
+        hedged = False
+        winner: Optional[_Contender] = None
+        first: Optional[LlmResponse] = None
+        last_error: Exception = asyncio.TimeoutError(f"{self.agent_name} timed out after {self.policy.timeout:.0f}s")
+
+        try:
+            while winner is None:
+                pending = {c.next_item: c for c in contenders}
+                if not pending:
+                    raise last_error
+                wait = deadline - loop.time()
+                can_hedge = hedge_delay is not None and not hedged
+                if can_hedge:
+                    wait = min(wait, started + hedge_delay - loop.time())
+                done, _ = await asyncio.wait(pending, timeout=max(wait, 0), return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if loop.time() >= deadline:
+                        raise last_error
+                    # Slower than p95 so far: fire the hedge
+                    self._stats.hedges_fired += 1
+                    hedged = True
+                    contenders.append(self._start(llm_request, stream, copy=True))
+                    continue
+
+                for future in done:
+                    contender = pending[future]
+                    kind, payload = future.result()
+                    if kind == "item" and self._usable(payload, llm_request, stream):
+                        winner, first = contender, payload
+                        break
+                    if kind == "item":
+                        last_error = InvalidStructuredOutput(f"{self.agent_name} returned invalid JSON")
+                    elif kind == "error":
+                        last_error = payload
+                    else:
+                        last_error = InvalidStructuredOutput(f"{self.agent_name} returned no content")
+                    contender.cancel()
+                    contenders.remove(contender)
+
+            self._stats.first_response[stream].record(loop.time() - started)
+            if winner is not primary:
+                self._stats.hedge_wins += 1
+            for loser in contenders:
+                if loser is not winner:
+                    loser.cancel()
+                    self._stats.wasted_requests += 1
+            contenders = [winner]
+
+            yield first
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise last_error
+                kind, payload = await asyncio.wait_for(winner.queue.get(), remaining)
+                if kind == "item":
+                    yield payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    return
+        finally:
+            for contender in contenders:
+                contender.cancel()
+
+
+def _collect_circuits():
+    for model, breaker in breakers.items():
+        CIRCUIT_OPEN.set(0 if breaker.state == "closed" else 1, model=model)
+
+
+CIRCUIT_OPEN = registry.gauge("metaforge_circuit_open", "1 while a provider circuit is open or half-open", ("model",))
+registry.on_collect(_collect_circuits)
+
+
+def build_model(agent_name: str) -> BaseLlm:
+    """The model object for an agent: the configured provider behind ResilientLlm"""
+    if config.LLM_PROVIDER == "fake":
+        from .fake_llm import FakeLlm
+        inner: BaseLlm = FakeLlm(**config.FAKE_LLM_OPTIONS)
+    else:
+        from google.adk.models.lite_llm import LiteLlm
+        # Use the 'openai/' prefix for LiteLLM resolution; model_router picks the per-call model
+        inner = LiteLlm(model=f"openai/{config.MODEL_NAME}")
+    return ResilientLlm(
+        model=inner.model,
+        inner=inner,
+        agent_name=agent_name,
+        policy=CallPolicy.for_agent(agent_name),
+    )
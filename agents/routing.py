@@ -0,0 +1,203 @@
+"""Per-call model routing for the ADK agents."""
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+import config
+from utils.stats import LatencyStats
+
+# Session state key the orchestrator sets to describe the current run
+TASK_TYPE_KEY = "task_type"    # "build", "file", "refine" or "heal"
+TASK_SIZE_KEY = "task_size"    # characters of the user's own instruction (refines)
+
+MAX_TRACKED_SESSIONS = 1000    # per-project usage totals kept for reporting
+MAX_INFLIGHT_CALLS = 1000      # started calls awaiting their response (cancelled calls never report back)
+
+
+@dataclass
+class RouteRequest:
+    """Everything a routing policy may look at for one model call"""
+    agent_name: str
+    task: str            # "plan", "build", "file", "refine" or "heal"
+    complexity: str      # RequirementSpec.complexity, "" before planning
+    prompt_chars: int    # size of the assembled request contents
+    task_size: int = 0   # size of the user's instruction for refines
+
+
+class RoutingPolicy:
+    """Picks a model tier (a key of config.MODEL_TIERS) for a call.
+
+    Subclass and override `choose`, then install it with
+    `model_router.set_policy(...)`.
+    """
+
+    def choose(self, request: RouteRequest) -> str:
+        return "default"
+
+
+class ComplexityRoutingPolicy(RoutingPolicy):
+    """Default policy: cheap tier for heals and small edits, strong tier for complex builds"""
+
+    def choose(self, request: RouteRequest) -> str:
+        complexity = request.complexity.lower()
+        if request.task == "heal":
+            return "fast"
+        if request.task == "refine":
+            if request.task_size <= config.SMALL_EDIT_CHARS and complexity != "complex":
+                return "fast"
+            return "default"
+        if request.task == "plan":
+            return "default"
+        if complexity == "complex" or request.prompt_chars >= config.LARGE_PROMPT_CHARS:
+            return "strong"
+        return "default"
+
+
+class RouteStats:
+    """Latency, token and cost totals for one route (tier:model)"""
+
+    def __init__(self):
+        self.latency = LatencyStats()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0      # prompt tokens served from the provider's prefix cache
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            **self.latency.snapshot(),
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_hit_rate": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+def _prompt_chars(llm_request) -> int:
+    total = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            total += len(part.text or "")
+    return total
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost from config.MODEL_PRICING (per million tokens), 0 for unknown models"""
+    input_price, output_price = config.MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class ModelRouter:
+    """Routes every LlmAgent call to a model tier and keeps per-route stats.
+
+    Installed on the agents as before/after model callbacks, so the choice is
+    made per call from the session state (task type, RequirementSpec
+    complexity) and the size of the assembled prompt.
+    """
+
+    def __init__(self, policy: Optional[RoutingPolicy] = None):
+        self.policy = policy or ComplexityRoutingPolicy()
+        self.stats: Dict[str, RouteStats] = {}
+        self.recent_calls: Deque[dict] = deque(maxlen=200)
+        self.session_usage: "OrderedDict[str, dict]" = OrderedDict()
+        self._inflight: "OrderedDict[Tuple[str, str], Tuple[str, str, float]]" = OrderedDict()
+
+    def set_policy(self, policy: RoutingPolicy):
+        self.policy = policy
+
+    def before_model(self, callback_context, llm_request):
+        """before_model_callback: choose the model for this call"""
+        state = callback_context.state
+        requirements = state.get("requirements") or {}
+        request = RouteRequest(
+            agent_name=callback_context.agent_name,
+            task="plan" if callback_context.agent_name == "Planner" else state.get(TASK_TYPE_KEY, "build"),
+            complexity=str(requirements.get("complexity", "")) if isinstance(requirements, dict) else "",
+            prompt_chars=_prompt_chars(llm_request),
+            task_size=int(state.get(TASK_SIZE_KEY, 0) or 0),
+        )
+        tier = self.policy.choose(request)
+        model = config.MODEL_TIERS.get(tier, config.MODEL_NAME)
+        llm_request.model = f"openai/{model}"
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        self._inflight.pop(key, None)
+        self._inflight[key] = (tier, model, time.perf_counter())
+        while len(self._inflight) > MAX_INFLIGHT_CALLS:
+            self._inflight.popitem(last=False)
+        return None
+
+    def on_model_error(self, callback_context, llm_request, error):
+        """on_model_error_callback: forget the failed call (timeouts, open breaker); the error propagates"""
+        self._inflight.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        return None
+
+    def after_model(self, callback_context, llm_response):
+        """after_model_callback: record latency, tokens and cost for the finished call"""
+        if llm_response.partial:
+            return None
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        inflight = self._inflight.pop(key, None)
+        if inflight is None:
+            return None
+        tier, model, started = inflight
+        route = f"{tier}:{model}"
+        stats = self.stats.setdefault(route, RouteStats())
+        elapsed = time.perf_counter() - started
+        stats.latency.record(elapsed)
+        usage = llm_response.usage_metadata
+        prompt_tokens = cached_tokens = completion_tokens = 0
+        if usage:
+            prompt_tokens = usage.prompt_token_count or 0
+            cached_tokens = usage.cached_content_token_count or 0
+            completion_tokens = usage.candidates_token_count or 0
+            stats.prompt_tokens += prompt_tokens
+            stats.cached_tokens += cached_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost_usd += estimate_cost(model, prompt_tokens, completion_tokens)
+        self._add_session_usage(callback_context, prompt_tokens, cached_tokens, completion_tokens,
+                                estimate_cost(model, prompt_tokens, completion_tokens))
+        self.recent_calls.append({
+            "agent": callback_context.agent_name,
+            "route": route,
+            "latency": round(elapsed, 3),
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": completion_tokens,
+        })
+        return None
+
+    def _add_session_usage(self, callback_context, prompt_tokens, cached_tokens, completion_tokens, cost):
+        session = getattr(callback_context, "session", None)
+        if session is None:
+            return
+        # Per-file sessions are named "{project_id}:{path}"; bill them to the project
+        project_id = session.id.split(":", 1)[0]
+        usage = self.session_usage.pop(project_id, None) or {
+            "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        }
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["cached_tokens"] += cached_tokens
+        usage["completion_tokens"] += completion_tokens
+        usage["cost_usd"] = round(usage["cost_usd"] + cost, 6)
+        self.session_usage[project_id] = usage
+        while len(self.session_usage) > MAX_TRACKED_SESSIONS:
+            self.session_usage.popitem(last=False)
+
+    def usage_for(self, project_id: str) -> dict:
+        """Call count, token and cost totals of one project's model calls so far"""
+        return dict(self.session_usage.get(project_id) or {})
+
+    def report(self) -> Dict[str, dict]:
+        """Per-route latency, token and cost summary for tuning the policy"""
+        return {route: stats.snapshot() for route, stats in self.stats.items()}
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        """The last calls with their prompt/cached/completion token counts, newest last"""
+        return list(self.recent_calls)[-limit:]
+
+
+# Global router shared by all agents
+model_router = ModelRouter()
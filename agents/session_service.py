@@ -0,0 +1,128 @@
+"""Bounded ADK session service shared by every runner"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.session import Session
+
+import config
+from context.session_manager import session_manager
+from utils.telemetry import get_logger, registry
+
+logger = get_logger("session_service")
+
+ADK_SESSIONS = registry.gauge("metaforge_adk_sessions", "ADK sessions held by the session service")
+ADK_SESSION_EVICTIONS = registry.counter(
+    "metaforge_adk_session_evictions_total", "ADK sessions dropped by the session service", ("reason",))
+
+SessionKey = Tuple[str, str, str]
+
+
+def load_project_session(session_id: str) -> Optional[Session]:
+    """Rebuild a project's ADK session from its ProjectState (adk_state/adk_events)"""
+    state = session_manager.get_session(session_id)
+    if state is None:
+        return None
+    from .base import create_adk_session  # base imports this module
+    return create_adk_session(state)
+
+
+class BoundedSessionService(InMemorySessionService):
+    """InMemorySessionService that only holds sessions while they are in use.
+
+    The authoritative copy of a project's ADK state and events is its
+    ProjectState. Runners register a session for the length of a run, and
+    the session is released as soon as the run ends. Sessions that nobody
+    holds anymore are evicted after `ttl` seconds, or oldest first beyond
+    `max_sessions`; this covers rehydrated sessions and leaked
+    registrations. A lookup for a session that is not held rebuilds it from
+    the ProjectState through `loader`. A single instance is shared by all
+    runners, so each session is stored once instead of once per runner.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_sessions: int = 200,
+                 loader: Optional[Callable[[str], Optional[Session]]] = load_project_session):
+        super().__init__()
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.loader = loader
+        self._last_used: "OrderedDict[SessionKey, float]" = OrderedDict()
+        self._holds: Dict[SessionKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._last_used)
+
+    def register(self, session: Session):
+        """Store `session` for a run; pairs with release()"""
+        key = (session.app_name, session.user_id, session.id)
+        self.sessions.setdefault(key[0], {}).setdefault(key[1], {})[key[2]] = session
+        self._holds[key] = self._holds.get(key, 0) + 1
+        self._touch(key)
+        self.evict()
+
+    def release(self, session: Session):
+        """End one run's hold; the session is dropped once no run holds it"""
+        key = (session.app_name, session.user_id, session.id)
+        remaining = self._holds.get(key, 0) - 1
+        if remaining > 0:
+            self._holds[key] = remaining
+            return
+        self._holds.pop(key, None)
+        self._drop(key)
+
+    def _touch(self, key: SessionKey):
+        self._last_used[key] = time.monotonic()
+        self._last_used.move_to_end(key)
+
+    def _drop(self, key: SessionKey, reason: Optional[str] = None):
+        self._last_used.pop(key, None)
+        users = self.sessions.get(key[0], {})
+        sessions = users.get(key[1], {})
+        if sessions.pop(key[2], None) is not None and reason:
+            ADK_SESSION_EVICTIONS.inc(reason=reason)
+        if not sessions:
+            users.pop(key[1], None)
+        if not users:
+            self.sessions.pop(key[0], None)
+
+    def evict(self):
+        """Drop unheld sessions idle for longer than the TTL, then the oldest beyond max_sessions"""
+        now = time.monotonic()
+        for key, last_used in list(self._last_used.items()):
+            if key not in self._holds and now - last_used > self.ttl:
+                self._drop(key, "ttl")
+        overflow = len(self._last_used) - self.max_sessions
+        for key in list(self._last_used):
+            if overflow <= 0:
+                break
+            if key not in self._holds:
+                self._drop(key, "size")
+                overflow -= 1
+
+    def _get_session_impl(self, *, app_name: str, user_id: str, session_id: str, config=None) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        if key not in self._last_used and self.loader is not None:
+            session = self.loader(session_id)
+            if session is not None and (session.app_name, session.user_id) == (app_name, user_id):
+                logger.debug("Rehydrated ADK session %s from project state", session_id)
+                self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+                self._touch(key)
+                self.evict()
+        elif key in self._last_used:
+            self._touch(key)
+        return super()._get_session_impl(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    def _delete_session_impl(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._holds.pop(key, None)
+        self._drop(key)
+
+    def report(self) -> dict:
+        return {"sessions": len(self._last_used), "held": len(self._holds),
+                "ttl": self.ttl, "max_sessions": self.max_sessions}
+
+
+# Shared by every MetaForgeRunner
+session_service = BoundedSessionService(config.ADK_SESSION_TTL_SECONDS, config.ADK_MAX_SESSIONS)
+registry.on_collect(lambda: ADK_SESSIONS.set(len(session_service)))
@@ -0,0 +1,91 @@
+"""Incremental parsing of streamed FileList structured output."""
+import json
+from typing import List
+
+from context.models import GeneratedFile
+from utils.telemetry import get_logger
+
+logger = get_logger("streaming")
+
+
+class FileListStreamParser:
+    """Resumable parser for a FileList JSON document arriving in chunks.
+
+    Feed it model text deltas as they stream in; every `{...}` element of the
+    top-level `files` array is returned as a GeneratedFile as soon as its
+    closing brace arrives. Only the text of the object currently being read is
+    buffered, so memory stays bounded by the largest single file.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget everything seen so far (e.g. when a new model turn starts)"""
+        self._stack: List[str] = []   # open containers: '{' or '['
+        self._in_string = False
+        self._escape = False
+        self._object: List[str] = []  # chunks of the file object being read
+        self._reading = False
+        self.files_parsed = 0
+
+    def feed(self, chunk: str) -> List[GeneratedFile]:
+        """Consume a text delta and return the files completed by it"""
+        completed: List[GeneratedFile] = []
+        start = 0 if self._reading else None
+        i, n = 0, len(chunk)
+
+        while i < n:
+            if self._in_string:
+                # Jump straight to the next quote or backslash
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                q = chunk.find('"', i)
+                b = chunk.find('\\', i)
+                if b != -1 and (q == -1 or b < q):
+                    self._escape = True
+                    i = b + 1
+                    continue
+                if q == -1:
+                    break
+                self._in_string = False
+                i = q + 1
+                continue
+
+            c = chunk[i]
+            if c == '"':
+                self._in_string = True
+            elif c in '{[':
+                if c == '{' and self._stack == ['{', '[']:
+                    # A new element of the files array
+                    self._reading = True
+                    self._object = []
+                    start = i
+                self._stack.append(c)
+            elif c in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if c == '}' and self._reading and self._stack == ['{', '[']:
+                    self._object.append(chunk[start:i + 1])
+                    self._reading = False
+                    start = None
+                    parsed = self._parse(''.join(self._object))
+                    self._object = []
+                    if parsed is not None:
+                        completed.append(parsed)
+            i += 1
+
+        if self._reading and start is not None:
+            self._object.append(chunk[start:])
+        return completed
+
+    def _parse(self, text: str):
+        try:
+            file = GeneratedFile(**json.loads(text))
+        except Exception as e:
+            logger.warning("Skipping unparsable streamed file object: %s", e)
+            return None
+        self.files_parsed += 1
+        return file
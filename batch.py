@@ -0,0 +1,182 @@
+"""MetaForge headless batch mode
+
+Generates one project per line of a JSONL request file, without the UI:
+
+    python batch.py requests.jsonl --concurrency 4 --report batch_report.jsonl
+
+Each line needs a prompt in "prompt" or "description", or a "title" and
+"body". An optional "request_id" (or "id") names the row in the report.
+Every project is orchestrated, validated and self-healed, then written to
+OUTPUT_DIR. Clean builds are added to the project index as templates. One
+report row per request is appended as soon as that request finishes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from agents import MetaForgeOrchestrator
+from agents.routing import model_router
+from context import ProblemStatement, ValidationResult, project_index
+from context.session_manager import session_manager
+from utils import validate_files, write_files_to_disk
+from utils.blocking import run_blocking
+from utils.loop_monitor import loop_monitor
+from utils.telemetry import get_logger
+
+logger = get_logger("batch")
+
+
+def load_requests(path: Path, limit: int = 0) -> list[tuple[str, str]]:
+    """(request_id, prompt) pairs from a JSONL file, skipping lines without a prompt"""
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning("%s:%d: not valid JSON (%s)", path, line_no, e)
+                continue
+            prompt = record.get("prompt") or record.get("description")
+            if not prompt:
+                prompt = "\n\n".join(part for part in (record.get("title"), record.get("body")) if part)
+            if not prompt:
+                logger.warning("%s:%d: no prompt, skipped", path, line_no)
+                continue
+            request_id = str(record.get("request_id") or record.get("id") or f"line-{line_no}")
+            requests.append((request_id, prompt))
+            if limit and len(requests) >= limit:
+                break
+    return requests
+
+
+async def run_request(orchestrator: MetaForgeOrchestrator, request_id: str, prompt: str,
+                      heal_retries: int, index: bool) -> dict:
+    """Orchestrate, validate and self-heal one request; returns its report row"""
+    session_id = session_manager.create_session(ProblemStatement(description=prompt))
+    project_dir = config.OUTPUT_DIR / session_id
+    timings: dict[str, float] = {}
+    row = {"request_id": request_id, "session_id": session_id, "project_dir": str(project_dir)}
+    started = time.perf_counter()
+
+    try:
+        stage = time.perf_counter()
+        state = await orchestrator.orchestrate(prompt, session_id)
+        timings["orchestrate"] = time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        errors = await run_blocking(validate_files, list(state.files))
+        timings["validate"] = time.perf_counter() - stage
+
+        if errors and heal_retries > 0:
+            stage = time.perf_counter()
+            try:
+                state = await orchestrator.self_heal(session_id, errors, max_retries=heal_retries)
+                errors = await run_blocking(validate_files, list(state.files))
+            except Exception as heal_error:
+                logger.warning("%s: self-healing failed: %s", request_id, heal_error)
+            timings["self_heal"] = time.perf_counter() - stage
+
+        state.validation = ValidationResult(passed=not errors, errors=errors)
+        await run_blocking(write_files_to_disk, list(state.files), project_dir)
+        if index and state.validation.passed:
+            project_index.add(state)
+
+        row.update({
+            "status": "passed" if state.validation.passed else "failed_validation",
+            "pipeline_path": state.pipeline_path,
+            "plan_source": state.adk_state.get("plan_source"),
+            "files": len(state.files),
+            "validation": {"passed": state.validation.passed, "errors": errors[:20]},
+            "stage_timings": {k: round(v, 3) for k, v in state.timings.items()},
+        })
+    except Exception as e:
+        row.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        timings["total"] = time.perf_counter() - started
+        row["timings"] = {k: round(v, 3) for k, v in timings.items()}
+        row["usage"] = model_router.usage_for(session_id)
+        session_manager.clear_session(session_id)
+    return row
+
+
+async def run_batch(requests: list[tuple[str, str]], report_path: Path, concurrency: int,
+                    heal_retries: int, index: bool) -> dict:
+    """Run every request with at most `concurrency` in flight, appending report rows as they finish"""
+    orchestrator = MetaForgeOrchestrator()
+    if index and config.PROJECT_INDEX_BACKFILL:
+        await project_index.backfill(config.OUTPUT_DIR, config.EVENT_LOG_DIR)
+    loop_monitor.start()
+    try:
+        semaphore = asyncio.Semaphore(concurrency)
+        counts = {"passed": 0, "failed_validation": 0, "error": 0}
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+
+        with open(report_path, "a", encoding="utf-8") as report:
+            async def worker(request_id: str, prompt: str):
+                async with semaphore:
+                    logger.info("Batch: starting %s", request_id)
+                    row = await run_request(orchestrator, request_id, prompt, heal_retries, index)
+                counts[row["status"]] += 1
+                report.write(json.dumps(row) + "\n")
+                report.flush()
+                logger.info("Batch: %s %s in %.1fs (%d/%d)", request_id, row["status"], row["timings"]["total"],
+                            sum(counts.values()), len(requests))
+
+            await asyncio.gather(*(worker(rid, prompt) for rid, prompt in requests))
+    finally:
+        loop_monitor.stop()
+
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(requests),
+        **counts,
+        "wall_seconds": round(wall, 3),
+        "projects_per_minute": round(len(requests) / wall * 60, 2) if wall else 0.0,
+        "paths": orchestrator.path_latency_report(),
+        "routes": model_router.report(),
+        "retrieval": orchestrator.retrieval_report(),
+        "event_loop": loop_monitor.report(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate projects for every request in a JSONL file")
+    parser.add_argument("requests", type=Path, help="JSONL file with one request per line")
+    parser.add_argument("--report", type=Path, default=config.OUTPUT_DIR / "batch_report.jsonl",
+                        help="JSONL report to append to")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY)
+    parser.add_argument("--heal-retries", type=int, default=2, help="self-heal attempts (0 disables)")
+    parser.add_argument("--limit", type=int, default=0, help="only the first N requests")
+    parser.add_argument("--no-index", action="store_true", help="do not add clean builds to the project index")
+    args = parser.parse_args()
+
+    if config.LLM_PROVIDER != "fake" and not config.OPENAI_API_KEY:
+        print("ERROR: OPENAI_API_KEY environment variable not set!", flush=True)
+        sys.exit(1)
+
+    requests = load_requests(args.requests, args.limit)
+    if not requests:
+        print(f"No requests found in {args.requests}")
+        sys.exit(1)
+
+    logger.info("Batch: %d requests, concurrency %d, report %s", len(requests), args.concurrency, args.report)
+    summary = asyncio.run(run_batch(requests, args.report, max(1, args.concurrency),
+                                    args.heal_retries, not args.no_index))
+    print(json.dumps(summary, indent=2))
+    sys.exit(0 if summary["error"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Micro-benchmarks for the hot non-LLM helpers.
+
+Covers the validators, write_files_to_disk, create_zip_archive and the code
+view highlighting. It runs on synthetic generated-app corpora from 1 KB to
+several MB. For every case it reports the time per size, throughput in MB/s
+and a scaling exponent fitted on a log-log scale (about 1 for linear work,
+about 2 for quadratic). It is fully offline.
+
+    python -m benchmarks.micro                          # compare with the stored baseline
+    python -m benchmarks.micro --save-baseline          # refresh benchmarks/baselines/micro.json
+    python -m benchmarks.micro --cases validate_html --max-size 4MB --fail-on-regression
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from context.models import GeneratedFile  # noqa: E402
+from utils import validate_html, validate_javascript, validate_python  # noqa: E402
+from utils import write_files_to_disk, create_zip_archive  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+SIZES = [1 << 10, 16 << 10, 256 << 10, 1 << 20, 4 << 20]
+FILES_PER_PROJECT = 16
+
+HTML_BLOCK = (
+    '<div class="card" id="card-{i}">\n'
+    '  <h2 class="title">Item {i}</h2>\n'
+    '  <p>Generated description for <span class="tag">item {i}</span>.</p>\n'
+    '  <img src="img/{i}.png" alt="thumb">\n'
+    '  <button onclick="select({i})">Open</button>\n'
+    '</div>\n'
+)
+JS_BLOCK = (
+    "function handle{i}(event) {{\n"
+    "  const items = state.items.filter((item) => item.id !== {i});\n"
+    "  render([...items, {{ id: {i}, label: `item ${{event.type}}` }}]);\n"
+    "}}\n"
+)
+PY_BLOCK = (
+    "def handler_{i}(request):\n"
+    "    items = [item for item in STORE if item['id'] != {i}]\n"
+    "    return {{'status': 'ok', 'count': len(items), 'id': {i}}}\n\n"
+)
+
+
+def _repeat_to(block: str, size: int) -> str:
+    parts, total, i = [], 0, 0
+    while total < size:
+        part = block.format(i=i)
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def html_doc(size: int) -> str:
+    head = "<!DOCTYPE html>\n<html>\n<head><title>Bench</title></head>\n<body>\n"
+    return head + _repeat_to(HTML_BLOCK, max(0, size - len(head) - 16)) + "</body>\n</html>\n"
+
+
+def project(size: int) -> List[GeneratedFile]:
+    """A generated app of about `size` bytes spread over FILES_PER_PROJECT files"""
+    per_file = max(1, size // FILES_PER_PROJECT)
+    files = [GeneratedFile(path="index.html", content=html_doc(per_file), language="html")]
+    for n in range(1, FILES_PER_PROJECT):
+        files.append(GeneratedFile(path=f"src/module_{n}.js", content=_repeat_to(JS_BLOCK, per_file),
+                                   language="javascript"))
+    return files
+
+
+def _highlighter() -> Callable[[str, str], str]:
+    from ui.components.file_tree import highlight_code
+    return highlight_code
+
+
+def make_cases(workdir: Path) -> Dict[str, Callable[[int], Callable[[], object]]]:
+    """case name -> (size -> zero-argument callable doing the measured work)"""
+    counter = iter(range(1_000_000))
+
+    def write_case(size):
+        files = project(size)
+        return lambda: write_files_to_disk(files, workdir / f"write-{next(counter)}")
+
+    def zip_case(size):
+        project_dir = write_files_to_disk(project(size), workdir / f"zip-src-{size}")
+        return lambda: create_zip_archive(project_dir, workdir / f"out-{next(counter)}.zip")
+
+    def highlight_case(size):
+        highlight, code = _highlighter(), _repeat_to(JS_BLOCK, size)
+        return lambda: highlight(code, "javascript")
+
+    def python_case(size):
+        code = _repeat_to(PY_BLOCK, size)
+        return lambda: validate_python(code)
+
+    def js_case(size):
+        code = _repeat_to(JS_BLOCK, size)
+        return lambda: validate_javascript(code)
+
+    def html_case(size):
+        code = html_doc(size)
+        return lambda: validate_html(code)
+
+    return {
+        "validate_html": html_case,
+        "validate_javascript": js_case,
+        "validate_python": python_case,
+        "write_files_to_disk": write_case,
+        "create_zip_archive": zip_case,
+        "highlight": highlight_case,
+    }
+
+
+def time_call(fn: Callable[[], object], min_time: float, max_runs: int) -> float:
+    """Best-of time for one call, repeating until `min_time` has been spent"""
+    best, spent, runs = math.inf, 0.0, 0
+    while runs < max_runs and (runs < 2 or spent < min_time):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return best
+
+
+def scaling_exponent(points: List[dict]) -> float:
+    """Least-squares slope of log(time) over log(size) on the sizes above 16 KB"""
+    usable = [(math.log(p["bytes"]), math.log(p["seconds"])) for p in points
+              if p["bytes"] >= 16 << 10 and p["seconds"] > 0] or \
+             [(math.log(p["bytes"]), math.log(p["seconds"])) for p in points if p["seconds"] > 0]
+    if len(usable) < 2:
+        return 0.0
+    mx = sum(x for x, _ in usable) / len(usable)
+    my = sum(y for _, y in usable) / len(usable)
+    var = sum((x - mx) ** 2 for x, _ in usable)
+    return round(sum((x - mx) * (y - my) for x, y in usable) / var, 3) if var else 0.0
+
+
+def run(cases: List[str], sizes: List[int], min_time: float, max_runs: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="metaforge-micro-") as tmp:
+        factories = make_cases(Path(tmp))
+        for name in cases:
+            points = []
+            for size in sizes:
+                seconds = time_call(factories[name](size), min_time, max_runs)
+                points.append({
+                    "bytes": size,
+                    "seconds": round(seconds, 7),
+                    "mb_per_s": round(size / (1 << 20) / seconds, 2) if seconds else None,
+                })
+                print(f"  {name:<22} {_fmt_size(size):>7}  {seconds * 1000:10.3f} ms", file=sys.stderr)
+            results[name] = {"points": points, "scaling_exponent": scaling_exponent(points)}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Per case and size, current time over baseline time; regressions exceed `threshold`"""
+    rows = []
+    for name, case in results.items():
+        base_points = {p["bytes"]: p for p in baseline.get("results", {}).get(name, {}).get("points", [])}
+        for point in case["points"]:
+            base = base_points.get(point["bytes"])
+            if not base or not base["seconds"]:
+                continue
+            ratio = point["seconds"] / base["seconds"]
+            rows.append({"case": name, "bytes": point["bytes"], "ratio": round(ratio, 3),
+                         "regression": ratio > threshold})
+    return rows
+
+
+def _fmt_size(size: int) -> str:
+    return f"{size >> 20}MB" if size >= 1 << 20 else f"{size >> 10}KB"
+
+
+def _parse_size(text: str) -> int:
+    text = text.strip().upper()
+    for suffix, factor in (("MB", 1 << 20), ("KB", 1 << 10), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def main():
+    all_cases = list(make_cases(Path(".")))
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for validators, file I/O and highlighting")
+    parser.add_argument("--cases", nargs="+", choices=all_cases, default=all_cases)
+    parser.add_argument("--max-size", default="4MB", help="largest corpus size (e.g. 256KB, 4MB)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per measurement")
+    parser.add_argument("--max-runs", type=int, default=50)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown ratio counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    sizes = [s for s in SIZES if s <= _parse_size(args.max_size)]
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "min_time": args.min_time},
+        "results": run(args.cases, sizes, args.min_time, args.max_runs),
+    }
+
+    regressions = []
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        report["comparison"] = compare(report["results"], json.loads(args.baseline.read_text()), args.threshold)
+        regressions = [row for row in report["comparison"] if row["regression"]]
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold}x baseline", file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
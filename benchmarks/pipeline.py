@@ -0,0 +1,168 @@
+"""Offline end-to-end benchmark of the generation pipeline itself.
+
+Model latency is taken out of the picture by the deterministic FakeLlm
+(METAFORGE_LLM_PROVIDER=fake). What remains is measured: the ADK plumbing,
+pydantic parsing, file merging, validation, disk writes and preview mounting.
+Each project size runs orchestrate, validate, write, preview mount, refine
+and self_heal. Wall times come from untraced repeats. Allocations (traced
+peak and retained bytes) come from one extra run under tracemalloc. The
+result is JSON, so two runs can be diffed.
+
+    python -m benchmarks.pipeline --repeat 5 --output bench.json
+    python -m benchmarks.pipeline --sizes large --latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["METAFORGE_LLM_PROVIDER"] = "fake"
+
+import config  # noqa: E402
+
+config.LLM_PROVIDER = "fake"
+
+# (FakeLlm output_files, file_bytes per file) per project size. Model output
+# streams in 64-char chunks and every chunk is an ADK event, so streamed bytes
+# dominate the pipeline's own cost
+SIZES = {
+    "small": (1, 2_000),
+    "medium": (8, 4_000),
+    "large": (24, 8_000),
+}
+STAGES = ("orchestrate", "validate", "write", "preview_mount", "refine", "self_heal")
+PROBLEM = "A kanban board with columns, drag and drop cards, labels and due dates"
+
+
+async def run_once(orchestrator, output_dir: Path, trace: bool) -> dict:
+    """One pass over every stage; returns per-stage wall time (and allocations when tracing)"""
+    from nicegui import app
+    from context import ProblemStatement
+    from context.session_manager import session_manager
+    from utils import validate_files, write_files_to_disk
+
+    session_id = session_manager.create_session(ProblemStatement(description=PROBLEM))
+    results: dict[str, dict] = {}
+
+    async def stage(name, fn):
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        value = fn()
+        if asyncio.iscoroutine(value):
+            value = await value
+        elapsed = time.perf_counter() - started
+        results[name] = {"wall": elapsed}
+        if trace:
+            current, peak = tracemalloc.get_traced_memory()
+            results[name].update({"peak_alloc_bytes": peak - before, "retained_bytes": current - before})
+        return value
+
+    try:
+        state = await stage("orchestrate", lambda: orchestrator.orchestrate(PROBLEM, session_id))
+        await stage("validate", lambda: validate_files(state.files))
+        project_dir = output_dir / session_id
+        await stage("write", lambda: write_files_to_disk(state.files, project_dir))
+        await stage("preview_mount", lambda: app.add_static_files(f"/bench/{session_id}", str(project_dir)))
+        await stage("refine", lambda: orchestrator.refine("Add a footer and make the header blue", session_id))
+        errors = [f"{f.path}: Unclosed tag <div>" for f in list(state.files)[:3]]
+        await stage("self_heal", lambda: orchestrator.self_heal(session_id, errors, max_retries=1))
+        results["_files"] = {"count": len(state.files), "bytes": sum(f.size for f in state.files)}
+    finally:
+        session_manager.clear_session(session_id)
+    return results
+
+
+async def bench_size(output_files: int, file_bytes: int, repeat: int, latency: float,
+                     output_dir: Path, trace: bool) -> dict:
+    config.FAKE_LLM_OPTIONS = {"latency": latency, "output_files": output_files, "file_bytes": file_bytes}
+    from agents import MetaForgeOrchestrator
+
+    started = time.perf_counter()
+    orchestrator = MetaForgeOrchestrator()
+    setup = time.perf_counter() - started
+
+    await run_once(orchestrator, output_dir, trace=False)  # warm-up
+    runs = [await run_once(orchestrator, output_dir, trace=False) for _ in range(repeat)]
+
+    stages = {}
+    for stage in STAGES:
+        walls = [run[stage]["wall"] for run in runs]
+        stages[stage] = {
+            "wall_median": round(statistics.median(walls), 6),
+            "wall_min": round(min(walls), 6),
+            "wall_max": round(max(walls), 6),
+        }
+
+    if trace:
+        tracemalloc.start()
+        traced = await run_once(orchestrator, output_dir, trace=True)
+        tracemalloc.stop()
+        for stage in STAGES:
+            stages[stage]["peak_alloc_bytes"] = traced[stage]["peak_alloc_bytes"]
+            stages[stage]["retained_bytes"] = traced[stage]["retained_bytes"]
+
+    return {
+        "fake_llm": config.FAKE_LLM_OPTIONS,
+        "files": runs[-1]["_files"],
+        "orchestrator_setup": round(setup, 6),
+        "stages": stages,
+        "pipeline_total_median": round(sum(s["wall_median"] for s in stages.values()), 6),
+    }
+
+
+async def run(sizes: list[str], repeat: int, latency: float, trace: bool) -> dict:
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "model_latency": latency,
+            "tracemalloc": trace,
+        },
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="metaforge-bench-") as tmp:
+        for name in sizes:
+            output_files, file_bytes = SIZES[name]
+            # The pipeline prints progress; keep it out of the JSON (it is still executed and timed)
+            with contextlib.redirect_stdout(io.StringIO()):
+                report["sizes"][name] = await bench_size(
+                    output_files, file_bytes, repeat, latency, Path(tmp), trace
+                )
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["meta"]["peak_rss_bytes"] = maxrss if sys.platform == "darwin" else maxrss * 1024
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with the fake model provider")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency per call (seconds)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip the allocation pass")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.sizes, max(1, args.repeat), args.latency, not args.no_tracemalloc))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
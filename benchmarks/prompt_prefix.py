@@ -0,0 +1,128 @@
+"""How much of each refine prompt a provider prefix cache could reuse.
+
+Runs consecutive refines on a synthetic project, with one file edited between
+calls as a real refine would, and reports the prefix each prompt shares with
+the previous one. It compares the legacy layout (unsorted file dump with the
+instruction mixed in) against agents.prompts. With --fake the refines go
+through the real orchestrator with the offline FakeLlm, and the cached-token
+counts the router recorded are printed as well.
+
+    python -m benchmarks.prompt_prefix --files 12 --refines 5
+    python -m benchmarks.prompt_prefix --fake
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.prompts import refine_prompt, shared_prefix_chars  # noqa: E402
+from context.models import FileSet, GeneratedFile, RequirementSpec, TechStack  # noqa: E402
+
+INSTRUCTIONS = ["make the header blue", "add a footer", "bigger title", "add a dark mode toggle",
+                "show a loading spinner", "round the buttons", "add keyboard shortcuts"]
+
+
+def synthetic_project(n_files: int, seed: int):
+    rng = random.Random(seed)
+    spec = RequirementSpec(
+        functional_components=["Main UI", "Core logic", "Persistence"],
+        tech_stack=TechStack(frontend="React", backend="none", database="none"),
+        clarifications=[],
+        complexity="medium",
+    )
+    files = []
+    for i in range(n_files):
+        body = "\n".join(f"const value{j} = {rng.randint(0, 10_000)};" for j in range(60))
+        files.append(GeneratedFile(path=f"src/module_{i:02d}.js", content=body, language="javascript"))
+    files.append(GeneratedFile(path="index.html", content="<!DOCTYPE html><html><body></body></html>",
+                               language="html"))
+    rng.shuffle(files)  # generation order is arbitrary
+    return spec, files
+
+
+def legacy_prompt(spec, files, instruction: str) -> str:
+    """The layout refine used before agents.prompts: list order, dict repr of the spec"""
+    context = "".join(f"--- FILE: {f.path} ---\n{f.content}\n\n" for f in files)
+    return (
+        "You are refining an existing project. Use the provided code as context.\n"
+        f"Existing requirements (JSON): {spec.model_dump()}\n"
+        f"Current Project Files:\n{context}\n"
+        f"User change request: {instruction}\n"
+    )
+
+
+def simulate(n_files: int, refines: int, seed: int) -> dict:
+    """Both layouts over the same edit sequence; the edited file moves to the end of the list"""
+    spec, files = synthetic_project(n_files, seed)
+    rng = random.Random(seed + 1)
+    legacy_files = list(files)
+    fileset = FileSet(files)
+    results = {"legacy": [], "stable": []}
+    previous = {"legacy": None, "stable": None}
+
+    for i in range(refines):
+        instruction = INSTRUCTIONS[i % len(INSTRUCTIONS)]
+        prompts = {
+            "legacy": legacy_prompt(spec, legacy_files, instruction),
+            "stable": refine_prompt(spec, fileset, instruction),
+        }
+        for layout, prompt in prompts.items():
+            if previous[layout] is not None:
+                shared = shared_prefix_chars(previous[layout], prompt)
+                results[layout].append(round(shared / len(prompt), 3))
+            previous[layout] = prompt
+
+        # The model rewrites one file; the legacy list re-appends it, as the old merge did
+        edited = rng.choice(legacy_files)
+        updated = GeneratedFile(path=edited.path, content=edited.content + f"\n// edit {i}", language=edited.language)
+        legacy_files = [f for f in legacy_files if f.path != edited.path] + [updated]
+        fileset.upsert(updated)
+
+    return {
+        layout: {"shared_prefix_ratio": ratios,
+                 "mean": round(sum(ratios) / len(ratios), 3) if ratios else 0.0}
+        for layout, ratios in results.items()
+    }
+
+
+async def run_fake(n_files: int, refines: int, seed: int) -> dict:
+    """Consecutive refines through the orchestrator with the offline provider"""
+    os.environ["METAFORGE_LLM_PROVIDER"] = "fake"
+    import config
+    config.LLM_PROVIDER = "fake"
+    from agents import MetaForgeOrchestrator
+    from agents.routing import model_router
+    from context import ProblemStatement, session_manager
+
+    orchestrator = MetaForgeOrchestrator()
+    spec, files = synthetic_project(n_files, seed)
+    session_id = session_manager.create_session(ProblemStatement(description="synthetic project"))
+    state = session_manager.get_session(session_id)
+    state.requirements = spec
+    state.files.upsert_many(files)
+    for i in range(refines):
+        await orchestrator.refine(INSTRUCTIONS[i % len(INSTRUCTIONS)], session_id)
+    return {"calls": model_router.recent(refines), "routes": model_router.report()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--refines", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--fake", action="store_true", help="also run refines through FakeLlm")
+    args = parser.parse_args()
+
+    report = {"simulated": simulate(args.files, args.refines, args.seed)}
+    if args.fake:
+        report["fake_provider"] = asyncio.run(run_fake(args.files, args.refines, args.seed))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
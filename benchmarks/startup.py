@@ -0,0 +1,154 @@
+"""Startup benchmark: import time of the web entry point, summarized from -X importtime.
+
+Every repeat imports the target in a fresh interpreter, so the numbers are
+what a cold dyno pays, apart from the OS file cache. The report gives:
+
+- the median total import time of the target;
+- self time per top-level package and the slowest single modules;
+- time until MetaForgeApp() is constructed;
+- whether the heavy generation stack (ADK, LiteLLM, google.genai,
+  pygments) leaked into startup.
+
+It compares against a stored baseline and can enforce a time budget.
+
+    python -m benchmarks.startup                          # compare with the stored baseline
+    python -m benchmarks.startup --save-baseline          # refresh benchmarks/baselines/startup.json
+    python -m benchmarks.startup --budget-ms 1500 --fail-on-regression
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).parent / "baselines" / "startup.json"
+TARGET = "ui.main"
+# Only needed once a build starts; importing any of them at startup is a regression
+DEFERRED = ("agents", "google.adk", "litellm", "google.genai", "pygments")
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Rows of -X importtime output: module, self and cumulative microseconds, nesting depth"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                         "depth": (len(indent) - 1) // 2})
+    return rows
+
+
+def _python(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    args = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+    return subprocess.run(args, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def measure_imports(target: str) -> dict:
+    """One fresh interpreter importing `target` under -X importtime"""
+    rows = parse_importtime(_python(f"import {target}", importtime=True).stderr)
+    total = next((r["cumulative_us"] for r in rows if r["module"] == target and r["depth"] == 0), 0)
+    packages: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        packages[row["module"].split(".")[0]] += row["self_us"]
+    return {"total_us": total, "modules": len(rows), "packages": dict(packages), "rows": rows}
+
+
+def measure_app_ready(target: str) -> float:
+    """Seconds from interpreter start to a constructed MetaForgeApp (what the dyno waits for)"""
+    started = time.perf_counter()
+    _python(f"import {target}; {target}.MetaForgeApp()")
+    return time.perf_counter() - started
+
+
+def loaded_deferred(target: str) -> List[str]:
+    """Heavy modules that importing `target` loaded anyway"""
+    out = _python(f"import sys, json, {target}; print(json.dumps(sorted(sys.modules)))").stdout
+    loaded = set(json.loads(out.strip().splitlines()[-1]))
+    return [m for m in DEFERRED if m in loaded]
+
+
+def run(target: str, repeat: int, top: int) -> dict:
+    samples = [measure_imports(target) for _ in range(repeat)]
+    totals = [s["total_us"] / 1e6 for s in samples]
+
+    packages: Dict[str, List[int]] = defaultdict(list)
+    modules: Dict[str, List[int]] = defaultdict(list)
+    for sample in samples:
+        for package, us in sample["packages"].items():
+            packages[package].append(us)
+        for row in sample["rows"]:
+            modules[row["module"]].append(row["self_us"])
+
+    def median_ms(values: List[int]) -> float:
+        return round(statistics.median(values) / 1000, 2)
+
+    by_package = sorted(((p, median_ms(v)) for p, v in packages.items()), key=lambda x: x[1], reverse=True)
+    by_module = sorted(((m, median_ms(v)) for m, v in modules.items()), key=lambda x: x[1], reverse=True)
+    ready = [measure_app_ready(target) for _ in range(repeat)]
+    return {
+        "target": target,
+        "import_seconds_median": round(statistics.median(totals), 4),
+        "import_seconds_min": round(min(totals), 4),
+        "modules_imported": samples[-1]["modules"],
+        "app_ready_seconds_median": round(statistics.median(ready), 4),
+        "top_packages_ms": dict(by_package[:top]),
+        "top_modules_self_ms": dict(by_module[:top]),
+        "deferred_loaded": loaded_deferred(target),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report and budget for the web entry point")
+    parser.add_argument("--target", default=TARGET, help="module to import (default: ui.main)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages/modules listed in the report")
+    parser.add_argument("--budget-ms", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=1.3, help="slowdown ratio counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "repeat": args.repeat},
+        "results": run(args.target, max(1, args.repeat), args.top),
+    }
+    results, problems = report["results"], []
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        base = json.loads(args.baseline.read_text())["results"]
+        ratio = results["import_seconds_median"] / base["import_seconds_median"] if base["import_seconds_median"] else 1.0
+        report["comparison"] = {"baseline_import_seconds": base["import_seconds_median"], "ratio": round(ratio, 3)}
+        if ratio > args.threshold:
+            problems.append(f"import time {ratio:.2f}x baseline")
+    if args.budget_ms is not None and results["import_seconds_median"] * 1000 > args.budget_ms:
+        problems.append(f"import time {results['import_seconds_median'] * 1000:.0f}ms over the {args.budget_ms:.0f}ms budget")
+    if results["deferred_loaded"]:
+        problems.append(f"loaded at startup: {', '.join(results['deferred_loaded'])}")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Configuration for MetaForge"""
 import os
+import secrets
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -9,14 +10,125 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 MODEL_NAME = "gpt-4o-mini"
 
+# Model routing tiers (see agents/routing.py); MODEL_NAME stays the default tier
+MODEL_TIERS = {
+    "fast": os.getenv("MODEL_FAST", "gpt-4.1-nano"),
+    "default": os.getenv("MODEL_DEFAULT", MODEL_NAME),
+    "strong": os.getenv("MODEL_STRONG", "gpt-4o"),
+}
+# USD per million tokens (input, output), used for per-route cost stats
+MODEL_PRICING = {
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+}
+# Model provider behind the agents: "litellm" (OpenAI via LiteLLM) or "fake" (offline, agents/fake_llm.py)
+LLM_PROVIDER = os.getenv("METAFORGE_LLM_PROVIDER", "litellm")
+FAKE_LLM_OPTIONS: dict = {}  # FakeLlm field overrides (latency, output_files, file_bytes, ...)
+
+# Resilient model calls (see agents/resilience.py)
+MODEL_CALL_TIMEOUT = float(os.getenv("MODEL_CALL_TIMEOUT", 180))  # seconds per attempt
+AGENT_TIMEOUTS = {
+    "Planner": 60.0,
+    "FrontendCoder": 240.0,
+    "BackendCoder": 180.0,
+    "FrontendFileCoder": 120.0,
+    "BackendFileCoder": 120.0,
+}
+MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", 2))
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "0") == "1"
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+SMALL_EDIT_CHARS = 200         # refine instructions up to this size count as small edits
+LARGE_PROMPT_CHARS = 60_000    # build prompts above this size go to the strong tier
+
+# Chat messages arriving within this window (or while a refine runs) are merged into one refine
+REFINE_DEBOUNCE_SECONDS = float(os.getenv("REFINE_DEBOUNCE_SECONDS", 1.5))
+
 # Paths
 BASE_DIR = Path(__file__).parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 OUTPUT_DIR = BASE_DIR / "generated_projects"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Similar-project retrieval: near-duplicate prompts reuse a past plan and files as a template
+PROJECT_INDEX_PATH = OUTPUT_DIR / "project_index.jsonl"
+RETRIEVAL_MIN_SIMILARITY = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", 0.8))
+RETRIEVAL_MAX_TEMPLATE_CHARS = 40_000
+# Past builds still on disk (with their ADK event log) are added to the index at startup
+PROJECT_INDEX_BACKFILL = os.getenv("PROJECT_INDEX_BACKFILL", "1") == "1"
+
+# Manifest-driven generation: plans with at least this many files are built file-by-file in parallel.
+# Smaller plans stay on the whole-app coders, which already split frontend and backend; every per-file
+# task resends the full plan, so fanning out only pays off for large manifests
+MANIFEST_MIN_FILES = int(os.getenv("MANIFEST_MIN_FILES", 6))
+MAX_PARALLEL_FILES = int(os.getenv("MAX_PARALLEL_FILES", 4))
+
+# ADK sessions are held only while a run uses them; unheld ones are evicted after the TTL or beyond the cap
+ADK_SESSION_TTL_SECONDS = float(os.getenv("ADK_SESSION_TTL_SECONDS", 600))
+ADK_MAX_SESSIONS = int(os.getenv("ADK_MAX_SESSIONS", 200))
+
+# ADK history on ProjectState: the last ADK_EVENT_WINDOW events plus one summary of older turns;
+# the raw history is appended to a gzip JSONL log per session
+ADK_EVENT_WINDOW = int(os.getenv("ADK_EVENT_WINDOW", 12))
+ADK_SUMMARY_MAX_LINES = int(os.getenv("ADK_SUMMARY_MAX_LINES", 40))
+EVENT_LOG_DIR = OUTPUT_DIR / "event_logs"
+
+# Cold storage: sessions idle this long with no viewer or running task are compressed to COLD_STORAGE_DIR
+# and rehydrated on access. An empty COLD_STORAGE_DIR keeps the compressed copies in memory instead, which
+# only shrinks them: the hard memory limit below then barely caps resident memory
+COLD_AFTER_SECONDS = float(os.getenv("COLD_AFTER_SECONDS", 900))
+COLD_SWEEP_SECONDS = float(os.getenv("COLD_SWEEP_SECONDS", 60))
+_COLD_STORAGE_DIR = os.getenv("COLD_STORAGE_DIR", str(OUTPUT_DIR / "cold_sessions"))
+COLD_STORAGE_DIR = Path(_COLD_STORAGE_DIR) if _COLD_STORAGE_DIR else None
+
+# Per-session memory limits (estimated retained bytes, see context/memory.py): above the soft limit a
+# session is compacted (older versions, ADK events, progress steps); above the hard limit it is moved to
+# cold storage when nobody is viewing it, and new refines are refused while it stays there
+SESSION_MEMORY_SOFT_LIMIT = int(os.getenv("SESSION_MEMORY_SOFT_LIMIT", 16 * 1024 * 1024))
+SESSION_MEMORY_HARD_LIMIT = int(os.getenv("SESSION_MEMORY_HARD_LIMIT", 64 * 1024 * 1024))
+MEMORY_KEEP_VERSIONS = int(os.getenv("MEMORY_KEEP_VERSIONS", 5))
+MEMORY_KEEP_PROGRESS_STEPS = int(os.getenv("MEMORY_KEEP_PROGRESS_STEPS", 20))
+
+# Vendored CDN assets (see preview/asset_cache.py): preview HTML is served with known CDN URLs pointing at
+# local, integrity-checked copies; ASSET_CACHE_SEED_DIR (a <host>/<path> mirror) is imported at startup and
+# with ASSET_CACHE_FETCH=1, CDN references found in served preview HTML are downloaded in the background until
+# the store holds ASSET_CACHE_MAX_BYTES
+ASSET_CACHE_DIR = Path(os.getenv("ASSET_CACHE_DIR", OUTPUT_DIR / "asset_cache"))
+ASSET_CACHE_SEED_DIR = Path(os.environ["ASSET_CACHE_SEED_DIR"]) if os.getenv("ASSET_CACHE_SEED_DIR") else None
+ASSET_CACHE_FETCH = os.getenv("ASSET_CACHE_FETCH", "0") == "1"
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Headless batch mode (batch.py): requests generated concurrently
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+
+# Logging: level for metaforge.* loggers; per-event logs keep 1 in LOG_SAMPLE_EVERY
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 20))
+
+# Event loop health: blocking helpers run on a shared pool; lag is sampled every interval and
+# the loop's stack is captured whenever it is blocked for longer than the stall threshold
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", 8))
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.1))
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", 0.25))
+
+# On-demand profiling (/admin/profile): disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_DIR = OUTPUT_DIR / "profiles"
+
+# Startup: the generation stack is imported lazily; PREWARM loads it in the background once the server is up
+PREWARM = os.getenv("PREWARM", "1") == "1"
+PREWARM_DELAY_SECONDS = float(os.getenv("PREWARM_DELAY_SECONDS", 1.0))
+
 # Server Configuration
 NICEGUI_PORT = int(os.getenv("PORT", 9080))
+# Signs the browser cookie that keys app.storage.user (each browser's own project); a random secret
+# means browsers start without a remembered project after a restart
+STORAGE_SECRET = os.getenv("STORAGE_SECRET") or secrets.token_urlsafe(32)
 PREVIEW_PORT = 8081
 
 # Agent System Prompts
@@ -36,7 +148,14 @@ Your goal is to transform vague user ideas into a rigorous technical specificati
 
 ### ARCHITECTURAL ADVICE:
 - For simple games like Snake: recommend a single-file 'interactive_frontend' logic using Canvas or standard DOM.
-- For data apps: separate Frontend (React) and Backend (FastAPI)."""
+- For data apps: separate Frontend (React) and Backend (FastAPI).
+- If the app needs no server at all (games, calculators, static pages, localStorage-only tools), set tech_stack.backend and tech_stack.database to "none" so no backend is generated.
+
+### FILE MANIFEST:
+- file_manifest: list every file to generate with its path, a one-line responsibility and its owner ("frontend" or "backend").
+- A self-contained app is a single 'index.html' entry; only split into several files when the app genuinely needs it.
+- shared_interfaces: list every contract the files must agree on, e.g. "GET /api/todos -> [{id, title, done}]",
+  "<TodoItem todo onToggle(id) />" props, global names, DOM element ids and localStorage keys."""
 
 FRONTEND_GENERATOR_PROMPT = """You are an Expert Lead Frontend Engineer specializing in highly interactive, premium web applications.
 You are part of an autonomous build-team. Your specific task is to implement the entire visual and interactive layer.
@@ -78,6 +197,13 @@ Your goal is to build a high-performance, secure, and clean API for the applicat
 
 Generate a complete 'main.py' or 'app.py' that serves as the backend entry point."""
 
+FILE_GENERATOR_PROMPT = """### PER-FILE TASK:
+You are generating exactly ONE file of a larger application; other team members write the other files in parallel.
+- Output a single file object with the exact path you are given.
+- Follow the shared interfaces VERBATIM (routes, payload shapes, component props, ids); other files rely on them.
+- Reference the other manifest files by their paths instead of re-implementing them.
+- The manifest defines the file split: ignore any single-file guidance above."""
+
 # Progress Steps
 PROGRESS_STEPS = [
     "Analyzing requirements",
@@ -2,22 +2,38 @@
 from .models import (
     ProblemStatement,
     RequirementSpec,
+    FileSpec,
     GeneratedFile,
+    FileSet,
     ValidationResult,
     ProgressStep,
     ProgressStatus,
     ProjectState
 )
 from .session_manager import SessionManager, session_manager
+from .task_registry import TaskRegistry, task_registry
+from .project_index import ProjectIndex, project_index
+from .versions import Version, VersionHistory
+from .memory import MemoryGuard, memory_guard
 
 __all__ = [
     "ProblemStatement",
     "RequirementSpec",
+    "FileSpec",
     "GeneratedFile",
+    "FileSet",
     "ValidationResult",
     "ProgressStep",
     "ProgressStatus",
     "ProjectState",
     "SessionManager",
-    "session_manager"
+    "session_manager",
+    "TaskRegistry",
+    "task_registry",
+    "ProjectIndex",
+    "project_index",
+    "Version",
+    "VersionHistory",
+    "MemoryGuard",
+    "memory_guard"
 ]
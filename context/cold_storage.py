@@ -0,0 +1,94 @@
+"""Compressed cold storage for idle project sessions"""
+import pickle
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from utils.stats import LatencyStats
+from utils.telemetry import get_logger, registry
+
+from .models import ProjectState
+
+logger = get_logger("cold_storage")
+
+REHYDRATE_SECONDS = registry.histogram(
+    "metaforge_session_rehydrate_seconds", "Time to bring a cold session back into memory",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+
+
+@dataclass
+class FrozenSession:
+    """What stays in memory for a cold session: its id and the compressed state (or where it is)"""
+    project_id: str
+    raw_bytes: int           # pickled size before compression
+    stored_bytes: int        # compressed size
+    frozen_at: float
+    blob: Optional[bytes] = None
+    path: Optional[Path] = None
+
+
+class ColdStore:
+    """Serializes a ProjectState into a zlib-compressed pickle, kept in memory or written to `directory`.
+
+    Pickling keeps the whole object graph: FileSet, VersionHistory and the
+    compacted ADK events survive unchanged, so a thawed session is exactly
+    the one that was frozen. Savings and rehydration latency are tracked
+    for reporting.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, level: int = 6):
+        self.directory = Path(directory) if directory else None
+        self.level = level
+        self.frozen = 0
+        self.thawed = 0
+        self.bytes_saved = 0      # raw - stored (raw when the blob is on disk) over currently cold sessions
+        self.rehydrate_latency = LatencyStats()
+
+    def freeze(self, state: ProjectState) -> FrozenSession:
+        raw = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        blob = zlib.compress(raw, self.level)
+        frozen = FrozenSession(state.project_id, len(raw), len(blob), time.time())
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            frozen.path = self.directory / f"{state.project_id}.session.z"
+            frozen.path.write_bytes(blob)
+        else:
+            frozen.blob = blob
+        self.frozen += 1
+        self.bytes_saved += self._saved(frozen)
+        return frozen
+
+    def thaw(self, frozen: FrozenSession) -> ProjectState:
+        started = time.perf_counter()
+        blob = frozen.blob if frozen.blob is not None else frozen.path.read_bytes()
+        state = pickle.loads(zlib.decompress(blob))
+        if frozen.path is not None:
+            frozen.path.unlink(missing_ok=True)
+        elapsed = time.perf_counter() - started
+        self.rehydrate_latency.record(elapsed)
+        REHYDRATE_SECONDS.observe(elapsed)
+        self.thawed += 1
+        self.bytes_saved -= self._saved(frozen)
+        logger.debug("Rehydrated session %s in %.1fms", frozen.project_id, elapsed * 1000)
+        return state
+
+    def discard(self, frozen: FrozenSession):
+        """Forget a cold session without loading it"""
+        if frozen.path is not None:
+            frozen.path.unlink(missing_ok=True)
+        self.bytes_saved -= self._saved(frozen)
+
+    @staticmethod
+    def _saved(frozen: FrozenSession) -> int:
+        return frozen.raw_bytes - (frozen.stored_bytes if frozen.blob is not None else 0)
+
+    def report(self) -> dict:
+        return {
+            "frozen": self.frozen,
+            "thawed": self.thawed,
+            "bytes_saved": self.bytes_saved,
+            "storage": "disk" if self.directory else "memory",
+            "rehydrate_latency": self.rehydrate_latency.snapshot(),
+        }
@@ -0,0 +1,231 @@
+"""Per-session memory accounting and limits"""
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+import config
+from utils.telemetry import get_logger, registry
+from .cold_storage import FrozenSession
+from .models import ProjectState
+from .session_manager import SessionManager, session_manager
+from .task_registry import task_registry
+
+logger = get_logger("memory")
+
+SESSION_MEMORY = registry.gauge(
+    "metaforge_session_memory_bytes", "Estimated bytes retained by all sessions, by category", ("category",))
+SESSION_MEMORY_MAX = registry.gauge("metaforge_session_memory_max_bytes", "Estimated bytes of the largest session")
+SESSIONS_OVER_LIMIT = registry.gauge(
+    "metaforge_sessions_over_memory_limit", "Sessions above a memory limit", ("limit",))
+LIMIT_ACTIONS = registry.counter(
+    "metaforge_memory_limit_actions_total", "Compactions, evictions and refused refines due to memory limits", ("action",))
+
+# category -> bytes
+Usage = Dict[str, int]
+
+
+def _size(value) -> int:
+    """Retained bytes of strings, containers and pydantic models; other objects by their shallow size"""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(k) + _size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(v) for v in value)
+    if isinstance(value, BaseModel):
+        return sys.getsizeof(value) + _size(value.__dict__)
+    return sys.getsizeof(value)
+
+
+def _estimate_key(state: ProjectState) -> tuple:
+    """Changes whenever estimate(state) can: files, versions, and the ADK/progress lists being replaced or grown"""
+    return (
+        id(state.files), state.files.version, len(state.history.blobs), len(state.history.versions),
+        id(state.adk_events), len(state.adk_events), id(state.adk_state),
+        id(state.progress_steps), len(state.progress_steps),
+    )
+
+
+def estimate(state: ProjectState) -> Usage:
+    """Bytes held by one session's ProjectState, per category.
+
+    History blobs that are the very string objects the current files hold
+    are counted once, under files.
+    """
+    files = list(state.files)
+    current = {id(f.content) for f in files}
+    return {
+        "files": sum(_size(f.content) + _size(f.path) for f in files),
+        "history": sum(_size(blob) for blob in state.history.blobs.values() if id(blob) not in current),
+        "adk_events": _size(state.adk_events),
+        "adk_state": _size(state.adk_state),
+        "progress_steps": _size(state.progress_steps),
+    }
+
+
+class MemoryGuard:
+    """Estimates what each session retains and keeps it within soft and hard limits.
+
+    Usage is estimated per category from the ProjectState; probes added by
+    the UI contribute what hangs off its components (highlighted code HTML).
+    A session above `soft_limit` is compacted: versions beyond `keep_versions`
+    and the blobs only they used are pruned, progress steps are trimmed to
+    `keep_steps`, and compactors (the ADK event log) shrink what they own.
+    A session still above `hard_limit` is moved to cold storage when nobody
+    views it or runs work on it, and `admit()` refuses new refines for it.
+    That only caps resident memory when the cold store writes to disk; an
+    in-memory cold store keeps the session, compressed, in this process.
+    Busy sessions are never compacted: a running build relies on its
+    events and versions staying put. Estimates are cached per session until
+    its files, history, ADK events or progress steps change, so a metrics
+    scrape only walks the sessions that changed since the last one.
+    """
+
+    def __init__(self, sessions: SessionManager, soft_limit: int, hard_limit: int,
+                 keep_versions: int = 5, keep_steps: int = 20):
+        self.sessions = sessions
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.keep_versions = keep_versions
+        self.keep_steps = keep_steps
+        self.probes: List[Callable[[str], Usage]] = []
+        self.compactors: List[Callable[[ProjectState], None]] = []
+        self.actions: Dict[str, int] = {"compact": 0, "evict": 0, "refuse": 0}
+        self._estimates: Dict[str, Tuple[tuple, Usage]] = {}
+        self._evicted: Dict[str, Tuple[FrozenSession, int]] = {}   # stub and size of sessions evicted at the hard limit
+
+    def add_probe(self, probe: Callable[[str], Usage]):
+        """Count extra bytes per session (probe(session_id) -> {category: bytes})"""
+        self.probes.append(probe)
+
+    def add_compactor(self, compactor: Callable[[ProjectState], None]):
+        """Called on a session above the soft limit to shrink what the caller keeps on ProjectState"""
+        self.compactors.append(compactor)
+
+    def measure(self, session_id: str) -> Usage:
+        """Estimated bytes per category; a cold session only holds its compressed blob"""
+        state = self.sessions.sessions.get(session_id)
+        if state is None:
+            return {}
+        if isinstance(state, FrozenSession):
+            return {"cold": state.stored_bytes if state.blob is not None else 0}
+        key = _estimate_key(state)
+        cached = self._estimates.get(session_id)
+        if cached is None or cached[0] != key:
+            cached = self._estimates[session_id] = (key, estimate(state))
+        usage = dict(cached[1])
+        for probe in self.probes:
+            for category, size in probe(session_id).items():
+                usage[category] = usage.get(category, 0) + size
+        return usage
+
+    def _record(self, action: str, session_id: str, size: int):
+        self.actions[action] += 1
+        LIMIT_ACTIONS.inc(action=action)
+        logger.warning("Session %s holds ~%.1f MiB: %s", session_id, size / 2**20, action)
+
+    def compact(self, state: ProjectState):
+        """Shrink a session in place: prune versions, trim progress steps, run the compactors"""
+        state.history.prune(self.keep_versions)
+        if len(state.progress_steps) > self.keep_steps:
+            state.progress_steps = state.progress_steps[-self.keep_steps:]
+        for compactor in self.compactors:
+            compactor(state)
+
+    def _relieve(self, session_id: str) -> int:
+        """Compact a session above the soft limit (unless busy); returns its size afterwards"""
+        size = sum(self.measure(session_id).values())
+        state = self.sessions.sessions.get(session_id)
+        if size > self.soft_limit and isinstance(state, ProjectState) and not task_registry.is_busy(session_id):
+            self._record("compact", session_id, size)
+            self.compact(state)
+            size = sum(self.measure(session_id).values())
+        return size
+
+    async def enforce(self) -> Usage:
+        """Compact sessions above the soft limit, then evict idle ones still above the hard limit"""
+        done = {"compact": self.actions["compact"], "evict": self.actions["evict"]}
+        for session_id in list(self.sessions.sessions):
+            if self.sessions.is_cold(session_id):
+                continue
+            size = self._relieve(session_id)
+            if size > self.hard_limit and task_registry.viewer_count(session_id) == 0 \
+                    and not task_registry.is_busy(session_id):
+                frozen = await self.sessions.freeze(session_id)
+                if frozen:
+                    self._record("evict", session_id, size)
+                    self._evicted[session_id] = (frozen, size)
+        return {action: self.actions[action] - count for action, count in done.items()}
+
+    async def admit(self, session_id: str) -> bool:
+        """Whether a new refine may start; compacts first, refuses while above the hard limit.
+
+        A session evicted for exceeding the hard limit is refused from its
+        stub, without thawing it. Any other cold session is thawed to measure
+        it (the refine would thaw it anyway), and frozen again if refused.
+        """
+        stub = self.sessions.sessions.get(session_id)
+        evicted = self._evicted.get(session_id)
+        if evicted and evicted[0] is stub and evicted[1] > self.hard_limit:
+            self._record("refuse", session_id, evicted[1])
+            return False
+        was_cold = isinstance(stub, FrozenSession)
+        self.sessions.get_session(session_id)
+        size = self._relieve(session_id)
+        if size > self.hard_limit:
+            self._record("refuse", session_id, size)
+            if was_cold:
+                frozen = await self.sessions.freeze(session_id, is_active=task_registry.is_busy)
+                if frozen:
+                    self._evicted[session_id] = (frozen, size)
+            return False
+        return True
+
+    def report(self, top: Optional[int] = None) -> dict:
+        for session_id in [s for s in self._estimates if s not in self.sessions.sessions]:
+            del self._estimates[session_id]
+        for session_id in [s for s, (stub, _) in self._evicted.items() if self.sessions.sessions.get(s) is not stub]:
+            del self._evicted[session_id]
+        sessions = []
+        for session_id in list(self.sessions.sessions):
+            usage = self.measure(session_id)
+            total = sum(usage.values())
+            sessions.append({
+                "session": session_id,
+                "cold": self.sessions.is_cold(session_id),
+                "bytes": total,
+                "limit": "hard" if total > self.hard_limit else "soft" if total > self.soft_limit else None,
+                "categories": usage,
+            })
+        sessions.sort(key=lambda s: s["bytes"], reverse=True)
+        totals: Usage = {}
+        for entry in sessions:
+            for category, size in entry["categories"].items():
+                totals[category] = totals.get(category, 0) + size
+        return {
+            "soft_limit": self.soft_limit,
+            "hard_limit": self.hard_limit,
+            "bytes": sum(totals.values()),
+            "categories": totals,
+            "actions": dict(self.actions),
+            "sessions": sessions[:top] if top else sessions,
+        }
+
+
+def _collect_memory_metrics():
+    report = memory_guard.report()
+    stale = {key[0] for key in SESSION_MEMORY.values} - report["categories"].keys()
+    for category, size in [*((c, 0) for c in stale), *report["categories"].items()]:
+        SESSION_MEMORY.set(size, category=category)
+    SESSION_MEMORY_MAX.set(report["sessions"][0]["bytes"] if report["sessions"] else 0)
+    for limit in ("soft", "hard"):
+        SESSIONS_OVER_LIMIT.set(sum(1 for s in report["sessions"] if s["limit"] == limit), limit=limit)
+
+
+# Global memory guard instance
+memory_guard = MemoryGuard(session_manager, config.SESSION_MEMORY_SOFT_LIMIT, config.SESSION_MEMORY_HARD_LIMIT,
+                           config.MEMORY_KEEP_VERSIONS, config.MEMORY_KEEP_PROGRESS_STEPS)
+registry.on_collect(_collect_memory_metrics)
+if session_manager.cold_store.directory is None:
+    logger.warning("COLD_STORAGE_DIR is empty: sessions over the hard memory limit are only compressed in memory")
@@ -1,6 +1,9 @@
 """Pydantic models for MetaForge context management"""
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, ConfigDict
+import bisect
+import hashlib
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple, Union
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from pydantic_core import core_schema
 from datetime import datetime
 from enum import Enum
 
@@ -27,6 +30,14 @@ class TechStack(BaseModel):
     backend: str
     database: str
 
+class FileSpec(BaseModel):
+    """One planned file in the build manifest"""
+    model_config = ConfigDict(extra='forbid')
+    path: str
+    responsibility: str
+    owner: str  # "frontend" or "backend"
+
+
 class RequirementSpec(BaseModel):
     """Parsed and structured requirements"""
     model_config = ConfigDict(extra='forbid')
@@ -34,6 +45,8 @@ class RequirementSpec(BaseModel):
     tech_stack: TechStack
     clarifications: List[str]
     complexity: str
+    file_manifest: List[FileSpec] = Field(default_factory=list)
+    shared_interfaces: List[str] = Field(default_factory=list)
 
 
 class GeneratedFile(BaseModel):
@@ -44,9 +57,13 @@ class GeneratedFile(BaseModel):
     language: str
     size: int
     
-    def __init__(self, **data):
-        super().__init__(**data)
-        self.size = len(self.content)
+    @model_validator(mode='before')
+    @classmethod
+    def _fill_size(cls, data: Any) -> Any:
+        """Derive size from content in the same validation pass"""
+        if isinstance(data, dict) and isinstance(data.get('content'), str):
+            data = {**data, 'size': len(data['content'])}
+        return data
 
 
 class FileList(BaseModel):
@@ -55,6 +72,158 @@ class FileList(BaseModel):
     files: List[GeneratedFile]
 
 
+def normalize_path(path: str) -> str:
+    """Normalize a generated file path to forward slashes without leading/trailing slashes"""
+    return path.replace('\\', '/').strip('/')
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a file's content"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def display_key(path: str):
+    """Sort key of a path: index.html and app.py first, then alphabetic"""
+    return (path != 'index.html', path != 'app.py', path.lower())
+
+
+def _display_order(file: GeneratedFile):
+    return display_key(file.path)
+
+
+class FileSet:
+    """Generated files keyed by normalized path.
+
+    Upsert and delete are O(1). Every effective change bumps `version` and
+    records it per path and in a change log, so changed_since() costs
+    O(changes). Once the log holds more than twice as many entries as paths
+    ever seen, it is rebuilt from the per-path versions (one entry per path),
+    which keeps it bounded for long sessions at amortized O(1). Content
+    hashes are kept per file and the sorted view is rebuilt lazily only
+    after a change. Validates from and serializes to a plain list of
+    GeneratedFile, so ProjectState dumps keep the FileList shape.
+    """
+
+    __slots__ = ('_files', '_hashes', '_versions', '_log', '_sorted', 'version')
+
+    def __init__(self, files: Optional[Iterable[GeneratedFile]] = None):
+        self._files: Dict[str, GeneratedFile] = {}
+        self._hashes: Dict[str, str] = {}
+        self._versions: Dict[str, int] = {}
+        self._log: List[Tuple[int, str]] = []  # (version, path) per change, ascending; compacted in _touch
+        self._sorted: Optional[List[GeneratedFile]] = None
+        self.version = 0
+        if files:
+            self.upsert_many(files)
+
+    def upsert(self, file: GeneratedFile) -> bool:
+        """Add or replace a file by path. Returns False if the content is unchanged"""
+        path = normalize_path(file.path)
+        file.path = path
+        digest = content_hash(file.content)
+        current = self._files.get(path)
+        if current is not None and self._hashes[path] == digest and current.language == file.language:
+            return False
+        self._files[path] = file
+        self._hashes[path] = digest
+        self._touch(path)
+        return True
+
+    def upsert_many(self, files: Iterable[GeneratedFile]) -> List[str]:
+        """Upsert several files, returning the paths that actually changed"""
+        return [f.path for f in files if self.upsert(f)]
+
+    def delete(self, path: str) -> bool:
+        """Remove a file by path. Returns False if it was not present"""
+        path = normalize_path(path)
+        if self._files.pop(path, None) is None:
+            return False
+        del self._hashes[path]
+        self._touch(path)
+        return True
+
+    def _touch(self, path: str):
+        self.version += 1
+        self._versions[path] = self.version
+        self._log.append((self.version, path))
+        if len(self._log) > 2 * len(self._versions) + 32:
+            self._log = sorted((v, p) for p, v in self._versions.items())
+        self._sorted = None
+
+    def get(self, path: str) -> Optional[GeneratedFile]:
+        return self._files.get(normalize_path(path))
+
+    def content_hash(self, path: str) -> Optional[str]:
+        return self._hashes.get(normalize_path(path))
+
+    def file_version(self, path: str) -> int:
+        """Version at which the path was last added, changed or deleted (0 if never)"""
+        return self._versions.get(normalize_path(path), 0)
+
+    def changed_since(self, version: int) -> List[str]:
+        """Paths added, changed or deleted after `version`, in the order they were first touched"""
+        start = bisect.bisect_right(self._log, version, key=lambda entry: entry[0])
+        return list(dict.fromkeys(path for _, path in self._log[start:]))
+
+    def hashes(self) -> Dict[str, str]:
+        """Path -> content hash for every file"""
+        return dict(self._hashes)
+
+    def paths(self) -> List[str]:
+        return [f.path for f in self.sorted()]
+
+    def sorted(self) -> List[GeneratedFile]:
+        """Files in display order (cached until the next change)"""
+        if self._sorted is None:
+            self._sorted = sorted(self._files.values(), key=_display_order)
+        return self._sorted
+
+    def __iter__(self) -> Iterator[GeneratedFile]:
+        return iter(self.sorted())
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __bool__(self) -> bool:
+        return bool(self._files)
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, str) and normalize_path(path) in self._files
+
+    def __getitem__(self, key: Union[int, slice, str]):
+        if isinstance(key, str):
+            return self._files[normalize_path(key)]
+        return self.sorted()[key]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FileSet):
+            return self._hashes == other._hashes
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FileSet({len(self._files)} files, version={self.version})"
+
+    @classmethod
+    def _validate(cls, value: Union['FileSet', List[GeneratedFile]]) -> 'FileSet':
+        return value if isinstance(value, FileSet) else cls(value)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler) -> core_schema.CoreSchema:
+        list_schema = handler.generate_schema(List[GeneratedFile])
+        from_list = core_schema.no_info_after_validator_function(cls._validate, list_schema)
+        return core_schema.json_or_python_schema(
+            json_schema=from_list,
+            python_schema=core_schema.union_schema([
+                core_schema.is_instance_schema(cls),
+                from_list,
+            ]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: value.sorted(),
+                return_schema=list_schema,
+            ),
+        )
+
+
 class ValidationResult(BaseModel):
     """Result of code validation"""
     passed: bool
@@ -73,14 +242,18 @@ class ProgressStep(BaseModel):
 
 class ProjectState(BaseModel):
     """Complete state of a generated project"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
     project_id: str
     problem_statement: ProblemStatement
     requirements: Optional[RequirementSpec] = None
-    files: List[GeneratedFile] = []
+    files: FileSet = Field(default_factory=FileSet)
     validation: Optional[ValidationResult] = None
     progress_steps: List[ProgressStep] = []
     adk_state: Dict[str, Any] = Field(default_factory=dict)
     adk_events: List[Any] = Field(default_factory=list)
+    timings: Dict[str, float] = Field(default_factory=dict)
+    pipeline_path: Optional[str] = None
+    history: "VersionHistory" = Field(default_factory=lambda: VersionHistory(), exclude=True)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     
@@ -100,3 +273,8 @@ class ProjectState(BaseModel):
             ProgressStep(name=step_name, status=status, details=details)
         )
         self.updated_at = datetime.now()
+
+
+from .versions import VersionHistory  # noqa: E402  (versions builds on FileSet)
+
+ProjectState.model_rebuild()
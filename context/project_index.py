@@ -0,0 +1,289 @@
+"""Local TF-IDF index of past projects for seeding near-duplicate builds"""
+import gzip
+import json
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+from .models import GeneratedFile, ProjectState, RequirementSpec, normalize_path
+from utils.blocking import run_blocking
+from utils.stats import LatencyStats
+from utils.telemetry import get_logger
+
+logger = get_logger("project_index")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "the", "to", "of", "in", "on", "for", "with", "that", "this", "it", "is",
+    "be", "can", "as", "by", "or", "my", "me", "i", "we", "you", "should", "please", "want",
+    "create", "build", "make", "app", "application", "simple",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams plus bigrams, stopwords removed"""
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+@dataclass
+class IndexedProject:
+    """One past build: its request, plan and the files it produced"""
+    project_id: str
+    problem: str
+    requirements: dict
+    files: List[str]
+    project_dir: str
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+@dataclass
+class ProjectMatch:
+    project: IndexedProject
+    similarity: float
+
+    @property
+    def requirements(self) -> RequirementSpec:
+        return RequirementSpec.model_validate(self.project.requirements)
+
+
+class ProjectIndex:
+    """Finds the past project closest to a new problem statement.
+
+    Documents are TF-IDF vectors over word unigrams and bigrams. Lookups only
+    score documents sharing a term with the query (inverted index), so they
+    stay in the sub-millisecond range for thousands of projects and can run
+    before every build. Records are appended to a JSONL file and loaded
+    lazily on first use.
+    """
+
+    def __init__(self, path: Path, min_similarity: float = 0.8):
+        self.path = Path(path)
+        self.min_similarity = min_similarity
+        self.projects: Dict[str, IndexedProject] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._postings: Dict[str, set] = {}
+        self._norms: Optional[Dict[str, float]] = None   # invalidated whenever the corpus changes
+        self._loaded = False
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_latency = LatencyStats()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._index(IndexedProject(**json.loads(line)))
+                except (ValueError, TypeError) as e:
+                    logger.warning("Skipping unreadable project index entry: %s", e)
+
+    def _index(self, project: IndexedProject):
+        if project.project_id in self._terms:
+            self._unindex(project.project_id)
+        terms = Counter(tokenize(project.problem))
+        self.projects[project.project_id] = project
+        self._terms[project.project_id] = terms
+        for term in terms:
+            self._postings.setdefault(term, set()).add(project.project_id)
+        self._norms = None
+
+    def _unindex(self, project_id: str):
+        for term in self._terms.pop(project_id, {}):
+            docs = self._postings.get(term)
+            if docs:
+                docs.discard(project_id)
+                if not docs:
+                    del self._postings[term]
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._terms)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _doc_norms(self) -> Dict[str, float]:
+        if self._norms is None:
+            self._norms = {
+                pid: math.sqrt(sum((tf * self._idf(t)) ** 2 for t, tf in terms.items())) or 1.0
+                for pid, terms in self._terms.items()
+            }
+        return self._norms
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self.projects)
+
+    def add(self, state: ProjectState) -> bool:
+        """Index a finished build; returns False when it has no plan or files to reuse"""
+        self._load()
+        if not state.requirements or not state.files:
+            return False
+        project = IndexedProject(
+            project_id=state.project_id,
+            problem=state.problem_statement.description,
+            requirements=state.requirements.model_dump(mode="json"),
+            files=state.files.paths(),
+            project_dir=str(config.OUTPUT_DIR / state.project_id),
+        )
+        self._append(project)
+        return True
+
+    def _append(self, project: IndexedProject):
+        self._index(project)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(project)) + "\n")
+
+    def find_unindexed(self, output_dir: Path, event_log_dir: Path) -> List[IndexedProject]:
+        """Past builds on disk that are not indexed yet (blocking, reads only; see backfill()).
+
+        A project directory under `output_dir` only holds the generated files,
+        so the prompt and plan are read back from the session's raw ADK event
+        log: the first user message and the Planner's requirements delta.
+        Builds without an event log (made before event logging existed) cannot
+        be recovered and are skipped; the rest are re-validated from disk like
+        new builds, and only passing ones are indexed.
+        """
+        from utils.code_validator import validate_files
+
+        found = []
+        for project_dir in sorted(p for p in Path(output_dir).iterdir() if p.is_dir()):
+            project_id = project_dir.name
+            log_path = Path(event_log_dir) / f"{project_id}.jsonl.gz"
+            if project_id in self.projects or not log_path.is_file():
+                continue
+            problem, requirements = _read_build_log(log_path)
+            files = [
+                GeneratedFile(path=path.relative_to(project_dir).as_posix(), content=content,
+                              language=_language_for(path.name))
+                for path in sorted(project_dir.rglob("*")) if path.is_file()
+                for content in [_read_text(path)] if content is not None
+            ]
+            if not problem or not requirements or not files or validate_files(files):
+                continue
+            try:
+                requirements = RequirementSpec.model_validate(requirements).model_dump(mode="json")
+            except ValueError:
+                continue
+            found.append(IndexedProject(project_id, problem, requirements, [f.path for f in files], str(project_dir)))
+        return found
+
+    async def backfill(self, output_dir: Path, event_log_dir: Path) -> int:
+        """Index the past builds find_unindexed() recovers; the disk scan runs on the blocking pool"""
+        self._load()
+        found = await run_blocking(self.find_unindexed, output_dir, event_log_dir)
+        for project in found:
+            if project.project_id not in self.projects:
+                self._append(project)
+        if found:
+            logger.info("Backfilled %d past projects into the project index (%d total)", len(found), len(self.projects))
+        return len(found)
+
+    def search(self, problem: str, limit: int = 3) -> List[ProjectMatch]:
+        """Most similar past projects by cosine similarity, best first"""
+        self._load()
+        query = Counter(tokenize(problem))
+        if not query or not self._terms:
+            return []
+        weights = {t: tf * self._idf(t) for t, tf in query.items()}
+        query_norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        scores: Dict[str, float] = {}
+        for term, weight in weights.items():
+            for pid in self._postings.get(term, ()):
+                scores[pid] = scores.get(pid, 0.0) + weight * self._terms[pid][term] * self._idf(term)
+        norms = self._doc_norms()
+        ranked = sorted(
+            (ProjectMatch(self.projects[pid], score / (query_norm * norms[pid])) for pid, score in scores.items()),
+            key=lambda m: m.similarity, reverse=True,
+        )
+        return ranked[:limit]
+
+    def lookup(self, problem: str, exclude: Optional[str] = None) -> Optional[ProjectMatch]:
+        """The closest past project if it is a near-duplicate of `problem`, else None"""
+        started = time.perf_counter()
+        matches = [m for m in self.search(problem) if m.project.project_id != exclude]
+        match = matches[0] if matches and matches[0].similarity >= self.min_similarity else None
+        self.lookups += 1
+        self.hits += match is not None
+        self.lookup_latency.record(time.perf_counter() - started)
+        return match
+
+    def load_template(self, match: ProjectMatch, max_chars: int = 40_000) -> List[GeneratedFile]:
+        """The matched project's files as they are on disk now, smallest first up to `max_chars`"""
+        root = Path(match.project.project_dir)
+        files = []
+        for path in match.project.files:
+            file_path = root / normalize_path(path)
+            try:
+                content = file_path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            files.append(GeneratedFile(path=path, content=content, language=_language_for(path)))
+        template, used = [], 0
+        for f in sorted(files, key=lambda f: len(f.content)):
+            if used + len(f.content) > max_chars:
+                break
+            template.append(f)
+            used += len(f.content)
+        return template
+
+    def report(self) -> dict:
+        """Hit rate and lookup latency"""
+        return {
+            "projects": len(self.projects),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "lookup_latency": self.lookup_latency.snapshot(),
+        }
+
+
+def _read_build_log(path: Path) -> tuple:
+    """(first user prompt, planner requirements) from a raw ADK event log"""
+    problem, requirements = None, None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if problem is None and event.get("author") == "user":
+                    parts = (event.get("content") or {}).get("parts") or []
+                    text = "".join(p.get("text") or "" for p in parts)
+                    problem = text.split("\n\nRequirements (JSON):", 1)[0].strip() or None
+                delta = (event.get("actions") or {}).get("state_delta") or {}
+                if requirements is None and isinstance(delta.get("requirements"), dict):
+                    requirements = delta["requirements"]
+                if problem and requirements:
+                    break
+    except (OSError, ValueError, EOFError) as e:
+        logger.debug("Unreadable event log %s: %s", path, e)
+    return problem, requirements
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _language_for(path: str) -> str:
+    suffix = Path(path).suffix.lower().lstrip(".")
+    return {"js": "javascript", "jsx": "javascript", "ts": "typescript", "tsx": "typescript",
+            "py": "python", "htm": "html", "md": "markdown"}.get(suffix, suffix or "text")
+
+
+# Global project index instance
+project_index = ProjectIndex(config.PROJECT_INDEX_PATH, config.RETRIEVAL_MIN_SIMILARITY)
@@ -1,15 +1,34 @@
 """Session manager for orchestration context"""
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Union
+import time
 import uuid
+
+import config
+from utils.blocking import run_blocking
+from utils.telemetry import get_logger, registry
+from .cold_storage import ColdStore, FrozenSession
 from .models import ProjectState, ProblemStatement, ProgressStatus
+from .task_registry import task_registry
+
+logger = get_logger("session_manager")
+
+COLD_SESSIONS = registry.gauge("metaforge_sessions_cold", "Idle sessions held compressed")
+COLD_BYTES_SAVED = registry.gauge("metaforge_cold_storage_bytes_saved", "Memory saved by compressing idle sessions")
+
+
+def _has_viewer_or_work(session_id: str) -> bool:
+    return task_registry.viewer_count(session_id) > 0 or task_registry.is_busy(session_id)
 
 
 class SessionManager:
     """Manages project sessions and state"""
     
-    def __init__(self):
-        self.sessions: Dict[str, ProjectState] = {}
+    def __init__(self, cold_store: Optional[ColdStore] = None):
+        # Idle sessions are replaced by a FrozenSession stub and thawed on access
+        self.sessions: Dict[str, Union[ProjectState, FrozenSession]] = {}
+        self.last_access: Dict[str, float] = {}
         self.current_session_id: Optional[str] = None
+        self.cold_store = cold_store or ColdStore()
     
     def create_session(self, problem_statement: ProblemStatement) -> str:
         """Create a new project session"""
@@ -21,6 +40,7 @@ class SessionManager:
         )
         
         self.sessions[session_id] = project_state
+        self.last_access[session_id] = time.monotonic()
         self.current_session_id = session_id
         
         return session_id
@@ -30,7 +50,12 @@ class SessionManager:
         if session_id is None:
             session_id = self.current_session_id
         
-        return self.sessions.get(session_id) if session_id else None
+        state = self.sessions.get(session_id) if session_id else None
+        if isinstance(state, FrozenSession):
+            state = self.sessions[session_id] = self.cold_store.thaw(state)
+        if state is not None:
+            self.last_access[session_id] = time.monotonic()
+        return state
     
     def update_progress(self, step_name: str, status: ProgressStatus, details: Optional[str] = None):
         """Update progress for current session"""
@@ -38,17 +63,73 @@ class SessionManager:
         if session:
             session.update_progress(step_name, status, details)
     
-    def get_all_sessions(self) -> Dict[str, ProjectState]:
-        """Get all sessions"""
+    def get_all_sessions(self) -> Dict[str, Union[ProjectState, FrozenSession]]:
+        """Get all sessions (cold ones as their FrozenSession stub, without thawing them)"""
         return self.sessions
     
+    def is_cold(self, session_id: str) -> bool:
+        return isinstance(self.sessions.get(session_id), FrozenSession)
+    
+    async def freeze(self, session_id: str,
+                     is_active: Callable[[str], bool] = _has_viewer_or_work) -> Optional[FrozenSession]:
+        """Move one session to cold storage (no-op for unknown or already cold sessions).
+
+        Pickling and compression run on the blocking pool. The stub replaces
+        the state only if nothing accessed the session meanwhile and it still
+        has no viewer or running task; otherwise the compressed copy is dropped.
+        """
+        state = self.sessions.get(session_id)
+        if not isinstance(state, ProjectState):
+            return None
+        accessed = self.last_access.get(session_id)
+        try:
+            frozen = await run_blocking(self.cold_store.freeze, state)
+        except RuntimeError as e:  # changed while being pickled: it is in use after all
+            logger.debug("Did not freeze session %s: %s", session_id, e)
+            return None
+        if self.sessions.get(session_id) is not state or self.last_access.get(session_id) != accessed \
+                or is_active(session_id):
+            self.cold_store.discard(frozen)
+            return None
+        self.sessions[session_id] = frozen
+        return frozen
+    
+    async def freeze_idle(self, idle_after: float, is_active: Callable[[str], bool] = _has_viewer_or_work) -> int:
+        """Compress sessions not accessed for `idle_after` seconds that have no viewer or running task"""
+        now = time.monotonic()
+        frozen = 0
+        for session_id, state in list(self.sessions.items()):
+            if isinstance(state, FrozenSession) or session_id == self.current_session_id:
+                continue
+            if now - self.last_access.get(session_id, 0.0) < idle_after or is_active(session_id):
+                continue
+            if await self.freeze(session_id, is_active):
+                frozen += 1
+        if frozen:
+            logger.info("Moved %d idle session(s) to cold storage (%d bytes saved in total)",
+                        frozen, self.cold_store.bytes_saved)
+        return frozen
+    
+    def report(self) -> dict:
+        cold = sum(isinstance(s, FrozenSession) for s in self.sessions.values())
+        return {"sessions": len(self.sessions), "cold": cold, **self.cold_store.report()}
+    
     def clear_session(self, session_id: str):
         """Clear a specific session"""
         if session_id in self.sessions:
-            del self.sessions[session_id]
+            state = self.sessions.pop(session_id)
+            self.last_access.pop(session_id, None)
+            if isinstance(state, FrozenSession):
+                self.cold_store.discard(state)
             if self.current_session_id == session_id:
                 self.current_session_id = None
 
 
+def _collect_cold_metrics():
+    COLD_SESSIONS.set(sum(isinstance(s, FrozenSession) for s in session_manager.sessions.values()))
+    COLD_BYTES_SAVED.set(session_manager.cold_store.bytes_saved)
+
+
 # Global session manager instance
-session_manager = SessionManager()
+session_manager = SessionManager(ColdStore(config.COLD_STORAGE_DIR))
+registry.on_collect(_collect_cold_metrics)
@@ -0,0 +1,94 @@
+"""Per-session tracking of generation tasks, queued instructions and viewers"""
+import asyncio
+from collections import deque
+from typing import Coroutine, Deque, Dict, List, Set
+
+from utils.profiler import session_profiler
+from utils.telemetry import get_logger
+
+logger = get_logger("task_registry")
+
+
+class TaskRegistry:
+    """Tracks every generation/refinement task per session.
+
+    Superseded work (a new project, the last viewer leaving) is cancelled
+    cooperatively: `task.cancel()` raises CancelledError at the task's current
+    await, which unwinds the ADK runner and closes in-flight model streams.
+    Chat instructions that arrive while a session is busy are queued here
+    instead of being dropped.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+        self._queued: Dict[str, Deque[str]] = {}
+        self._viewers: Dict[str, int] = {}
+
+    def start(self, session_id: str, coro: Coroutine, name: str = "generation") -> asyncio.Task:
+        """Run `coro` as a tracked task of the session"""
+        task = asyncio.create_task(coro, name=f"{name}:{session_id}")
+        tasks = self._tasks.setdefault(session_id, set())
+        tasks.add(task)
+
+        def _forget(finished: asyncio.Task):
+            tasks.discard(finished)
+            if not tasks and self._tasks.get(session_id) is tasks:
+                del self._tasks[session_id]
+
+        task.add_done_callback(_forget)
+        if session_profiler.is_armed(session_id):
+            session_profiler.attach(session_id, task)
+        return task
+
+    def tasks(self, session_id: str) -> List[asyncio.Task]:
+        return [t for t in self._tasks.get(session_id, ()) if not t.done()]
+
+    def is_busy(self, session_id: str) -> bool:
+        return bool(self.tasks(session_id))
+
+    def cancel(self, session_id: str, reason: str = "superseded", exclude=None) -> int:
+        """Cancel the session's running tasks (except `exclude`); returns how many were cancelled"""
+        cancelled = 0
+        for task in self.tasks(session_id):
+            if task is exclude:
+                continue
+            task.cancel(msg=reason)
+            cancelled += 1
+        if cancelled:
+            logger.info("Cancelled %d task(s) for session %s: %s", cancelled, session_id, reason)
+        return cancelled
+
+    def enqueue(self, session_id: str, instruction: str):
+        """Hold a chat instruction until the session's current task finishes"""
+        self._queued.setdefault(session_id, deque()).append(instruction)
+
+    def take_queued(self, session_id: str) -> List[str]:
+        """Remove and return every queued instruction, oldest first"""
+        return list(self._queued.pop(session_id, ()))
+
+    def has_queued(self, session_id: str) -> bool:
+        return bool(self._queued.get(session_id))
+
+    def attach_viewer(self, session_id: str):
+        self._viewers[session_id] = self._viewers.get(session_id, 0) + 1
+
+    def detach_viewer(self, session_id: str) -> int:
+        """Forget one viewer; returns how many remain"""
+        remaining = max(0, self._viewers.get(session_id, 0) - 1)
+        if remaining:
+            self._viewers[session_id] = remaining
+        else:
+            self._viewers.pop(session_id, None)
+        return remaining
+
+    def viewer_count(self, session_id: str) -> int:
+        return self._viewers.get(session_id, 0)
+
+    def forget(self, session_id: str):
+        """Cancel everything for a session and drop its queue"""
+        self.cancel(session_id, "session closed")
+        self._queued.pop(session_id, None)
+
+
+# Global task registry instance
+task_registry = TaskRegistry()
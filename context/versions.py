@@ -0,0 +1,140 @@
+"""Content-addressed version history of a project's files"""
+import difflib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .models import FileSet, GeneratedFile, normalize_path
+
+# path -> (content hash, language)
+Manifest = Dict[str, Tuple[str, str]]
+
+
+@dataclass
+class Version:
+    """One snapshot: a small path -> blob map plus where it came from"""
+    number: int
+    label: str
+    files: Manifest
+    parent: Optional[int] = None
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def summary(self) -> dict:
+        return {"number": self.number, "label": self.label, "parent": self.parent,
+                "files": len(self.files), "created_at": self.created_at.isoformat()}
+
+
+class VersionHistory:
+    """Every state a project's files have been in, with each content stored once.
+
+    Blobs are keyed by the content hash FileSet already keeps, so taking a
+    snapshot hashes nothing. When the same FileSet is snapshotted again, only
+    the paths whose file_version moved since the last snapshot are looked
+    at. Rolling back is a checkout into a fresh FileSet; no content is
+    copied. Diffs compare hashes first and only read blobs for the files
+    that differ.
+    """
+
+    def __init__(self):
+        self.blobs: Dict[str, str] = {}
+        self.versions: List[Version] = []
+        self._source: Optional[FileSet] = None   # FileSet behind the latest snapshot
+        self._source_version = 0
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    @property
+    def head(self) -> Optional[Version]:
+        return self.versions[-1] if self.versions else None
+
+    def get(self, number: int) -> Version:
+        first = self.versions[0].number if self.versions else 1   # older versions may have been pruned
+        if not first <= number < first + len(self.versions):
+            raise KeyError(f"No version {number}")
+        return self.versions[number - first]
+
+    def _changed_paths(self, files: FileSet) -> List[str]:
+        """Paths touched since the last snapshot (all of them for an unseen FileSet)"""
+        head = self.head
+        if head is None or files is not self._source:
+            return sorted(set(files.hashes()) | set(head.files if head else ()))
+        return files.changed_since(self._source_version)
+
+    def snapshot(self, files: FileSet, label: str) -> Version:
+        """Record the current files as a new version; returns the head unchanged when nothing differs"""
+        head = self.head
+        manifest: Manifest = dict(head.files) if head else {}
+        changed = False
+        for path in self._changed_paths(files):
+            file = files.get(path)
+            if file is None:
+                changed |= manifest.pop(path, None) is not None
+                continue
+            digest = files.content_hash(path)
+            if manifest.get(path) != (digest, file.language):
+                self.blobs.setdefault(digest, file.content)
+                manifest[path] = (digest, file.language)
+                changed = True
+        self._source, self._source_version = files, files.version
+        if head is not None and not changed:
+            return head
+        version = Version(head.number + 1 if head else 1, label, manifest, head.number if head else None)
+        self.versions.append(version)
+        return version
+
+    def read(self, number: int, path: str) -> Optional[GeneratedFile]:
+        """One file as it was in `number`, without checking out the whole version"""
+        entry = self.get(number).files.get(normalize_path(path))
+        if entry is None:
+            return None
+        digest, language = entry
+        return GeneratedFile(path=normalize_path(path), content=self.blobs[digest], language=language)
+
+    def checkout(self, number: int) -> FileSet:
+        """The files of `number` as a new FileSet"""
+        return FileSet(
+            GeneratedFile(path=path, content=self.blobs[digest], language=language)
+            for path, (digest, language) in self.get(number).files.items()
+        )
+
+    def diff(self, old: int, new: int, unified: bool = False) -> dict:
+        """Added, removed and modified paths between two versions (plus unified diffs if asked)"""
+        a, b = self.get(old).files, self.get(new).files
+        modified = sorted(p for p in a.keys() & b.keys() if a[p][0] != b[p][0])
+        result = {
+            "old": old, "new": new,
+            "added": sorted(b.keys() - a.keys()),
+            "removed": sorted(a.keys() - b.keys()),
+            "modified": modified,
+        }
+        if unified:
+            result["patches"] = {
+                path: "".join(difflib.unified_diff(
+                    self.blobs[a[path][0]].splitlines(keepends=True) if path in a else [],
+                    self.blobs[b[path][0]].splitlines(keepends=True) if path in b else [],
+                    fromfile=f"v{old}/{path}", tofile=f"v{new}/{path}",
+                ))
+                for path in (*result["added"], *result["removed"], *modified)
+            }
+        return result
+
+    def rollback(self, number: int) -> Tuple[FileSet, Version]:
+        """Check out `number` and record it as the newest version"""
+        files = self.checkout(number)
+        return files, self.snapshot(files, f"rollback to v{number}")
+
+    def prune(self, keep: int) -> int:
+        """Forget all but the newest `keep` versions and the blobs only they used; returns bytes freed"""
+        if len(self.versions) <= max(1, keep):
+            return 0
+        self.versions = self.versions[-max(1, keep):]
+        live = {digest for version in self.versions for digest, _ in version.files.values()}
+        freed = 0
+        for digest in [d for d in self.blobs if d not in live]:
+            freed += len(self.blobs.pop(digest))
+        return freed
+
+    def stored_bytes(self) -> int:
+        """Bytes of unique file content kept by the history"""
+        return sum(len(content) for content in self.blobs.values())
@@ -1,4 +1,5 @@
 """Preview package"""
 from .preview_server import PreviewServer
+from .asset_cache import AssetCache, asset_cache
 
-__all__ = ["PreviewServer"]
+__all__ = ["PreviewServer", "AssetCache", "asset_cache"]
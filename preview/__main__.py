@@ -0,0 +1,31 @@
+"""Manage the vendored CDN assets: python -m preview import <dir> | fetch <url>... | list"""
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from .asset_cache import asset_cache, normalize
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage the vendored CDN assets served to previews")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="add a <host>/<path> mirror directory to the store")
+    load.add_argument("directory", type=Path)
+    fetch = commands.add_parser("fetch", help="download CDN URLs into the store")
+    fetch.add_argument("urls", nargs="+")
+    commands.add_parser("list", help="list vendored URLs")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        print(f"{asset_cache.import_directory(args.directory)} assets imported")
+    elif args.command == "fetch":
+        for url in args.urls:
+            asset = asset_cache.download(normalize(url))
+            print(f"{asset.sha256[:16]}  {asset.size:>9}  {asset.url}")
+    else:
+        for asset in sorted(asset_cache.assets.values(), key=lambda a: a.url):
+            print(f"{asset.sha256[:16]}  {asset.size:>9}  {asset.url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Local, integrity-checked copies of the CDN assets that generated previews load"""
+import asyncio
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+from utils.blocking import run_blocking
+from utils.telemetry import get_logger, registry
+
+logger = get_logger("asset_cache")
+
+ROUTE = "/_assets"
+# CDNs the generator prompts point at (React/Babel UMD, Tailwind, FontAwesome, Lucide, Google Fonts)
+CDN_HOSTS = frozenset({
+    "unpkg.com", "cdn.jsdelivr.net", "cdnjs.cloudflare.com", "cdn.tailwindcss.com",
+    "use.fontawesome.com", "fonts.googleapis.com", "fonts.gstatic.com",
+})
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=3600"
+FETCH_RETRY_SECONDS = 600.0
+MAX_ASSET_BYTES = 20 * 1024 * 1024
+MAX_MISSES = 1000
+PAGE_CACHE_SIZE = 32
+
+ASSET_REQUESTS = registry.counter(
+    "metaforge_asset_cache_requests_total", "Vendored asset requests, by result (hit, miss, rejected)", ("result",))
+ASSET_REWRITES = registry.counter(
+    "metaforge_asset_cache_rewrites_total", "CDN references in served HTML, by result (local, miss, integrity)",
+    ("result",))
+ASSET_STORE = registry.gauge("metaforge_asset_cache_bytes", "Bytes of vendored assets on disk")
+
+_TAG = re.compile(r"<(?:script|link)\b[^>]*>", re.IGNORECASE)
+_URL_ATTR = re.compile(r"""(\b(?:src|href)\s*=\s*)(["'])((?:https?:)?//[^"'\s]+)\2""", re.IGNORECASE)
+_INTEGRITY = re.compile(r"""\bintegrity\s*=\s*(["'])([^"']*)\1""", re.IGNORECASE)
+_HINT = re.compile(r"""\brel\s*=\s*["'][^"']*\b(?:preconnect|dns-prefetch)\b""", re.IGNORECASE)
+
+
+def normalize(url: str) -> str:
+    """Cache key of a CDN URL: https scheme, no fragment, '/' for an empty path"""
+    if url.startswith("//"):
+        url = "https:" + url
+    parts = urlsplit(url)
+    key = f"https://{parts.netloc.lower()}{parts.path or '/'}"
+    return f"{key}?{parts.query}" if parts.query else key
+
+
+def _guess_type(path: str) -> str:
+    # Extension-less CDN entry points (cdn.tailwindcss.com, unpkg package roots) are scripts
+    return mimetypes.guess_type(path)[0] or "application/javascript"
+
+
+@dataclass
+class Asset:
+    """One vendored file: the CDN URL it stands in for and its content hash (the blob's name)"""
+    url: str
+    sha256: str
+    size: int
+    content_type: str
+
+    @property
+    def version(self) -> str:
+        return self.sha256[:16]
+
+    def local_url(self) -> str:
+        """Same-origin URL serving this asset; keeps the CDN path so relative references inside still resolve"""
+        parts = urlsplit(self.url)
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{ROUTE}/{self.version}/{parts.netloc}{parts.path}{query}"
+
+
+class AssetCache:
+    """Content-addressed store of CDN assets, and the HTML rewrite that points previews at it.
+
+    Blobs live under `directory`/blobs named by their sha256, with a JSON
+    manifest mapping each CDN URL to its blob. `rewrite_html()` replaces the
+    src/href of <script> and <link> tags on known CDN hosts with the local
+    copy; a tag whose integrity attribute does not match the local bytes keeps
+    its CDN URL. Local URLs carry the content hash, so they are served with
+    an immutable cache header, and keep the CDN path, so a stylesheet's
+    relative font URLs land on the cache too. A blob is re-hashed before it
+    is first served; one that no longer matches is dropped. A reference in
+    served HTML that is not in the store stays on the CDN and is recorded as
+    a miss (at most MAX_MISSES URLs are tracked); with `fetch` on, misses are
+    downloaded in the background for the next page load until the store
+    holds `max_bytes`. Requests to the local route never fetch anything.
+    """
+
+    def __init__(self, directory: Path, fetch: bool = False, max_bytes: int = 256 * 1024 * 1024,
+                 timeout: float = 10.0):
+        self.directory = Path(directory)
+        self.fetch_misses = fetch
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.assets: Dict[str, Asset] = {}
+        self.misses: Dict[str, int] = {}             # CDN URL -> references in served HTML not served locally
+        self.generation = 0                          # bumped whenever the store changes
+        self._verified: set = set()                  # blob hashes checked since start
+        self._sri: Dict[Tuple[str, str], str] = {}   # (sha256, algorithm) -> base64 digest
+        self._pages: OrderedDict = OrderedDict()     # (path, mtime_ns, size) -> (generation, html)
+        self._pending: set = set()                   # misses waiting for a fetch
+        self._failed: Dict[str, float] = {}          # URL -> time of the last failed fetch
+        self._fetching: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.directory / "blobs" / sha256
+
+    def _load(self):
+        try:
+            entries = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable asset manifest %s: %s", self.manifest_path, e)
+            return
+        self.assets = {entry["url"]: Asset(**entry) for entry in entries}
+
+    def _save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps([asdict(a) for a in self.assets.values()], indent=1), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def get(self, url: str) -> Optional[Asset]:
+        return self.assets.get(normalize(url))
+
+    def add(self, url: str, data: bytes, content_type: Optional[str] = None) -> Asset:
+        """Store `data` as the local copy of `url`"""
+        key = normalize(url)
+        sha256 = hashlib.sha256(data).hexdigest()
+        asset = Asset(key, sha256, len(data), content_type or _guess_type(urlsplit(key).path))
+        with self._lock:
+            blob = self.blob_path(sha256)
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                tmp = blob.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, blob)
+            self._verified.add(sha256)
+            if self.assets.get(key) != asset:
+                self.assets[key] = asset
+                self.generation += 1
+                self._save()
+            self.misses.pop(key, None)
+            self._pending.discard(key)
+        return asset
+
+    def import_directory(self, source: Path) -> int:
+        """Add every file of a mirror laid out as <host>/<path> (a '?' in a file name starts the query).
+
+        The bare host URL (e.g. https://cdn.tailwindcss.com) is read from
+        <host>/index. Returns how many files were new or changed.
+        """
+        source = Path(source)
+        added = 0
+        for file in sorted(p for p in source.rglob("*") if p.is_file()):
+            host, *rest = file.relative_to(source).parts
+            if host not in CDN_HOSTS or not rest:
+                continue
+            path = "/".join(rest)
+            url = f"https://{host}/" if path == "index" else f"https://{host}/{path}"
+            data = file.read_bytes()
+            existing = self.get(url)
+            if existing and existing.sha256 == hashlib.sha256(data).hexdigest():
+                continue
+            self.add(url, data)
+            added += 1
+        logger.info("Imported %d assets from %s (%d in store)", added, source, len(self.assets))
+        return added
+
+    def verified_blob(self, asset: Asset) -> Optional[Path]:
+        """The blob for `asset`, re-hashed on first use; a corrupt or missing blob drops the asset"""
+        path = self.blob_path(asset.sha256)
+        if asset.sha256 in self._verified:
+            return path
+        try:
+            ok = hashlib.sha256(path.read_bytes()).hexdigest() == asset.sha256
+        except OSError:
+            ok = False
+        if ok:
+            self._verified.add(asset.sha256)
+            return path
+        logger.warning("Vendored copy of %s failed its integrity check; serving from the CDN", asset.url)
+        ASSET_REQUESTS.inc(result="rejected")
+        with self._lock:
+            if self.assets.get(asset.url) == asset:
+                del self.assets[asset.url]
+                self.generation += 1
+                self._save()
+        return None
+
+    def _sri_matches(self, asset: Asset, integrity: str) -> bool:
+        """Whether any sha256/384/512 digest in a Subresource Integrity attribute matches the local copy"""
+        for token in integrity.split():
+            algorithm, _, digest = token.partition("-")
+            if algorithm not in ("sha256", "sha384", "sha512"):
+                continue
+            key = (asset.sha256, algorithm)
+            if key not in self._sri:
+                data = self.blob_path(asset.sha256).read_bytes()
+                self._sri[key] = base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+            if self._sri[key] == digest.split("?")[0]:
+                return True
+        return False
+
+    def _miss(self, url: str):
+        with self._lock:
+            if url not in self.misses and len(self.misses) >= MAX_MISSES:
+                # Forget the least referenced URL so a stream of one-off references cannot grow the table
+                rarest = min(self.misses, key=self.misses.get)
+                del self.misses[rarest]
+                self._pending.discard(rarest)
+            self.misses[url] = self.misses.get(url, 0) + 1
+            if self.fetch_misses:
+                self._pending.add(url)
+
+    def _rewrite_tag(self, match: re.Match) -> str:
+        tag = match.group(0)
+        found = _URL_ATTR.search(tag)
+        if not found or _HINT.search(tag):
+            return tag
+        url = normalize(found.group(3))
+        if urlsplit(url).netloc not in CDN_HOSTS:
+            return tag
+        asset = self.assets.get(url)
+        if asset is None or self.verified_blob(asset) is None:
+            ASSET_REWRITES.inc(result="miss")
+            self._miss(url)
+            return tag
+        integrity = _INTEGRITY.search(tag)
+        if integrity and not self._sri_matches(asset, integrity.group(2)):
+            ASSET_REWRITES.inc(result="integrity")
+            logger.warning("Integrity attribute for %s does not match the vendored copy; left on the CDN", url)
+            return tag
+        ASSET_REWRITES.inc(result="local")
+        quote = found.group(2)
+        return tag[:found.start()] + f"{found.group(1)}{quote}{asset.local_url()}{quote}" + tag[found.end():]
+
+    def rewrite_html(self, html: str) -> str:
+        """Point known CDN <script>/<link> references at their vendored copies"""
+        return _TAG.sub(self._rewrite_tag, html)
+
+    def render_page(self, path: Path) -> str:
+        """A preview HTML file with CDN references rewritten, cached until the file or the store changes"""
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached and cached[0] == self.generation:
+                self._pages.move_to_end(key)
+                return cached[1]
+            generation = self.generation
+        html = self.rewrite_html(path.read_text(encoding="utf-8", errors="replace"))
+        with self._lock:
+            self._pages[key] = (generation, html)
+            self._pages.move_to_end(key)
+            while len(self._pages) > PAGE_CACHE_SIZE:
+                self._pages.popitem(last=False)
+        return html
+
+    async def page(self, path: Path) -> str:
+        html = await run_blocking(self.render_page, path)
+        self.fetch_missing()
+        return html
+
+    def resolve(self, host: str, path: str, query: str = "") -> Tuple[str, Optional[Asset]]:
+        """The CDN URL a local asset URL stands for, and its vendored copy if there is one"""
+        url = normalize(f"https://{host}/{path}" + (f"?{query}" if query else ""))
+        asset = self.assets.get(url)
+        ASSET_REQUESTS.inc(result="hit" if asset else "miss")
+        return url, asset
+
+    def download(self, url: str) -> Asset:
+        """Fetch `url` from its CDN into the store (blocking)"""
+        request = urllib.request.Request(url, headers={"User-Agent": "MetaForge asset cache"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = response.read(MAX_ASSET_BYTES + 1)
+            content_type = response.headers.get_content_type() if response.headers.get("Content-Type") else None
+        if len(data) > MAX_ASSET_BYTES:
+            raise ValueError(f"larger than {MAX_ASSET_BYTES} bytes")
+        if self.stored_bytes() + len(data) > self.max_bytes:
+            raise ValueError(f"store is full ({self.max_bytes} bytes)")
+        return self.add(url, data, content_type)
+
+    async def _fetch(self, url: str):
+        try:
+            asset = await run_blocking(self.download, url)
+            logger.info("Vendored %s (%d bytes)", url, asset.size)
+        except Exception as e:
+            self._failed[url] = time.monotonic()
+            logger.debug("Could not fetch %s: %s", url, e)
+        finally:
+            self._fetching.pop(url, None)
+
+    def fetch_missing(self):
+        """Start background downloads of recorded misses (when fetching is enabled)"""
+        if not self.fetch_misses or not self._pending:
+            return
+        now = time.monotonic()
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if self.stored_bytes() >= self.max_bytes:
+            return
+        for url in pending:
+            if url in self._fetching or now - self._failed.get(url, -FETCH_RETRY_SECONDS) < FETCH_RETRY_SECONDS:
+                continue
+            self._fetching[url] = asyncio.get_running_loop().create_task(self._fetch(url))
+
+    def stored_bytes(self) -> int:
+        return sum(asset.size for asset in {a.sha256: a for a in self.assets.values()}.values())
+
+    def report(self, top: int = 20) -> dict:
+        return {
+            "directory": str(self.directory),
+            "assets": len(self.assets),
+            "bytes": self.stored_bytes(),
+            "max_bytes": self.max_bytes,
+            "fetch": self.fetch_misses,
+            "fetching": sorted(self._fetching),
+            "misses": dict(sorted(self.misses.items(), key=lambda item: -item[1])[:top]),
+        }
+
+
+# Global asset cache instance
+asset_cache = AssetCache(config.ASSET_CACHE_DIR, fetch=config.ASSET_CACHE_FETCH,
+                         max_bytes=config.ASSET_CACHE_MAX_BYTES)
+registry.on_collect(lambda: ASSET_STORE.set(asset_cache.stored_bytes()))
+
@@ -5,6 +5,10 @@ import threading
 from pathlib import Path
 import os
 
+from utils.telemetry import get_logger
+
+logger = get_logger("preview_server")
+
 
 class PreviewServer:
     """Serves generated frontend files for live preview"""
@@ -36,13 +40,9 @@ class PreviewServer:
             # Run in thread
             self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.thread.start()
-            import sys
-            print(f"[INFO] Preview server started on http://localhost:{self.port} serving {directory}")
-            sys.stdout.flush()
+            logger.info("Preview server started on http://localhost:%d serving %s", self.port, directory)
         except Exception as e:
-            import sys
-            print(f"[ERROR] Failed to start preview server: {e}")
-            sys.stdout.flush()
+            logger.error("Failed to start preview server: %s", e)
             raise
     
     def stop(self):
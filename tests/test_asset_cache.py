@@ -0,0 +1,69 @@
+"""Rewriting preview HTML to the vendored CDN assets"""
+import base64
+import hashlib
+
+import pytest
+
+from preview.asset_cache import AssetCache
+
+REACT = "https://unpkg.com/react@18/umd/react.production.min.js"
+SOURCE = b"window.React = {};"
+
+
+def sri(data: bytes, algorithm: str = "sha384") -> str:
+    return f"{algorithm}-" + base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+
+
+@pytest.fixture
+def cache(tmp_path) -> AssetCache:
+    cache = AssetCache(tmp_path)
+    cache.add(REACT, SOURCE)
+    return cache
+
+
+def test_known_cdn_urls_are_rewritten(cache):
+    local = cache.get(REACT).local_url()
+    assert local.startswith("/_assets/") and local.endswith("/unpkg.com/react@18/umd/react.production.min.js")
+
+    html = cache.rewrite_html(
+        f'<script crossorigin src="{REACT}"></script>'
+        f"<script src='//unpkg.com/react@18/umd/react.production.min.js#top'></script>"
+    )
+    assert html == f'<script crossorigin src="{local}"></script>' + f"<script src='{local}'></script>"
+
+
+def test_other_references_are_left_alone(cache):
+    html = (
+        '<script src="https://example.com/app.js"></script>'
+        '<link rel="preconnect" href="https://unpkg.com">'
+        '<script src="./local.js"></script>'
+        '<img src="https://unpkg.com/react@18/umd/react.production.min.js">'
+    )
+    assert cache.rewrite_html(html) == html
+    assert cache.misses == {}
+
+
+def test_missing_asset_stays_on_the_cdn_and_is_recorded(cache):
+    tag = '<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">'
+    assert cache.rewrite_html(tag) == tag
+    assert cache.misses == {"https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css": 1}
+
+
+def test_integrity_mismatch_keeps_the_cdn_url(cache):
+    other = sri(b"a different build")
+    tag = f'<script src="{REACT}" integrity="{other}" crossorigin="anonymous"></script>'
+    assert cache.rewrite_html(tag) == tag
+
+    # Any matching digest in the attribute is enough
+    for integrity in (sri(SOURCE), f"{other} {sri(SOURCE, 'sha512')}", sri(SOURCE, "sha256")):
+        tag = f'<script src="{REACT}" integrity="{integrity}"></script>'
+        assert cache.get(REACT).local_url() in cache.rewrite_html(tag), integrity
+
+
+def test_corrupt_blob_is_dropped_and_served_from_the_cdn(tmp_path):
+    AssetCache(tmp_path).add(REACT, SOURCE)
+    cache = AssetCache(tmp_path)  # a restart: blobs are re-hashed before first use
+    cache.blob_path(cache.get(REACT).sha256).write_bytes(b"tampered")
+    tag = f'<script src="{REACT}"></script>'
+    assert cache.rewrite_html(tag) == tag
+    assert cache.get(REACT) is None and AssetCache(tmp_path).get(REACT) is None
@@ -0,0 +1,44 @@
+"""Which plans are built file-by-file from their manifest"""
+import pytest
+
+from agents import classifier
+from agents.classifier import manifest_files
+from context.models import FileSpec, RequirementSpec, TechStack
+
+
+@pytest.fixture(autouse=True)
+def min_files(monkeypatch):
+    monkeypatch.setattr(classifier.config, "MANIFEST_MIN_FILES", 3)
+
+
+def plan(frontend: int, backend: int = 0, backend_stack: str = "FastAPI") -> RequirementSpec:
+    manifest = [FileSpec(path=f"src/f{i}.js", responsibility="ui", owner="frontend") for i in range(frontend)]
+    manifest += [FileSpec(path=f"api/b{i}.py", responsibility="api", owner="Backend") for i in range(backend)]
+    return RequirementSpec(
+        functional_components=["todos"], clarifications=[], complexity="moderate", file_manifest=manifest,
+        tech_stack=TechStack(frontend="React", backend=backend_stack, database="none"),
+    )
+
+
+def test_small_manifests_use_the_whole_app_coders():
+    assert manifest_files(plan(2)) == []
+    assert manifest_files(plan(1, backend=1)) == []
+    assert [f.path for f in manifest_files(plan(3))] == ["src/f0.js", "src/f1.js", "src/f2.js"]
+    assert len(manifest_files(plan(2, backend=1))) == 3
+
+
+def test_backend_files_do_not_count_for_frontend_only_plans():
+    assert manifest_files(plan(2, backend=4, backend_stack="none")) == []
+    assert [f.owner for f in manifest_files(plan(3, backend=2, backend_stack="none"))] == ["frontend"] * 3
+
+
+def test_dict_and_unreadable_plans():
+    assert len(manifest_files(plan(4).model_dump())) == 4
+    assert manifest_files({"file_manifest": "not a plan"}) == []
+    assert manifest_files(None) == []
+
+
+def test_default_threshold_keeps_typical_plans_on_the_coders(monkeypatch):
+    monkeypatch.undo()
+    assert manifest_files(plan(1)) == [] and manifest_files(plan(2)) == []
+    assert manifest_files(plan(3, backend=1)) == []
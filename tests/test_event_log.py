@@ -0,0 +1,69 @@
+"""Compaction of the ADK history and its raw archive"""
+import asyncio
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from agents.event_log import EventLog, is_summary
+
+
+def make_event(n: int, author: str = "FrontendCoder") -> Event:
+    return Event(author=author, invocation_id=f"run-{n // 4}", timestamp=float(n),
+                 content=types.Content(role="model", parts=[types.Part(text=f"message {n}")]))
+
+
+def test_short_history_is_kept_as_is(tmp_path):
+    events = [make_event(n) for n in range(3)]
+    assert EventLog(tmp_path, window=3).compact(events) == events
+
+
+def test_summary_then_the_last_window_events_unchanged(tmp_path):
+    log = EventLog(tmp_path, window=3, summary_lines=10)
+    events = [make_event(n) for n in range(8)]
+    compacted = log.compact(events)
+
+    summary, *recent = compacted
+    assert is_summary(summary) and not any(is_summary(e) for e in recent)
+    assert recent == events[-3:] and all(a is b for a, b in zip(recent, events[-3:]))
+    assert summary.custom_metadata == {"compacted_events": 5}
+    assert summary.timestamp == events[4].timestamp
+    assert [line.split(": ", 1)[1] for line in summary.content.parts[0].text.splitlines()[1:]] == \
+        [f"message {n}" for n in range(5)]
+
+    # Compacting again folds into the same single summary
+    more = [make_event(n) for n in range(8, 10)]
+    summary2, *recent2 = log.compact([*compacted, *more])
+    assert recent2 == [*events[-1:], *more]
+    assert summary2.custom_metadata == {"compacted_events": 7}
+    assert sum(is_summary(e) for e in log.compact([summary2, *recent2])) == 1
+
+
+def test_summary_lines_are_capped(tmp_path):
+    log = EventLog(tmp_path, window=2, summary_lines=4)
+    history = []
+    for n in range(20):
+        history = log.compact([*history, make_event(n)])
+    lines = history[0].content.parts[0].text.splitlines()[1:]
+    assert len(lines) == 4 and lines[0] == "- (15 older events omitted)"
+    assert lines[-1].endswith("message 17") and history[1:] == history[-2:]
+    assert [e.content.parts[0].text for e in history[1:]] == ["message 18", "message 19"]
+
+
+def test_archive_keeps_every_raw_event(tmp_path):
+    log = EventLog(tmp_path, window=3, summary_lines=4)
+    history, raw = [], []
+
+    async def runs():
+        nonlocal history
+        for run in range(5):
+            new = [make_event(run * 4 + i) for i in range(4)]
+            raw.extend(new)
+            history = await log.record("project/1", history, new)
+
+    asyncio.run(runs())
+    assert len(history) == 4 and is_summary(history[0])
+    assert history[0].custom_metadata == {"compacted_events": 17}
+    archived = list(log.read("project/1"))
+    assert [e.model_dump(exclude_none=True) for e in archived] == [e.model_dump(exclude_none=True) for e in raw]
+    assert not any(is_summary(e) for e in archived)
+    assert list(log.read("unknown")) == []
@@ -0,0 +1,60 @@
+"""FileSet change tracking, which the file tree's delta updates are built on"""
+from context.models import FileSet, GeneratedFile, ProblemStatement, ProjectState
+
+
+def make_file(path: str, content: str = "x", language: str = "javascript") -> GeneratedFile:
+    return GeneratedFile(path=path, content=content, language=language)
+
+
+def test_upsert_of_unchanged_content_is_a_no_op():
+    files = FileSet([make_file("app.js", "a")])
+    assert not files.upsert(make_file("app.js", "a"))
+    assert not files.upsert(make_file("/app.js", "a"))  # same path once normalized
+    assert files.version == 1 and files.changed_since(0) == ["app.js"]
+
+    assert files.upsert(make_file("app.js", "a", language="typescript"))
+    assert files.upsert(make_file("app.js", "b"))
+    assert files.version == 3 and files.changed_since(1) == ["app.js"]
+
+
+def test_deletes_show_up_in_changed_since():
+    files = FileSet([make_file("index.html"), make_file("app.js")])
+    seen = files.version
+    assert files.delete("app.js")
+    assert not files.delete("app.js")
+    assert not files.delete("missing.js")
+    assert files.changed_since(seen) == ["app.js"]
+    assert "app.js" not in files and files.file_version("app.js") == files.version
+
+
+def test_changed_since_is_exact_across_log_compaction():
+    files = FileSet()
+    touched = []  # (version, path) of every effective change
+    for step in range(500):
+        path = f"src/f{step % 7}.js"
+        changed = files.delete(path) if step % 5 == 4 else files.upsert(make_file(path, str(step)))
+        if changed:
+            touched.append((files.version, path))
+        if step in (40, 41, 250, 499):
+            for since in (0, 1, files.version // 2, files.version - 3, files.version):
+                expected = list(dict.fromkeys(p for v, p in touched if v > since))
+                assert sorted(files.changed_since(since)) == sorted(expected)
+    assert len(files._log) <= 2 * len(files._versions) + 32
+
+
+def test_project_state_round_trip():
+    state = ProjectState(project_id="p", problem_statement=ProblemStatement(description="todo app"))
+    state.files.upsert(make_file("styles.css", "body {}", "css"))
+    state.files.upsert(make_file("index.html", "<html></html>", "html"))
+
+    dumped = state.model_dump()
+    assert [f["path"] for f in dumped["files"]] == ["index.html", "styles.css"]
+    assert dumped["files"][0]["size"] == len("<html></html>")
+
+    restored = ProjectState.model_validate(dumped)
+    assert isinstance(restored.files, FileSet)
+    assert restored.files == state.files
+    assert restored.files.changed_since(0) == ["index.html", "styles.css"]
+
+    from_json = ProjectState.model_validate_json(state.model_dump_json())
+    assert from_json.files == state.files
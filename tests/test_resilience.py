@@ -0,0 +1,134 @@
+"""Resilience layer behaviour pinned with FakeLlm's latency and failure knobs"""
+import asyncio
+import random
+import time
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from agents import resilience
+from agents.fake_llm import FakeLlm, FakeProviderError
+from agents.resilience import CallPolicy, CircuitBreaker, CircuitOpenError, ResilientLlm
+from context.models import FileList
+
+
+@pytest.fixture(autouse=True)
+def fresh_registries(monkeypatch):
+    monkeypatch.setattr(resilience, "breakers", {})
+    monkeypatch.setattr(resilience, "call_stats", {})
+    monkeypatch.setattr(resilience.config, "CIRCUIT_FAILURE_THRESHOLD", 100)
+
+
+def make_llm(policy: CallPolicy = None, **fake) -> ResilientLlm:
+    inner = FakeLlm(**{"latency": 0.0, **fake})
+    return ResilientLlm(model=inner.model, inner=inner, agent_name="TestCoder",
+                        policy=policy or CallPolicy(timeout=1.0, max_retries=2, backoff_base=0.0))
+
+
+def request() -> LlmRequest:
+    return LlmRequest(
+        model="fake/metaforge",
+        contents=[types.Content(role="user", parts=[types.Part(text="Build a todo app")])],
+        config=types.GenerateContentConfig(response_schema=FileList),
+    )
+
+
+async def call(llm: ResilientLlm) -> list:
+    return [r async for r in llm.generate_content_async(request())]
+
+
+def seed_for(*fails: bool, failure_rate: float = 0.5) -> int:
+    """A FakeLlm seed whose successive calls fail (True) or succeed (False) in this order"""
+    for seed in range(10_000):
+        rng = random.Random(seed)
+        outcome = []
+        for _ in fails:
+            outcome.append(rng.random() < failure_rate)
+            rng.uniform(0, 0)  # jitter draw
+        if outcome == list(fails):
+            return seed
+    raise AssertionError("no seed found")
+
+
+def test_transient_failure_is_retried():
+    llm = make_llm(failure_rate=0.5, seed=seed_for(True, False))
+    responses = asyncio.run(call(llm))
+    assert responses and not responses[-1].partial
+    assert llm.inner.calls == 2
+    assert (llm.stats.failures, llm.stats.retries, llm.stats.latency.count) == (1, 1, 1)
+
+
+def test_retries_stop_after_max_retries():
+    llm = make_llm(failure_rate=1.0)
+    with pytest.raises(FakeProviderError):
+        asyncio.run(call(llm))
+    assert llm.inner.calls == 3
+    assert (llm.stats.failures, llm.stats.retries) == (3, 2)
+
+
+def test_attempt_times_out():
+    llm = make_llm(CallPolicy(timeout=0.05, max_retries=0), latency=1.0)
+    started = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(call(llm))
+    assert time.perf_counter() - started < 0.5
+    assert llm.stats.timeouts == 1
+
+
+def test_breaker_opens_then_admits_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # the probe is in flight
+
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 1
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.end_probe()  # probe cancelled: the slot is free again, still half-open
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_half_open_breaker_sends_one_probe_to_the_provider():
+    llm = make_llm(CallPolicy(timeout=1.0, max_retries=0), latency=0.05)
+    breaker = llm._breaker(request())
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout  # cool-down just elapsed
+
+    async def main():
+        return await asyncio.gather(*(call(llm) for _ in range(4)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert llm.inner.calls == 1
+    assert sum(isinstance(r, CircuitOpenError) for r in results) == 3
+    assert llm.stats.rejected == 3
+    assert breaker.state == "closed"
+
+
+def hedging_llm(**fake) -> ResilientLlm:
+    llm = make_llm(CallPolicy(timeout=2.0, max_retries=0, hedge=True, hedge_min_samples=5), **fake)
+    for _ in range(5):
+        llm.stats.first_response[False].record(0.02)  # p95: hedge after 20ms
+    return llm
+
+
+def test_hedge_loses_to_a_primary_that_answers_first():
+    llm = hedging_llm(latency=0.1)
+    asyncio.run(call(llm))
+    assert llm.inner.calls == 2
+    assert (llm.stats.hedges_fired, llm.stats.hedge_wins, llm.stats.wasted_requests) == (1, 0, 1)
+
+
+def test_hedge_wins_after_the_primary_fails():
+    llm = hedging_llm(latency=0.1, failure_rate=0.5, seed=seed_for(True, False))
+    asyncio.run(call(llm))
+    assert llm.inner.calls == 2  # no further hedge once the primary is gone
+    assert (llm.stats.hedges_fired, llm.stats.hedge_wins, llm.stats.wasted_requests) == (1, 1, 0)
@@ -0,0 +1,80 @@
+"""Holds and eviction of the bounded ADK session service"""
+import asyncio
+
+import pytest
+from google.adk.sessions.session import Session
+
+from agents import session_service as module
+from agents.session_service import BoundedSessionService
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def session(n: int) -> Session:
+    return Session(app_name="MetaForge", user_id="default_user", id=f"s{n}")
+
+
+def stored(service: BoundedSessionService, n: int) -> bool:
+    return f"s{n}" in service.sessions.get("MetaForge", {}).get("default_user", {})
+
+
+def lookup(service: BoundedSessionService, n: int):
+    return asyncio.run(service.get_session(app_name="MetaForge", user_id="default_user", session_id=f"s{n}"))
+
+
+def test_held_sessions_survive_size_pressure(clock):
+    service = BoundedSessionService(ttl=600, max_sessions=2, loader=None)
+    held = [session(n) for n in range(5)]
+    for s in held:
+        service.register(s)
+        clock[0] += 1
+    assert len(service) == 5 and all(stored(service, n) for n in range(5))
+
+    service.release(held[0])
+    assert not stored(service, 0) and len(service) == 4
+
+
+def test_held_sessions_survive_the_ttl(clock):
+    service = BoundedSessionService(ttl=10, max_sessions=10, loader=None)
+    service.register(session(1))
+    clock[0] += 60
+    service.evict()
+    assert stored(service, 1)
+    assert lookup(service, 1) is not None
+
+
+def test_nested_holds_release_on_the_last_one(clock):
+    service = BoundedSessionService(ttl=600, max_sessions=10, loader=None)
+    service.register(session(1))
+    service.register(session(1))
+    service.release(session(1))
+    assert stored(service, 1)
+    service.release(session(1))
+    assert not stored(service, 1) and len(service) == 0 and service.report()["held"] == 0
+
+
+def test_unheld_rehydrated_sessions_are_evicted(clock):
+    loads = []
+
+    def loader(session_id):
+        loads.append(session_id)
+        return Session(app_name="MetaForge", user_id="default_user", id=session_id)
+
+    service = BoundedSessionService(ttl=10, max_sessions=2, loader=loader)
+    running = session(0)
+    service.register(running)
+    for n in (1, 2, 3):
+        assert lookup(service, n) is not None
+        clock[0] += 1
+    # Over the cap: the oldest unheld sessions go, the running one stays
+    assert stored(service, 0) and not stored(service, 1) and not stored(service, 2) and stored(service, 3)
+
+    clock[0] += 60
+    service.evict()
+    assert stored(service, 0) and not stored(service, 3)
+    assert lookup(service, 3) is not None and loads == ["s1", "s2", "s3", "s3"]
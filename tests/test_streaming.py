@@ -0,0 +1,100 @@
+"""Incremental FileList parsing and publishing of streamed coder output"""
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from agents.orchestrator import MetaForgeOrchestrator, _FilePublisher
+from agents.streaming import FileListStreamParser
+from context.models import ProblemStatement, ProjectState
+
+FILES = [
+    {"path": "index.html", "content": '<div class="a">{"not": [json]}</div>', "language": "html"},
+    {"path": "app.js", "content": 'const s = "say \\"hi\\"\\\\";\nconst e = "é☃";', "language": "javascript"},
+    {"path": "styles.css", "content": "a::after { content: '}' }", "language": "css"},
+]
+DOCUMENT = json.dumps({"files": FILES})  # ensure_ascii: \u escapes, \" and \\ inside strings
+
+
+def feed_all(parser: FileListStreamParser, chunks) -> list:
+    return [file for chunk in chunks for file in parser.feed(chunk)]
+
+
+def test_whole_document():
+    files = feed_all(FileListStreamParser(), [DOCUMENT])
+    assert [(f.path, f.content) for f in files] == [(f["path"], f["content"]) for f in FILES]
+
+
+def test_every_split_point_inside_strings_and_escapes():
+    for cut in range(1, len(DOCUMENT)):
+        files = feed_all(FileListStreamParser(), [DOCUMENT[:cut], DOCUMENT[cut:]])
+        assert [f.content for f in files] == [f["content"] for f in FILES], cut
+
+
+def test_escape_sequences_split_across_chunks():
+    for escape in ('\\"', "\\\\", "\\u00e9"):
+        at = DOCUMENT.index(escape) + 1  # the backslash ends one chunk, the rest starts the next
+        files = feed_all(FileListStreamParser(), [DOCUMENT[:at], DOCUMENT[at:at + 2], DOCUMENT[at + 2:]])
+        assert [f.content for f in files] == [f["content"] for f in FILES], escape
+
+
+def test_single_character_chunks():
+    assert len(feed_all(FileListStreamParser(), DOCUMENT)) == len(FILES)
+
+
+def test_file_is_returned_when_its_object_closes():
+    parser = FileListStreamParser()
+    first_end = DOCUMENT.index('"html"}') + len('"html"}')
+    assert parser.feed(DOCUMENT[:first_end - 1]) == []
+    assert [f.path for f in parser.feed(DOCUMENT[first_end - 1:first_end])] == ["index.html"]
+    assert parser.files_parsed == 1
+
+
+def test_malformed_object_is_skipped(caplog):
+    bad = {"path": "broken.js", "content": "x", "language": "javascript", "unexpected": 1}
+    document = json.dumps({"files": [FILES[0], bad, FILES[1]]})
+    with caplog.at_level(logging.WARNING):
+        files = feed_all(FileListStreamParser(), [document])
+    assert [f.path for f in files] == ["index.html", "app.js"]
+    assert "Skipping unparsable" in caplog.text
+
+
+def test_truncated_output_returns_only_closed_files():
+    parser = FileListStreamParser()
+    cut = DOCUMENT.index('"app.js"') + 20  # stops inside the second file's content
+    assert [f.path for f in parser.feed(DOCUMENT[:cut])] == ["index.html"]
+    parser.reset()  # a new model turn restarts the document
+    assert [f.path for f in parser.feed(DOCUMENT)] == [f["path"] for f in FILES]
+
+
+def partial(author: str, text: str) -> Event:
+    return Event(author=author, partial=True, content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def test_stream_events_publishes_files_before_the_final_event():
+    state = ProjectState(project_id="p", problem_statement=ProblemStatement(description="todo app"))
+    published = []
+    publisher = _FilePublisher(state, "generate", on_file=lambda f: published.append(f.path))
+    orchestrator = SimpleNamespace(file_agents={"FrontendCoder"})
+    first_end = DOCUMENT.index('"html"}') + len('"html"}')
+    final = Event(author="FrontendCoder", content=types.Content(role="model", parts=[types.Part(text=DOCUMENT)]),
+                  actions=EventActions(state_delta={"frontend_files": {"files": FILES}}))
+
+    class Runner:
+        async def run(self, prompt, session):
+            yield partial("FrontendCoder", DOCUMENT[:first_end])
+            assert published == ["index.html"]  # out before the rest of the output arrives
+            yield partial("Planner", '{"files": [{"path": "ignored.js"}]}')
+            yield partial("FrontendCoder", DOCUMENT[first_end:])
+            assert published == ["index.html", "app.js", "styles.css"]
+            yield final
+
+    async def main():
+        return [e async for e in MetaForgeOrchestrator._stream_events(orchestrator, Runner(), "", None, publisher)]
+
+    assert asyncio.run(main()) == [final]
+    assert published == ["index.html", "app.js", "styles.css"]  # the final FileList changed nothing
+    assert state.files.paths() == ["index.html", "app.js", "styles.css"]
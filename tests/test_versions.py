@@ -0,0 +1,75 @@
+"""Snapshots, rollback, diff and pruning of a project's version history"""
+import pytest
+
+from context.models import FileSet, GeneratedFile
+from context.versions import VersionHistory
+
+
+def make_file(path: str, content: str, language: str = "javascript") -> GeneratedFile:
+    return GeneratedFile(path=path, content=content, language=language)
+
+
+def build_history():
+    files = FileSet([make_file("index.html", "<p>v1</p>", "html"), make_file("app.js", "let a = 1;")])
+    history = VersionHistory()
+    history.snapshot(files, "generate")
+    files.upsert(make_file("app.js", "let a = 2;"))
+    files.upsert(make_file("util.js", "export {};"))
+    history.snapshot(files, "refine")
+    files.delete("index.html")
+    history.snapshot(files, "refine")
+    return files, history
+
+
+def test_unchanged_content_is_stored_once():
+    files, history = build_history()
+    assert len(history) == 3
+    assert history.snapshot(files, "no-op") is history.head and len(history) == 3
+
+    # The same content under another path or in a fresh FileSet reuses its blob
+    blobs = dict(history.blobs)
+    files.upsert(make_file("copy.js", "let a = 2;"))
+    history.snapshot(files, "copy")
+    assert history.blobs == blobs and len(history) == 4
+    assert history.snapshot(FileSet(list(files)), "same files") is history.head
+    assert history.stored_bytes() == sum(len(c) for c in blobs.values())
+
+
+def test_rollback_restores_exact_content_hashes():
+    files, history = build_history()
+    v1 = history.checkout(1)
+
+    restored, version = history.rollback(1)
+    assert version.number == 4 and version.parent == 3 and version.label == "rollback to v1"
+    assert restored.hashes() == v1.hashes() == history.checkout(4).hashes()
+    assert {p: (h, restored[p].language) for p, h in restored.hashes().items()} == history.get(1).files
+    assert restored["app.js"].content == "let a = 1;" and "util.js" not in restored
+
+    # Rolling back to the version that is already current records nothing new
+    assert history.rollback(4)[1] is history.head
+
+
+def test_diff_between_versions():
+    _, history = build_history()
+    assert history.diff(1, 2) == {"old": 1, "new": 2, "added": ["util.js"], "removed": [], "modified": ["app.js"]}
+    assert history.diff(2, 3)["removed"] == ["index.html"]
+    patch = history.diff(1, 2, unified=True)["patches"]["app.js"]
+    assert "-let a = 1;" in patch and "+let a = 2;" in patch
+    assert history.read(1, "/app.js").content == "let a = 1;"
+    assert history.read(3, "index.html") is None
+
+
+def test_prune_keeps_the_newest_versions_and_their_blobs():
+    files, history = build_history()
+    freed = history.prune(2)
+    assert freed == len("let a = 1;")  # only v1 used it; "<p>v1</p>" is still in v2
+    assert [v.number for v in history.versions] == [2, 3]
+    assert history.head.number == 3 and history.checkout(2)["index.html"].content == "<p>v1</p>"
+    with pytest.raises(KeyError):
+        history.get(1)
+
+    assert history.prune(5) == 0 and len(history) == 2
+    history.prune(0)  # the head is always kept
+    assert [v.number for v in history.versions] == [3]
+    assert history.checkout(3).hashes() == files.hashes()
+    assert history.snapshot(files, "again") is history.head
@@ -0,0 +1,214 @@
+"""Per-session fan-out of workspace updates to every connected viewer"""
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from nicegui.client import Client
+from nicegui.element import Element
+
+from context.models import FileSet, GeneratedFile, ProjectState
+from context.session_manager import session_manager
+from context.task_registry import task_registry
+from ui.components import ProgressPanel, LivePreview, FileTree
+from ui.components.file_tree import highlight_code
+from ui.components.live_preview import cache_busted
+from ui.components.progress_panel import render_steps
+from utils.blocking import run_blocking
+from utils.telemetry import get_logger, registry
+
+logger = get_logger("broadcast")
+
+VIEWERS = registry.gauge("metaforge_workspace_viewers", "Workspace clients attached to a session")
+PAYLOADS = registry.counter(
+    "metaforge_broadcast_payloads_total", "Workspace updates computed (once per session)", ("kind",))
+DELIVERIES = registry.counter(
+    "metaforge_broadcast_deliveries_total", "Workspace updates handed to viewers", ("kind",))
+
+
+@dataclass(eq=False)
+class Viewer:
+    """One connected workspace client and its components"""
+    session_id: str
+    client: Client
+    progress_panel: ProgressPanel
+    live_preview: LivePreview
+    file_tree: FileTree
+    spinner: Element
+    viewing_version: Optional[int] = None   # version shown in this viewer's file tree (None: the current files)
+
+    def on_current(self, head: Optional[int]) -> bool:
+        return self.viewing_version is None or self.viewing_version == head
+
+
+class SessionHub:
+    """What a session's workspace shows, computed once and handed to each of its viewers.
+
+    refresh() builds payloads from the ProjectState only when it changed:
+    the activity log as one HTML string, the file list when the FileSet
+    version moves, and the version list when a new head appears. The
+    highlighted code and the cache-busted preview URL are produced once when
+    the build publishes them. Every viewer then receives the same finished
+    payload, so rendering and highlighting do not repeat per tab. The hub
+    keeps the latest payloads and the chat transcript, and a viewer that
+    joins later starts from them.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.viewers: List[Viewer] = []
+        self.busy = False
+        self.messages: List[Tuple[str, bool]] = []   # chat transcript: (text, sent by the user)
+        self.steps_html = ""
+        self._steps_key = None
+        self.files: Optional[FileSet] = None
+        self.files_version = -1
+        self.versions: List[dict] = []               # Version.summary() of every version
+        self.head: Optional[int] = None
+        self.preview_url: Optional[str] = None       # cache-busted, identical for every viewer
+        self.code: Optional[Tuple[str, str]] = None  # (highlighted html, path)
+
+    def _fanout(self, kind: str, deliver: Callable[[Viewer], None]):
+        PAYLOADS.inc(kind=kind)
+        for viewer in list(self.viewers):
+            try:
+                deliver(viewer)
+            except Exception as e:  # a client going away must not hold up the others
+                logger.debug("Skipped %s update for a viewer of %s: %s", kind, self.session_id, e)
+        DELIVERIES.inc(len(self.viewers), kind=kind)
+
+    def attach(self, viewer: Viewer):
+        """Add a viewer and bring it up to the latest payloads"""
+        self.viewers.append(viewer)
+        viewer.spinner.set_visibility(self.busy)
+        for text, sent in self.messages:
+            viewer.progress_panel.add_message(text, sent=sent)
+        if self.steps_html:
+            viewer.progress_panel.show_steps(self.steps_html)
+        if self.files is not None:
+            viewer.file_tree.update_files(self.files)
+        if self.versions:
+            viewer.viewing_version = self.head
+            viewer.file_tree.update_versions(self.versions, self.head)
+        if self.preview_url:
+            viewer.live_preview.show_url(self.preview_url)
+        if self.code:
+            viewer.file_tree.show_code(*self.code)
+
+    def detach(self, viewer: Viewer) -> int:
+        """Remove a viewer; returns how many remain"""
+        if viewer in self.viewers:
+            self.viewers.remove(viewer)
+        return len(self.viewers)
+
+    def refresh(self, state: ProjectState):
+        """Send every viewer what changed in the session since the last refresh"""
+        busy = task_registry.is_busy(self.session_id)
+        if busy != self.busy:
+            self.set_busy(busy)
+
+        steps_key = [(s.name, s.status, s.details, s.timestamp) for s in state.progress_steps]
+        if steps_key != self._steps_key:
+            self._steps_key = steps_key
+            self.steps_html = render_steps(state.progress_steps)
+            self._fanout("steps", lambda v: v.progress_panel.show_steps(self.steps_html))
+
+        history = state.history
+        if history and history.head.number != self.head:
+            self.head = history.head.number
+            self.versions = [v.summary() for v in history.versions]
+
+            def show_versions(viewer: Viewer):
+                viewer.viewing_version = self.head
+                viewer.file_tree.update_versions(self.versions, self.head)
+            self._fanout("versions", show_versions)
+
+        files = state.files
+        if files is not self.files or files.version != self.files_version:
+            self.files, self.files_version = files, files.version
+
+            def show_files(viewer: Viewer):
+                if viewer.on_current(self.head):   # leave viewers browsing an older version alone
+                    viewer.file_tree.update_files(files)
+            self._fanout("files", show_files)
+
+    def set_busy(self, busy: bool):
+        self.busy = busy
+        self._fanout("busy", lambda v: v.spinner.set_visibility(busy))
+
+    def message(self, text: str, sent: bool = False):
+        """Add a chat message for every viewer (and for viewers joining later)"""
+        self.messages.append((text, sent))
+        self._fanout("message", lambda v: v.progress_panel.add_message(text, sent=sent))
+
+    def show_preview(self, url: str):
+        """Load (or reload) `url` in every viewer's preview"""
+        self.preview_url = cache_busted(url)
+        self._fanout("preview", lambda v: v.live_preview.show_url(self.preview_url))
+
+    async def show_code(self, file: GeneratedFile):
+        """Highlight `file` once and show it in every viewer's code view"""
+        html = await run_blocking(highlight_code, file.content, file.language)
+        self.code = (html, file.path)
+        self._fanout("code", lambda v: v.file_tree.show_code(html, file.path))
+
+    def payload_bytes(self) -> int:
+        """Size of the payloads held for the session (shared by all its viewers)"""
+        return len(self.steps_html) + (len(self.code[0]) if self.code else 0) \
+            + sum(len(text) for text, _ in self.messages)
+
+
+class BroadcastHub:
+    """Session hubs by session id, refreshed by one loop for all sessions with viewers"""
+
+    def __init__(self):
+        self.hubs: Dict[str, SessionHub] = {}
+
+    def hub(self, session_id: str) -> SessionHub:
+        hub = self.hubs.get(session_id)
+        if hub is None:
+            hub = self.hubs[session_id] = SessionHub(session_id)
+        return hub
+
+    def get(self, session_id: str) -> Optional[SessionHub]:
+        return self.hubs.get(session_id)
+
+    def attach(self, session_id: str, viewer: Viewer) -> SessionHub:
+        hub = self.hub(session_id)
+        hub.attach(viewer)
+        state = session_manager.get_session(session_id)
+        if state is not None:
+            hub.refresh(state)
+        return hub
+
+    def detach(self, session_id: str, viewer: Viewer) -> int:
+        hub = self.hubs.get(session_id)
+        return hub.detach(viewer) if hub else 0
+
+    def forget(self, session_id: str):
+        """Drop a session's payloads and transcript"""
+        self.hubs.pop(session_id, None)
+
+    async def run(self, interval: float = 1.0):
+        """Refresh every watched session each `interval` seconds (one timer instead of one per client)"""
+        while True:
+            await asyncio.sleep(interval)
+            for session_id, hub in list(self.hubs.items()):
+                if not hub.viewers:
+                    continue
+                state = session_manager.get_session(session_id)
+                if state is not None:
+                    try:
+                        hub.refresh(state)
+                    except Exception:
+                        logger.exception("Workspace refresh failed for %s", session_id)
+
+    def report(self) -> dict:
+        return {
+            "sessions": len(self.hubs),
+            "viewers": {sid: len(hub.viewers) for sid, hub in self.hubs.items() if hub.viewers},
+        }
+
+
+# Global broadcast hub instance
+broadcast = BroadcastHub()
+registry.on_collect(lambda: VIEWERS.set(sum(len(h.viewers) for h in broadcast.hubs.values())))
@@ -1,21 +1,83 @@
 """File tree component showing generated files"""
+import bisect
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
 from nicegui import ui
-from context.models import GeneratedFile
+from context.models import GeneratedFile, FileSet, display_key
+from utils.blocking import run_blocking
 from utils.file_manager import get_file_icon
-from pygments import highlight
-from pygments.lexers import get_lexer_by_name, TextLexer
-from pygments.formatters import HtmlFormatter
+from utils.telemetry import get_logger
+
+logger = get_logger("file_tree")
+
+ROW_HEIGHT = 24          # px; rows have a fixed height so a long list can be windowed
+VIRTUALIZE_AFTER = 150   # files; longer lists only render the rows around the scroll position
+WINDOW_ROWS = 60         # rows rendered for a virtualized list (the visible ones plus overscan)
+
+
+@lru_cache(maxsize=1)
+def _source_formatter():
+    """The code view formatter and its CSS, built once (style defs are costly)"""
+    from pygments.formatters import HtmlFormatter  # deferred: pygments is not needed to serve the landing page
+    formatter = HtmlFormatter(style='monokai', linenos=True, cssclass='source')
+    return formatter, formatter.get_style_defs(".source")
+
+
+def highlight_code(content: str, language: str) -> str:
+    """Syntax-highlighted HTML for the code preview"""
+    from pygments import highlight
+    from pygments.lexers import get_lexer_by_name, TextLexer
+    try:
+        lexer = get_lexer_by_name(language)
+    except Exception:
+        lexer = TextLexer()
+        
+    formatter, style_defs = _source_formatter()
+    highlighted = highlight(content, lexer, formatter)
+    
+    return f'''
+    <style>
+        .source {{ font-size: 11px !important; line-height: 1.4 !important; font-family: "JetBrains Mono", monospace !important; }}
+        {style_defs}
+    </style>
+    {highlighted}
+    '''
+
+
+def _row_key(path: str) -> tuple:
+    """Display order with the path itself as tie-breaker (display_key ignores case)"""
+    return (*display_key(path), path)
 
 
 class FileTree:
-    """Right panel showing file structure"""
+    """Right panel showing file structure.
+
+    The file list follows the FileSet's per-file versions: an update only
+    inserts, removes or re-marks the rows of paths that changed since the
+    version last shown (a rename is a removal plus an insertion). Changed
+    files are highlighted until they are opened. Beyond VIRTUALIZE_AFTER
+    files only a window of rows around the scroll position exists, with
+    spacers standing in for the rest.
+    """
     
     def __init__(self):
         self.tree_container = None
         self.code_container = None
         self.code_scroll = None
         self.filename_label = None
+        self.version_select = None
         self.current_files = []
+        self._shown_version = 0                 # current_files.version the list reflects
+        self._paths: List[str] = []             # display order
+        self._keys: List[tuple] = []            # _row_key() of each entry in _paths, for bisect
+        self._hashes: Dict[str, str] = {}       # path -> content hash shown
+        self._rows: Dict[str, Tuple[ui.row, ui.label]] = {}  # rendered rows: all of them, or the window
+        self._marked: Set[str] = set()          # changed since the user last opened them
+        self._start = 0                         # first rendered index of a virtualized list
+        self._top_spacer = None
+        self._bottom_spacer = None
+        self.on_version = None   # async callback(version number) to show a past version
+        self.on_restore = None   # async callback(version number) to make it current again
     
     def create(self):
         """Create the right panel UI with Flat File List and Code Preview"""
@@ -27,8 +89,17 @@ class FileTree:
                     ui.label('📁 Project Files').classes('text-sm font-bold text-slate-400 uppercase tracking-wider')
                     ui.button(icon='download', on_click=self._download_zip).props('flat dense').classes('text-blue-400 hover:text-white')
                 
-                with ui.scroll_area().classes('w-full flex-grow'):
-                     self.tree_container = ui.column().classes('w-full gap-1')
+                with ui.row().classes('w-full items-center gap-1 mb-2 no-wrap'):
+                    self.version_select = ui.select({}, label='Version', on_change=self._handle_version_change) \
+                        .props('dense dark options-dense').classes('flex-grow text-xs')
+                    ui.button(icon='restore', on_click=self._handle_restore).props('flat dense') \
+                        .classes('text-slate-400 hover:text-white').tooltip('Restore this version')
+                
+                with ui.scroll_area(on_scroll=self._handle_scroll).classes('w-full flex-grow'):
+                     self.tree_container = ui.column().classes('w-full gap-0')
+                     with self.tree_container:
+                          self._top_spacer = ui.element('div').classes('w-full')
+                          self._bottom_spacer = ui.element('div').classes('w-full')
             
             # Bottom: Code Preview (75%)
             with ui.column().classes('w-full h-[75%] p-4 flex flex-col overflow-hidden bg-slate-950'):
@@ -41,66 +112,136 @@ class FileTree:
             
             return self
 
-    def update_files(self, files: list[GeneratedFile]):
-        """Update the file list with a flat structure"""
-        if not files:
-            return
-            
-        self.current_files = files
+    def update_files(self, files: FileSet | list[GeneratedFile]):
+        """Update the file list with the rows that changed since it was last shown"""
+        if not isinstance(files, FileSet):
+             files = FileSet(files)
+        if files is self.current_files:
+            changed = files.changed_since(self._shown_version)
+        else:
+            # Another FileSet (a checked-out version): compare content hashes once
+            hashes = files.hashes()
+            changed = [p for p in hashes.keys() | self._hashes.keys() if hashes.get(p) != self._hashes.get(p)]
+        self.current_files, self._shown_version = files, files.version
         
-        self.tree_container.clear()
+        for path in changed:
+            digest = files.content_hash(path)
+            if digest is None:
+                self._remove(path)
+            elif path not in self._hashes:
+                self._insert(path, digest)
+            elif digest != self._hashes[path]:
+                self._hashes[path] = digest
+                self._set_marked(path, True)
+        if changed:
+            self._render()
+        logger.debug("Patched file list: %d changed of %d files", len(changed), len(files))
+
+    def _insert(self, path: str, digest: str):
+        key = _row_key(path)
+        index = bisect.bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._paths.insert(index, path)
+        self._hashes[path] = digest
+
+    def _remove(self, path: str):
+        if self._hashes.pop(path, None) is None:
+            return
+        index = bisect.bisect_left(self._keys, _row_key(path))
+        del self._keys[index], self._paths[index]
+        self._marked.discard(path)
+
+    def _window(self) -> Tuple[int, int]:
+        """Index range of the rows to render"""
+        total = len(self._paths)
+        if total <= VIRTUALIZE_AFTER:
+            return 0, total
+        start = min(self._start, total - WINDOW_ROWS)
+        return start, start + WINDOW_ROWS
+
+    def _render(self):
+        """Bring the rendered rows in line with the window: rows only move in or out, none are rebuilt"""
+        start, end = self._window()
+        visible = self._paths[start:end]
+        wanted = set(visible)
+        for path in [p for p in self._rows if p not in wanted]:
+            self._rows.pop(path)[0].delete()
+        for offset, path in enumerate(visible):
+            if path not in self._rows:
+                row = self._make_row(path)
+                row.move(self.tree_container, target_index=offset + 1)  # after the top spacer
+        self._top_spacer.style(f'height: {start * ROW_HEIGHT}px')
+        self._bottom_spacer.style(f'height: {(len(self._paths) - end) * ROW_HEIGHT}px')
+
+    def _make_row(self, path: str) -> ui.row:
         with self.tree_container:
-             # Sort files: app.py and index.html first, then alphabetic
-             sorted_files = sorted(files, key=lambda f: (
-                  f.path != 'index.html' and f.path != '/index.html',
-                  f.path != 'app.py' and f.path != '/app.py',
-                  f.path.lower()
-             ))
-
-             for f in sorted_files:
-                  # Normalize path for display
-                  path = f.path.replace('\\', '/').strip('/')
-                  icon = get_file_icon(path)
-                  
-                  with ui.row().classes('w-full items-center px-2 py-1 hover:bg-slate-800 rounded cursor-pointer group transition-colors') \
-                       .on('click', lambda _, file=f: self._handle_file_click(file)):
-                       ui.icon(icon, size='xs').classes('text-slate-500 group-hover:text-blue-400')
-                       ui.label(path).classes('text-xs text-slate-300 group-hover:text-white truncate')
-
-        print(f"DEBUG: Updated flat file list with {len(files)} files.")
-
-    def _handle_file_click(self, file_obj):
+            with ui.row().classes('w-full items-center px-2 no-wrap hover:bg-slate-800 rounded cursor-pointer group transition-colors') \
+                 .style(f'height: {ROW_HEIGHT}px; min-height: {ROW_HEIGHT}px') \
+                 .on('click', lambda _, p=path: self._handle_path_click(p)) as row:
+                 ui.icon(get_file_icon(path), size='xs').classes('text-slate-500 group-hover:text-blue-400')
+                 label = ui.label(path).classes('text-xs group-hover:text-white truncate')
+        self._rows[path] = (row, label)
+        self._style_label(label, path in self._marked)
+        return row
+
+    @staticmethod
+    def _style_label(label: ui.label, marked: bool):
+        if marked:
+            label.classes(add='text-amber-300 italic', remove='text-slate-300')
+        else:
+            label.classes(add='text-slate-300', remove='text-amber-300 italic')
+
+    def _set_marked(self, path: str, marked: bool):
+        (self._marked.add if marked else self._marked.discard)(path)
+        if path in self._rows:
+            self._style_label(self._rows[path][1], marked)
+
+    def _handle_scroll(self, event):
+        """Move the window of a virtualized list once the scroll position leaves its overscan"""
+        if len(self._paths) <= VIRTUALIZE_AFTER:
+            return
+        start = max(0, int(event.vertical_position // ROW_HEIGHT) - WINDOW_ROWS // 4)
+        if abs(start - self._start) >= WINDOW_ROWS // 4:
+            self._start = start
+            self._render()
+
+    async def _handle_path_click(self, path: str):
         """Handle click on a file in the flat list"""
-        self.update_code(file_obj.content, file_obj.language, file_obj.path)
+        file_obj = self.current_files.get(path)
+        if file_obj is None:
+            return
+        self._set_marked(path, False)
+        await self.update_code(file_obj.content, file_obj.language, file_obj.path)
         if hasattr(self, 'on_select') and self.on_select:
              self.on_select(file_obj)
 
-    def update_code(self, content: str, language: str, filename: str = ""):
-        """Update the code preview window with syntax highlighting"""
-        from pygments import highlight
-        from pygments.lexers import get_lexer_by_name, TextLexer
-        from pygments.formatters import HtmlFormatter
-        
+    async def update_code(self, content: str, language: str, filename: str = ""):
+        """Update the code preview window with syntax highlighting (pygments runs off the event loop)"""
+        self.show_code(await run_blocking(highlight_code, content, language), filename)
+
+    def show_code(self, html: str, filename: str = ""):
+        """Show code already rendered by highlight_code()"""
         self.filename_label.text = filename
-        
-        try:
-            lexer = get_lexer_by_name(language)
-        except:
-            lexer = TextLexer()
-            
-        formatter = HtmlFormatter(style='monokai', linenos=True, cssclass='source')
-        highlighted = highlight(content, lexer, formatter)
-        
-        html = f'''
-        <style>
-            .source {{ font-size: 11px !important; line-height: 1.4 !important; font-family: "JetBrains Mono", monospace !important; }}
-            {formatter.get_style_defs(".source")}
-        </style>
-        {highlighted}
-        '''
         self.code_container.content = html
         if self.code_scroll:
             self.code_scroll.scroll_to(percent=0)
 
+    def update_versions(self, versions: list, current: int):
+        """Offer `versions` (Version.summary() dicts) in the selector, newest first"""
+        if not self.version_select:
+            return
+        self.version_select.set_options(
+            {v["number"]: f'v{v["number"]} · {v["label"]}' for v in reversed(versions)},
+            value=current,
+        )
+
+    async def _handle_version_change(self, event):
+        if event.value is not None and self.on_version:
+            await self.on_version(event.value)
+
+    async def _handle_restore(self):
+        if self.version_select and self.version_select.value is not None and self.on_restore:
+            await self.on_restore(self.version_select.value)
+
     def _download_zip(self):
         ui.notify('Download feature coming soon!', type='info')
@@ -3,6 +3,15 @@ from nicegui import ui
 from pathlib import Path
 import time
 
+from utils.telemetry import get_logger
+
+logger = get_logger("live_preview")
+
+
+def cache_busted(url: str) -> str:
+    """`url` with a timestamp query so the iframe reloads it"""
+    return f"{url}?t={int(time.time() * 1000)}"
+
 
 class LivePreview:
     """Center panel showing live preview of generated app"""
@@ -39,13 +48,14 @@ class LivePreview:
     
     async def load_preview_url(self, url: str):
         """Load the preview from a specific URL"""
+        self.show_url(cache_busted(url))
+    
+    def show_url(self, final_url: str):
+        """Point the iframe at an already cache-busted URL"""
         self.loaded = True
         self.status_label.text = 'Loading...'
         self.status_label.classes('text-sm text-blue-400')
         
-        # Cache bust
-        final_url = f"{url}?t={int(time.time() * 1000)}"
-        
         try:
             # Hide placeholder
             if hasattr(self, 'placeholder'):
@@ -64,7 +74,7 @@ class LivePreview:
         except Exception as e:
             self.status_label.text = f'Preview error: {str(e)}'
             self.status_label.classes('text-sm text-red-500')
-            print(f"[ERROR] Preview load failed: {e}")
+            logger.error("Preview load failed: %s", e)
             
     async def load_preview(self, project_dir: Path):
         """Deprecated: Load the preview from project directory (uses separate server)"""
@@ -1,15 +1,39 @@
 """Left panel with Progress and Chat"""
+from html import escape
 from nicegui import ui
 from context.models import ProgressStep, ProgressStatus
 import datetime
 
+# status -> (text color, icon) in the activity log
+_STATUS_STYLE = {
+    ProgressStatus.IN_PROGRESS: ("text-blue-400", "⚙️"),
+    ProgressStatus.COMPLETED: ("text-green-400", "✅"),
+    ProgressStatus.ERROR: ("text-red-400", "❌"),
+}
+
+
+def render_steps(steps: list[ProgressStep]) -> str:
+    """The activity log as one HTML fragment, rendered once and shown by every viewer"""
+    rows = []
+    for step in steps:
+        color, icon = _STATUS_STYLE.get(step.status, ("text-slate-500", "⏳"))
+        details = f'<div class="text-slate-400 italic break-all opacity-80">{escape(step.details)}</div>' if step.details else ''
+        rows.append(
+            '<div class="w-full flex flex-row no-wrap gap-2 items-start opacity-90">'
+            f'<span class="text-[8px] text-slate-600 flex-none font-mono">[{step.timestamp.strftime("%H:%M:%S")}]</span>'
+            f'<span class="flex-none text-[10px]">{icon}</span>'
+            f'<div class="flex-grow flex flex-col"><div class="font-bold {color} break-all">{escape(step.name)}</div>{details}</div>'
+            '</div>'
+        )
+    return '<div class="w-full flex flex-col gap-1">' + ''.join(rows) + '</div>'
+
+
 class ProgressPanel:
     """Left panel showing orchestration progress and Chat interactions"""
     
     def __init__(self):
-        self.steps_container = None
+        self.steps_view = None
         self.chat_container = None
-        self.step_map = {} # Map step name to UI element for updates
         
     def create(self):
         """Create the left panel UI with 50/50 Chat and Progress split"""
@@ -36,40 +60,24 @@ class ProgressPanel:
             with ui.column().classes('w-full h-1/2 p-4 flex flex-col overflow-hidden bg-slate-950/50'):
                 ui.label('📋 Activity Logs').classes('text-sm font-bold mb-2 text-slate-400 uppercase tracking-wider')
                 with ui.scroll_area().classes('w-full flex-grow font-mono text-[10px] leading-tight') as self.log_scroll:
-                    self.steps_container = ui.column().classes('w-full gap-1')
+                    self.steps_view = ui.html('', sanitize=False).classes('w-full')
             
             return self
 
     def update_steps(self, steps: list[ProgressStep]):
         """Update the progress steps as a rolling log"""
-        if not self.steps_container or not self.steps_container.client.connected:
+        self.show_steps(render_steps(steps))
+
+    def show_steps(self, html: str):
+        """Show an activity log rendered by render_steps()"""
+        if not self.steps_view or not self.steps_view.client.connected:
             return
-            
-        try:
-            self.steps_container.clear()
-            with self.steps_container:
-                for step in steps:
-                    color = "text-blue-400" if step.status == ProgressStatus.IN_PROGRESS else \
-                            "text-green-400" if step.status == ProgressStatus.COMPLETED else \
-                            "text-red-400" if step.status == ProgressStatus.ERROR else "text-slate-500"
-                    
-                    icon = "⚙️" if step.status == ProgressStatus.IN_PROGRESS else \
-                           "✅" if step.status == ProgressStatus.COMPLETED else \
-                           "❌" if step.status == ProgressStatus.ERROR else "⏳"
-                    
-                    with ui.row().classes('w-full gap-2 items-start opacity-90'):
-                        ui.label(f"[{step.timestamp.strftime('%H:%M:%S')}]").classes('text-[8px] text-slate-600 flex-none font-mono')
-                        ui.label(icon).classes('flex-none text-[10px]')
-                        with ui.column().classes('flex-grow gap-0'):
-                            ui.label(step.name).classes(f'font-bold {color} break-all')
-                            if step.details:
-                                ui.label(step.details).classes('text-slate-400 italic break-all opacity-80')
-            
-            # Auto-scroll log to bottom
-            if self.log_scroll:
-                self.log_scroll.scroll_to(percent=1.0)
-        except:
-            pass
+        if self.steps_view.content == html:
+            return
+        self.steps_view.content = html
+        # Auto-scroll log to bottom
+        if self.log_scroll:
+            self.log_scroll.scroll_to(percent=1.0)
 
     def add_message(self, text: str, sent: bool = False):
         """Add a message to the chat container with refined alignment"""
@@ -104,7 +112,9 @@ class ProgressPanel:
         if not text: return
         
         self.chat_input.value = ''
-        self.add_message(text, sent=True)
+        # With a callback the workspace echoes the message to every viewer of the session
+        if not getattr(self, 'on_chat_message', None):
+            self.add_message(text, sent=True)
             
         # Trigger parent callback
         if hasattr(self, 'on_chat_message') and self.on_chat_message:
@@ -1,41 +1,202 @@
 """Main NiceGUI application for MetaForge"""
-from nicegui import ui, app
+from nicegui import ui, app, background_tasks
 import asyncio
+import functools
+import importlib
+import mimetypes
+import time
 from pathlib import Path
 
 import config
-from context import ProblemStatement, ProgressStatus
+from context import ProblemStatement, ProgressStatus, task_registry, project_index
 from context.session_manager import session_manager
-from agents import MetaForgeOrchestrator
+from context.memory import memory_guard
 from ui.components import create_landing_page, ProgressPanel, LivePreview, FileTree
-from utils import write_files_to_disk
-from preview import PreviewServer
-from utils import validate_code
+from ui.broadcast import broadcast, Viewer
+from utils import write_files_to_disk, remove_files_from_disk
+from utils import validate_files
 from context.models import ValidationResult
+from utils.telemetry import get_logger, registry, span, configure_logging
+from utils.profiler import session_profiler
+from utils.blocking import run_blocking
+from utils.loop_monitor import loop_monitor
+from preview import asset_cache
+from preview.asset_cache import CDN_HOSTS, IMMUTABLE, REVALIDATE
+import hmac
+from fastapi import Header, HTTPException, Request
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, RedirectResponse, Response
+
+logger = get_logger("ui")
+
+SESSIONS = registry.gauge("metaforge_sessions", "Project sessions held in memory")
+SESSIONS_BUSY = registry.gauge("metaforge_sessions_busy", "Sessions with a generation or refinement running")
+
+
+# app.storage.user key of the project a browser last started or opened
+SESSION_KEY = "session_id"
+
+
+def _collect_session_metrics():
+    sessions = session_manager.get_all_sessions()
+    SESSIONS.set(len(sessions))
+    SESSIONS_BUSY.set(sum(1 for sid in sessions if task_registry.is_busy(sid)))
+
+
+registry.on_collect(_collect_session_metrics)
+
+
+def _require_admin(token: str):
+    """Admin routes 404 unless ADMIN_TOKEN is configured, 403 on a wrong X-Admin-Token"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    if not hmac.compare_digest(token or "", config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _import_generation_stack():
+    """Import ADK, LiteLLM, google.genai and pygments (run off the loop by prewarm)"""
+    importlib.import_module("agents")
+    from ui.components.file_tree import highlight_code
+    highlight_code("", "html")
 
 
 class MetaForgeApp:
     """Main MetaForge application"""
     
     def __init__(self):
-        # Initialize with OpenAI Key
-        self.orchestrator = MetaForgeOrchestrator()
+        # Built on first use (or by prewarm): ADK, LiteLLM and five LlmAgents are not needed for the landing page
+        self._orchestrator = None
         # self.preview_server = PreviewServer(port=config.PREVIEW_PORT)
         
-        # UI Components
-        self.progress_panel = None
-        self.live_preview = None
-        self.file_tree = None
-        self.spinner = None
-        self.spinner_container = None
-        
-        # State
-        self.current_session_id = None
-        self.is_generating = False
+        # State (workspace components live per viewer, see ui/broadcast.py; each browser's own
+        # project is kept in app.storage.user under SESSION_KEY)
+        self._preview_dirs: dict[str, Path] = {}  # session -> directory served at /preview/{session}
+        self._refine_timers: dict[str, asyncio.Task] = {}  # session -> pending debounce
+        self._disk_writes: dict[str, asyncio.Task] = {}  # session -> last queued streamed-file write
+        memory_guard.add_probe(self._ui_memory)
+    
+    def _ui_memory(self, session_id: str) -> dict:
+        """Bytes of workspace payloads held for a session (activity log, highlighted code, chat)"""
+        hub = broadcast.get(session_id)
+        return {"ui_html": hub.payload_bytes()} if hub else {}
+    
+    @property
+    def orchestrator(self):
+        """The generation orchestrator, imported and constructed on first access"""
+        if self._orchestrator is None:
+            from agents import MetaForgeOrchestrator
+            with span("orchestrator_init"):
+                self._orchestrator = MetaForgeOrchestrator()
+        return self._orchestrator
+    
+    async def sweep_idle_sessions(self):
+        """Periodically enforce the memory limits and move idle sessions nobody is viewing to cold storage"""
+        while True:
+            await asyncio.sleep(config.COLD_SWEEP_SECONDS)
+            await memory_guard.enforce()
+            await session_manager.freeze_idle(config.COLD_AFTER_SECONDS)
+    
+    async def prewarm(self):
+        """Once the server is listening, load the generation stack so the first build does not pay for it"""
+        await asyncio.sleep(config.PREWARM_DELAY_SECONDS)
+        if self._orchestrator is not None:
+            return
+        started = time.perf_counter()
+        await run_blocking(_import_generation_stack)
+        self.orchestrator  # imports are cached now; only the agent construction runs on the loop
+        logger.info("Pre-warmed generation stack in %.2fs", time.perf_counter() - started)
     
     def create_ui(self):
         """Create the main UI"""
         
+        # Prometheus scrape endpoint: stage/agent latency histograms, in-flight gauges, tokens
+        @app.get('/metrics')
+        def metrics():
+            return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
+        
+        # Admin: sample a session's generation/refinement tasks into collapsed-stack files
+        @app.post('/admin/profile/{session_id}')
+        async def toggle_profile(session_id: str, enabled: bool = True,
+                           x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            if enabled:
+                session_profiler.arm(session_id, task_registry.tasks(session_id))
+            else:
+                session_profiler.disarm(session_id)
+            return {"session_id": session_id, "enabled": enabled, **session_profiler.report()}
+        
+        @app.get('/admin/profile')
+        def profile_status(x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            return session_profiler.report()
+        
+        @app.get('/admin/loop')
+        def loop_status(x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            return loop_monitor.report()
+        
+        @app.get('/admin/sessions')
+        def sessions_status(x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            return {**session_manager.report(), "workspace": broadcast.report()}
+        
+        @app.get('/admin/memory')
+        def memory_status(top: int = 50, x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            return memory_guard.report(top)
+        
+        @app.get('/admin/assets')
+        def assets_status(top: int = 20, x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            return asset_cache.report(top)
+        
+        @app.get('/admin/profile/files/{name}')
+        def profile_file(name: str, x_admin_token: str = Header(default="")):
+            _require_admin(x_admin_token)
+            path = session_profiler.directory / Path(name).name
+            if not path.is_file():
+                raise HTTPException(status_code=404)
+            return FileResponse(path, media_type='text/plain')
+        
+        # Any past version of a project, served from its history (nothing is written to disk)
+        @app.get('/versions/{session_id}/{number}/{path:path}')
+        async def version_file(session_id: str, number: int, path: str):
+            # Looked up on the loop: it may thaw a cold session, which the sweep and memory guard also touch
+            session = session_manager.get_session(session_id)
+            try:
+                file = await run_blocking(session.history.read, number, path) if session else None
+            except KeyError:
+                file = None
+            if file is None:
+                raise HTTPException(status_code=404)
+            if path.endswith(('.html', '.htm')):
+                return HTMLResponse(await run_blocking(asset_cache.rewrite_html, file.content))
+            return Response(file.content, media_type=mimetypes.guess_type(path)[0] or 'text/plain')
+        
+        # Generated frontends; HTML pages load their CDN assets from the local store
+        @app.get('/preview/{session_id}/{path:path}')
+        async def preview_file(session_id: str, path: str):
+            directory = self._preview_dirs.get(session_id)
+            target = (directory / (path or 'index.html')).resolve() if directory else None
+            if target is None or not target.is_relative_to(directory.resolve()) or not target.is_file():
+                raise HTTPException(status_code=404)
+            if target.suffix in ('.html', '.htm'):
+                return HTMLResponse(await asset_cache.page(target), headers={'Cache-Control': 'no-cache'})
+            return FileResponse(target)
+        
+        # Vendored CDN assets: /_assets/<content hash>/<cdn host>/<path>; anything not stored goes to the CDN
+        @app.get('/_assets/{version}/{host}/{path:path}')
+        async def vendored_asset(version: str, host: str, path: str, request: Request):
+            if host not in CDN_HOSTS:
+                raise HTTPException(status_code=404)
+            url, asset = asset_cache.resolve(host, path, request.url.query)
+            blob = await run_blocking(asset_cache.verified_blob, asset) if asset else None
+            if blob is None:
+                return RedirectResponse(url, status_code=307)
+            cache_control = IMMUTABLE if version == asset.version else REVALIDATE
+            return FileResponse(blob, media_type=asset.content_type,
+                                headers={'Cache-Control': cache_control, 'ETag': f'"{asset.sha256}"'})
+        
         # Landing page
         @ui.page('/')
         def index():
@@ -43,15 +204,49 @@ class MetaForgeApp:
             ui.query('body').classes('bg-slate-950')
             create_landing_page(on_generate=self.start_generation)
         
-        # Workspace page (shown during generation)
+        # Workspace page (shown during generation); ?session=<id> opens a given project,
+        # and every tab open on a project receives the same updates
         @ui.page('/workspace')
-        def workspace():
+        def workspace(session: str = ''):
             # Dark theme background
             ui.query('body').classes('bg-slate-950')
-            self.create_workspace()
+            # Without ?session=, this browser's own last project (never one another visitor started)
+            session_id = session or app.storage.user.get(SESSION_KEY)
+            if not session and session_id not in session_manager.sessions:
+                session_id = None
+            viewer = self.create_workspace(session_id)
+            
+            # Work nobody is watching any more is cancelled once the client is gone for good
+            if session_id:
+                app.storage.user[SESSION_KEY] = session_id
+                task_registry.attach_viewer(session_id)
+                broadcast.attach(session_id, viewer)
+                ui.context.client.on_delete(lambda: self._viewer_left(viewer))
+    
+    def _viewer_left(self, viewer: Viewer):
+        """Cancel a session's running work when its last viewer disconnects"""
+        broadcast.detach(viewer.session_id, viewer)
+        if task_registry.detach_viewer(viewer.session_id) == 0:
+            self._drop_pending_refines(viewer.session_id)
+            task_registry.forget(viewer.session_id)
+            broadcast.forget(viewer.session_id)
     
-    def create_workspace(self):
-        """Create the three-panel workspace"""
+    def new_project(self, session_id: str | None):
+        """Leave the project for the landing page, stopping its work unless others are watching it"""
+        self._leave_project(session_id, "new project")
+        ui.navigate.to('/')
+    
+    def _leave_project(self, session_id: str | None, reason: str, own_viewers: int = 1):
+        """Stop a project this client is leaving, unless another viewer is still watching it.
+        
+        `own_viewers` is how many of the project's viewers are the caller's own page (0 from the landing page).
+        """
+        if session_id and task_registry.viewer_count(session_id) <= own_viewers:
+            self._drop_pending_refines(session_id)
+            task_registry.cancel(session_id, reason)
+    
+    def create_workspace(self, session_id: str | None) -> Viewer:
+        """Create the three-panel workspace for one viewer of `session_id`"""
         ui.colors(primary='#3b82f6', secondary='#8b5cf6', accent='#06b6d4', dark='#0f172a')
         
         # Transparent/Dark Header
@@ -62,92 +257,119 @@ class MetaForgeApp:
                     ui.label('MetaForge').classes('text-xl font-bold text-white tracking-tight')
                 
                 with ui.row().classes('items-center gap-4'):
-                    with ui.row().classes('items-center gap-2') as self.spinner_container:
+                    with ui.row().classes('items-center gap-2') as spinner_container:
                         ui.label('Building...').classes('text-xs text-blue-400 font-mono animate-pulse')
-                        self.spinner = ui.spinner(size='sm', color='blue')
-                    self.spinner_container.set_visibility(False)
+                        ui.spinner(size='sm', color='blue')
+                    spinner_container.set_visibility(False)
                     
-                    ui.button('New Project', icon='add', on_click=lambda: ui.navigate.to('/')).props('flat dense').classes('text-slate-400 hover:text-white')
+                    ui.button('New Project', icon='add', on_click=lambda: self.new_project(session_id)) \
+                        .props('flat dense').classes('text-slate-400 hover:text-white')
         
         # Three-panel layout
         with ui.row().classes('w-full h-[calc(100vh-64px)] gap-0 overflow-hidden'):
             # Left: Chat & Progress (25%)
             with ui.column().classes('w-1/4 h-full bg-slate-900 border-r border-slate-800 p-0 overflow-hidden shadow-xl z-10'):
-                self.progress_panel = ProgressPanel()
-                self.progress_panel.create()
-                self.progress_panel.on_chat_message = self.handle_chat_message
-                
-                # Add initial user message if we just started
-                if hasattr(self, 'initial_problem') and self.initial_problem:
-                     self.progress_panel.add_message(self.initial_problem, sent=True)
-                     self.initial_problem = None # Clear after adding
+                progress_panel = ProgressPanel()
+                progress_panel.create()
+                # The chat transcript (starting with the prompt) comes from the session's hub
+                progress_panel.on_chat_message = functools.partial(self.handle_chat_message, session_id=session_id)
             
             # Center: Full Live Preview (55%)
             with ui.column().classes('w-[55%] h-full bg-slate-950 p-6 relative overflow-hidden'):
-                self.live_preview = LivePreview(preview_port=config.PREVIEW_PORT).create()
+                live_preview = LivePreview(preview_port=config.PREVIEW_PORT).create()
             
             # Right: Files & Code (20%)
             with ui.column().classes('w-1/5 h-full bg-slate-900 border-l border-slate-800 p-0 overflow-hidden'):
-                self.file_tree = FileTree().create()
-                # Hook up selection to code preview (inside file_tree)
-                self.file_tree.on_select = lambda f: self.file_tree.update_code(f.content, f.language, f.path)
+                file_tree = FileTree().create()
         
-        # Start auto-refresh for progress updates
-        if hasattr(self, 'workspace_timer') and self.workspace_timer:
-            self.workspace_timer.cancel()
-        self.workspace_timer = ui.timer(1.0, self.update_workspace)
+        # Progress, files and versions are pushed by the broadcast loop (one timer for all viewers)
+        viewer = Viewer(session_id, ui.context.client, progress_panel, live_preview, file_tree, spinner_container)
+        file_tree.on_version = functools.partial(self.show_version, viewer)
+        file_tree.on_restore = functools.partial(self.restore_version, viewer)
+        return viewer
         
-    async def handle_chat_message(self, message: str):
+    async def handle_chat_message(self, message: str, session_id: str | None = None):
         """Handle iterative updates from chat"""
-        if not self.current_session_id:
+        if not session_id:
              ui.notify("No active session!", type='warning')
              return
+        broadcast.hub(session_id).message(message, sent=True)
              
-        # Start background refinement
-        asyncio.create_task(self.run_refinement(message))
+        # Buffer the message; quick successive edits are merged into one refine
+        if not await memory_guard.admit(session_id):
+             ui.notify("This project has reached its memory limit; start a new project to keep editing", type='negative')
+             return
+        task_registry.enqueue(session_id, message)
+        if task_registry.is_busy(session_id):
+             # Applied against the latest state once the running task finishes
+             ui.notify("Queued: will apply after the current build finishes", type='info')
+             return
         
-    async def run_refinement(self, instruction: str):
+        pending = self._refine_timers.pop(session_id, None)
+        if pending:
+             pending.cancel()
+        self._refine_timers[session_id] = asyncio.create_task(self._flush_after_debounce(session_id))
+        
+    async def _flush_after_debounce(self, session_id: str):
+        """Start one refinement for everything buffered once the chat goes quiet"""
+        await asyncio.sleep(config.REFINE_DEBOUNCE_SECONDS)
+        self._refine_timers.pop(session_id, None)
+        if not task_registry.is_busy(session_id):
+             self._start_queued(session_id)
+        
+    def _drop_pending_refines(self, session_id: str):
+        """Stop a session's debounce timer and discard its buffered chat instructions"""
+        pending = self._refine_timers.pop(session_id, None)
+        if pending:
+             pending.cancel()
+        task_registry.take_queued(session_id)
+        
+    def _start_queued(self, session_id: str):
+        """Start a single refinement covering every queued chat instruction of a session"""
+        queued = task_registry.take_queued(session_id)
+        if not queued:
+            return
+        task_registry.start(session_id, self.run_refinement(session_id, queued), name="refinement")
+        
+    async def run_refinement(self, session_id: str, instructions: list[str]):
          """Run refinement task"""
-         if self.is_generating: return
-         self.is_generating = True
-         if self.spinner_container: self.spinner_container.set_visibility(True)
+         hub = broadcast.hub(session_id)
+         hub.set_busy(True)
+         cancelled = False
          try:
-             session = session_manager.get_session(self.current_session_id)
-             session.update_progress("Refinement requested", ProgressStatus.IN_PROGRESS, instruction[:200])
-             await self.orchestrator.refine(instruction, self.current_session_id)
+             session = session_manager.get_session(session_id)
+             session.update_progress(
+                 "Refinement requested" if len(instructions) == 1 else f"{len(instructions)} refinements requested",
+                 ProgressStatus.IN_PROGRESS, " | ".join(instructions)[:200]
+             )
+             await self.orchestrator.refine(
+                 instructions, session_id,
+                 on_file=lambda f: self._on_file_ready(session_id, f)
+             )
              
-             # Write updates
-             project_dir = config.OUTPUT_DIR / self.current_session_id
-             write_files_to_disk(session.files, project_dir)
-             print(f"[DEBUG] Wrote {len(session.files)} files to {project_dir}")
-             import sys
-             sys.stdout.flush()
+             # Write updates (after the streamed files, so a stale copy cannot land last)
+             project_dir = config.OUTPUT_DIR / session_id
+             await self._flush_writes(session_id)
+             await run_blocking(write_files_to_disk, list(session.files), project_dir)
+             logger.debug("Wrote %d files to %s", len(session.files), project_dir)
              
              # Identify the correct directory to serve
              frontend_dir = self._get_frontend_dir(project_dir)
              
              # Mount the generated project directory to a unique path
-             route_path = f'/preview/{self.current_session_id}'
-             app.add_static_files(route_path, str(frontend_dir))
+             route_path = self._mount_preview(session_id, frontend_dir)
              
-             print(f"[DEBUG] Restarting preview for refinement at {route_path}, serving: {frontend_dir}")
+             logger.debug("Restarting preview for refinement at %s, serving: %s", route_path, frontend_dir)
              
-             # Reload preview
-             if self.live_preview:
-                 preview_url = route_path + '/index.html'
-                 await self.live_preview.load_preview_url(preview_url)
-                 
-                 # Show first file in code view
-                 if session.files:
-                     f = session.files[0]
-                     self.file_tree.update_code(f.content, f.language, f.path)
+             # Reload preview for every viewer
+             hub.show_preview(route_path + '/index.html')
+             
+             # Show first file in code view
+             if session.files:
+                 await hub.show_code(session.files[0])
 
              # Validate updated code (basic syntax checks)
-             errors: list[str] = []
-             for f in session.files:
-                  ok, msgs = validate_code(f.content, f.language)
-                  if not ok:
-                       errors.extend([f"{f.path}: {m}" for m in msgs])
+             errors = await run_blocking(validate_files, list(session.files))
              session.validation = ValidationResult(passed=len(errors) == 0, errors=errors)
              
              # Self-healing: if validation fails, retry with error feedback (max 2 retries)
@@ -158,13 +380,9 @@ class MetaForgeApp:
                      f"Found {len(errors)} errors, attempting self-healing..."
                  )
                  try:
-                     healed_state = await self.orchestrator.self_heal(self.current_session_id, errors, max_retries=2)
+                     healed_state = await self.orchestrator.self_heal(session_id, errors, max_retries=2)
                      # Re-validate after healing
-                     errors_after_heal: list[str] = []
-                     for f in healed_state.files:
-                          ok, msgs = validate_code(f.content, f.language)
-                          if not ok:
-                               errors_after_heal.extend([f"{f.path}: {m}" for m in msgs])
+                     errors_after_heal = await run_blocking(validate_files, list(healed_state.files))
                      session.validation = ValidationResult(passed=len(errors_after_heal) == 0, errors=errors_after_heal)
                      session.files = healed_state.files  # Update with healed files
                      errors = errors_after_heal  # Update for status message
@@ -181,35 +399,22 @@ class MetaForgeApp:
                   "All checks passed" if session.validation.passed else f"{len(errors)} errors remain",
              )
              
-             # Notify user
-             try:
-                  if self.progress_panel and self.progress_panel.chat_container.client.connected:
-                      self.progress_panel.add_message("Refinement complete! Check updated files.", sent=False)
-             except:
-                  pass
-             
-             # Refresh preview
-             try:
-                  if self.live_preview:
-                      self.live_preview.refresh()
-             except:
-                  pass
+             # Notify viewers and refresh the preview (healing may have changed files)
+             hub.message("Refinement complete! Check updated files.")
+             hub.show_preview(route_path + '/index.html')
                    
+         except asyncio.CancelledError:
+             cancelled = True
+             logger.info("Refinement cancelled for session %s", session_id)
+             raise
          except Exception as e:
              import traceback
              traceback.print_exc()
-             try:
-                  if self.progress_panel and self.progress_panel.chat_container.client.connected:
-                      self.progress_panel.add_message(f"Refinement failed: {str(e)}", sent=False)
-             except:
-                  pass
+             hub.message(f"Refinement failed: {str(e)}")
          finally:
-             self.is_generating = False
-             try:
-                  if self.spinner_container and self.spinner_container.client.connected:
-                      self.spinner_container.set_visibility(False)
-             except:
-                  pass
+             hub.set_busy(False)
+             if not cancelled:
+                  self._start_queued(session_id)
              
     
     def start_generation(self, problem_statement: str):
@@ -222,54 +427,55 @@ class MetaForgeApp:
             ui.notify('Please set OPENAI_API_KEY environment variable', type='negative')
             return
         
-        # Store for chat display in workspace
-        self.initial_problem = problem_statement
+        # This browser's previous project is superseded: stop its in-flight model calls
+        self._leave_project(app.storage.user.get(SESSION_KEY), "superseded by a new project", own_viewers=0)
         
         # Create session
         problem = ProblemStatement(description=problem_statement)
-        self.current_session_id = session_manager.create_session(problem)
+        session_id = session_manager.create_session(problem)
+        app.storage.user[SESSION_KEY] = session_id
+        
+        # The prompt opens the chat transcript every viewer of the project sees
+        broadcast.hub(session_id).message(problem_statement, sent=True)
         
         # Navigate to workspace
-        ui.navigate.to('/workspace')
+        ui.navigate.to(f'/workspace?session={session_id}')
         
         # Start generation in background
-        asyncio.create_task(self.run_generation())
+        task_registry.start(session_id, self.run_generation(session_id), name="generation")
     
-    async def run_generation(self):
+    async def run_generation(self, session_id: str):
         """Run the generation process"""
-        if self.is_generating:
-            return
+        cancelled = False
+        # Viewers that open the workspace later pick up the busy state from the hub
+        hub = broadcast.hub(session_id)
+        hub.set_busy(True)
         
-        self.is_generating = True
-        
-
-        
-        # Give the workspace page a moment to load so the spinner is available
-        await asyncio.sleep(0.5)
-        if self.spinner_container: 
-             self.spinner_container.set_visibility(True)
-             
-        print(f"[INFO] Starting generation for session {self.current_session_id}...")
-        import sys
-        sys.stdout.flush()
+        logger.info("Starting generation for session %s...", session_id)
         
         try:
             # Run orchestrator
-            session = session_manager.get_session(self.current_session_id)
+            session = session_manager.get_session(session_id)
             problem_statement = session.problem_statement.description
+            started_at = session.files.version
             
-            result = await self.orchestrator.orchestrate(problem_statement, self.current_session_id)
+            result = await self.orchestrator.orchestrate(
+                problem_statement, session_id,
+                on_file=lambda f: self._on_file_ready(session_id, f)
+            )
+            if 'orchestrate.time_to_first_file' in result.timings:
+                 logger.info("Time to first file: %.2fs (total %.2fs)",
+                             result.timings['orchestrate.time_to_first_file'], result.timings['orchestrate.total'])
             
-            # Write files to disk
-            project_dir = config.OUTPUT_DIR / self.current_session_id
-            write_files_to_disk(result.files, project_dir)
+            # Write files to disk, dropping streamed files the build rolled back (e.g. a failed manifest)
+            project_dir = config.OUTPUT_DIR / session_id
+            await self._flush_writes(session_id)
+            rolled_back = [p for p in result.files.changed_since(started_at) if p not in result.files]
+            await run_blocking(remove_files_from_disk, rolled_back, project_dir)
+            await run_blocking(write_files_to_disk, list(result.files), project_dir)
 
             # Validate generated code (basic syntax checks)
-            errors: list[str] = []
-            for f in result.files:
-                 ok, msgs = validate_code(f.content, f.language)
-                 if not ok:
-                      errors.extend([f"{f.path}: {m}" for m in msgs])
+            errors = await run_blocking(validate_files, list(result.files))
             session.validation = ValidationResult(passed=len(errors) == 0, errors=errors)
             
             # Self-healing: if validation fails, retry with error feedback (max 2 retries)
@@ -280,17 +486,13 @@ class MetaForgeApp:
                     f"Found {len(errors)} errors, attempting self-healing..."
                 )
                 try:
-                    healed_state = await self.orchestrator.self_heal(self.current_session_id, errors, max_retries=2)
+                    healed_state = await self.orchestrator.self_heal(session_id, errors, max_retries=2)
                     # Re-write healed files to disk
-                    write_files_to_disk(healed_state.files, project_dir)
-                    print(f"[DEBUG] Re-wrote {len(healed_state.files)} healed files to {project_dir}")
+                    await run_blocking(write_files_to_disk, list(healed_state.files), project_dir)
+                    logger.debug("Re-wrote %d healed files to %s", len(healed_state.files), project_dir)
                     
                     # Re-validate after healing
-                    errors_after_heal: list[str] = []
-                    for f in healed_state.files:
-                         ok, msgs = validate_code(f.content, f.language)
-                         if not ok:
-                              errors_after_heal.extend([f"{f.path}: {m}" for m in msgs])
+                    errors_after_heal = await run_blocking(validate_files, list(healed_state.files))
                     session.validation = ValidationResult(passed=len(errors_after_heal) == 0, errors=errors_after_heal)
                     session.files = healed_state.files  # Update with healed files
                     result = healed_state
@@ -301,7 +503,7 @@ class MetaForgeApp:
                         ProgressStatus.ERROR,
                         f"Could not auto-fix errors: {str(heal_error)}"
                     )
-                    print(f"[ERROR] Self-healing failed: {heal_error}")
+                    logger.error("Self-healing failed: %s", heal_error)
             
             session.update_progress(
                  "Validation & Testing",
@@ -309,82 +511,131 @@ class MetaForgeApp:
                  "All checks passed" if session.validation.passed else f"{len(errors)} errors remain",
             )
             
+            # Clean builds become templates for similar future requests
+            if session.validation.passed:
+                project_index.add(session)
+            
             # Serve files via NiceGUI instead of separate server
             frontend_dir = self._get_frontend_dir(project_dir)
             
             # Mount the generated project directory to a unique path
             # We use app.add_static_files to serve the folder at /preview/{session_id}
-            route_path = f'/preview/{self.current_session_id}'
-            app.add_static_files(route_path, str(frontend_dir))
+            route_path = self._mount_preview(session_id, frontend_dir)
             
-            print(f"[DEBUG] Mounted preview at {route_path}, serving: {frontend_dir}")
+            logger.debug("Mounted preview at %s, serving: %s", route_path, frontend_dir)
             
-            # Auto-load preview
-            if self.live_preview:
-                 # Calculate the relative URL for the iframe
-                 preview_url = route_path + '/index.html'
-                 print(f"[DEBUG] Loading preview from {preview_url}")
-                 await self.live_preview.load_preview_url(preview_url)
-                 
-                 # Show first file in code view (now in file_tree)
-                 if result.files:
-                      f = result.files[0]
-                      self.file_tree.update_code(f.content, f.language, f.path)
-            else:
-                 print("[WARNING] live_preview is None, cannot load preview")
+            # Auto-load preview for every viewer
+            preview_url = route_path + '/index.html'
+            logger.debug("Loading preview from %s", preview_url)
+            hub.show_preview(preview_url)
+            
+            # Show first file in code view (now in file_tree)
+            if result.files:
+                 await hub.show_code(result.files[0])
             
             # Success - update status in session (will be picked up by UI)
             session.update_progress("Done", ProgressStatus.COMPLETED)
-            if self.progress_panel:
-                 self.progress_panel.add_message("Build successful! You can now preview and edit your app.", sent=False)
+            hub.message("Build successful! You can now preview and edit your app.")
         
+        except asyncio.CancelledError:
+            cancelled = True
+            logger.info("Generation cancelled for session %s", session_id)
+            raise
         finally:
-            self.is_generating = False
-            if self.spinner_container: self.spinner_container.set_visibility(False)
-            print("[INFO] Generation process concluded.")
-            import sys
-            sys.stdout.flush()
+            hub.set_busy(False)
+            logger.info("Generation process concluded.")
+            if not cancelled:
+                self._start_queued(session_id)
     
-    def update_workspace(self):
-        """Update workspace with latest session data"""
-        if not self.current_session_id:
+    async def show_version(self, viewer: Viewer, number: int):
+        """Show a version in one viewer's file tree and preview; past versions are served from the history"""
+        session = session_manager.get_session(viewer.session_id)
+        if not session or not session.history or number == viewer.viewing_version:
             return
-        
-        session = session_manager.get_session(self.current_session_id)
-        if not session:
+        viewer.viewing_version = number
+        if number == session.history.head.number:
+            files = session.files
+            project_dir = config.OUTPUT_DIR / session.project_id
+            page = self._mount_preview(session.project_id, self._get_frontend_dir(project_dir)) + '/index.html'
+        else:
+            files = session.history.checkout(number)
+            page = f'/versions/{session.project_id}/{number}/{_entry_page(files.paths()) or "index.html"}'
+        viewer.file_tree.update_files(files)
+        if files:
+            await viewer.file_tree.update_code(files[0].content, files[0].language, files[0].path)
+        await viewer.live_preview.load_preview_url(page)
+    
+    async def restore_version(self, viewer: Viewer, number: int):
+        """Make a past version current again for every viewer, rewriting only the files that differ on disk"""
+        session_id = viewer.session_id
+        session = session_manager.get_session(session_id)
+        if not session or not session.history:
+            return
+        if task_registry.is_busy(session_id):
+            ui.notify('Wait for the current build to finish before restoring', type='warning')
+            return
+        previous = session.history.head.number
+        if number == previous:
+            ui.notify(f'v{number} is already the current version', type='info')
             return
+        files, version = session.history.rollback(number)
+        changes = session.history.diff(previous, version.number)
+        session.files = files
         
-        # Sync spinner visibility with generation state
+        project_dir = config.OUTPUT_DIR / session_id
+        await run_blocking(write_files_to_disk, [files[p] for p in changes["added"] + changes["modified"]], project_dir)
+        await run_blocking(remove_files_from_disk, changes["removed"], project_dir)
+        errors = await run_blocking(validate_files, list(files))
+        session.validation = ValidationResult(passed=not errors, errors=errors)
+        changed = len(changes["added"]) + len(changes["modified"]) + len(changes["removed"])
+        session.update_progress(f"Restored v{number}", ProgressStatus.COMPLETED, f"{changed} files changed")
+        
+        # New head and files go to every viewer, then the preview and code view follow
+        hub = broadcast.hub(session_id)
+        hub.refresh(session)
+        hub.show_preview(self._mount_preview(session_id, self._get_frontend_dir(project_dir)) + '/index.html')
+        if files:
+            await hub.show_code(files[0])
+    
+    def _on_file_ready(self, session_id: str, file):
+        """Queue a streamed file for writing; a session's writes run in order on the blocking pool"""
+        task = asyncio.create_task(self._write_streamed(session_id, file, self._disk_writes.get(session_id)))
+        self._disk_writes[session_id] = task
+        task.add_done_callback(functools.partial(self._write_done, session_id))
+    
+    def _write_done(self, session_id: str, task: asyncio.Task):
+        if self._disk_writes.get(session_id) is task:
+            del self._disk_writes[session_id]
+    
+    async def _flush_writes(self, session_id: str):
+        """Wait until every streamed file queued for a session is on disk"""
+        task = self._disk_writes.get(session_id)
+        if task is not None:
+            await asyncio.wait([task])
+    
+    async def _write_streamed(self, session_id: str, file, previous: asyncio.Task | None):
+        """Write one streamed file after the session's earlier ones, opening the preview once an entry page exists"""
+        if previous is not None:
+            await asyncio.wait([previous])
+        project_dir = config.OUTPUT_DIR / session_id
         try:
-            if self.spinner_container and self.spinner_container.client.connected:
-                self.spinner_container.set_visibility(self.is_generating)
-        except:
-            pass
+            await run_blocking(write_files_to_disk, [file], project_dir)
+        except OSError as e:
+            logger.warning("Could not write streamed file %s for session %s: %s", file.path, session_id, e)
+            return
         
-        # Update progress panel
-        if self.progress_panel and session.progress_steps:
-            try:
-                self.progress_panel.update_steps(session.progress_steps)
-            except:
-                pass
-        
-        # Update file tree and status
-        if self.file_tree and session.files:
-            # Refresh if we just stopped generating or if file count changed
-            last_gen_state = getattr(self, '_last_gen_state', False)
-            current_count = getattr(self.file_tree, '_last_file_count', 0)
-            
-            if (last_gen_state and not self.is_generating) or len(session.files) != current_count:
-                self.file_tree.update_files(session.files)
-                self.file_tree._last_file_count = len(session.files)
-            
-            self._last_gen_state = self.is_generating
-            
-        # Check if we need to load preview (poll check)
-        # In a real app we might use websockets or events, but polling is safe
-        if self.live_preview and session.files and not self.live_preview.loaded:
-             # Basic check if files exist to load
-             pass
+        hub = broadcast.get(session_id)
+        if not file.path.endswith('index.html') or hub is None:
+            return
+        route_path = self._mount_preview(session_id, self._get_frontend_dir(project_dir))
+        if hub.preview_url is None:
+            logger.debug("Early preview from streamed %s at %s", file.path, route_path)
+            hub.show_preview(route_path + '/index.html')
+
+    def _mount_preview(self, session_id: str, frontend_dir: Path) -> str:
+        """Serve frontend_dir at /preview/{session_id}"""
+        self._preview_dirs[session_id] = frontend_dir
+        return f'/preview/{session_id}'
 
     def _get_frontend_dir(self, project_dir: Path) -> Path:
         """Helper to find the best directory to serve static files from"""
@@ -401,16 +652,38 @@ class MetaForgeApp:
         return project_dir / "frontend" if (project_dir / "frontend").exists() else project_dir
 
 
+def _entry_page(paths: list) -> str | None:
+    """The page a version's preview opens: index.html at the root or in a usual frontend folder"""
+    for candidate in ("index.html", "frontend/index.html", "public/index.html", "dist/index.html", "web/index.html"):
+        if candidate in paths:
+            return candidate
+    return None
+
+
 def main():
     """Main entry point"""
+    configure_logging()
     app_instance = MetaForgeApp()
     app_instance.create_ui()
+    app.on_startup(loop_monitor.start)
+    app.on_shutdown(loop_monitor.stop)
+    app.on_startup(lambda: background_tasks.create(app_instance.sweep_idle_sessions(), name="cold-storage"))
+    app.on_startup(lambda: background_tasks.create(broadcast.run(1.0), name="workspace-refresh"))
+    if config.PROJECT_INDEX_BACKFILL:
+        app.on_startup(lambda: background_tasks.create(
+            project_index.backfill(config.OUTPUT_DIR, config.EVENT_LOG_DIR), name="index-backfill"))
+    if config.ASSET_CACHE_SEED_DIR:
+        app.on_startup(lambda: background_tasks.create(
+            run_blocking(asset_cache.import_directory, config.ASSET_CACHE_SEED_DIR), name="asset-seed"))
+    if config.PREWARM:
+        app.on_startup(lambda: background_tasks.create(app_instance.prewarm(), name="prewarm"))
     
     ui.run(
         title='MetaForge - AI App Builder',
         port=config.NICEGUI_PORT,
         reload=False,
         show=True,
+        storage_secret=config.STORAGE_SECRET,
         dark=True # Force dark mode
     )
 
@@ -1,14 +1,18 @@
 """Utilities package"""
-from .code_validator import validate_code, validate_python, validate_javascript, validate_html
-from .file_manager import write_files_to_disk, create_zip_archive, cleanup_old_projects, get_file_icon
+from .code_validator import validate_code, validate_files, validate_python, validate_javascript, validate_html
+from .file_manager import write_files_to_disk, remove_files_from_disk, create_zip_archive, cleanup_old_projects, get_file_icon
+from .stats import LatencyStats
 
 __all__ = [
     "validate_code",
+    "validate_files",
     "validate_python",
     "validate_javascript",
     "validate_html",
     "write_files_to_disk",
+    "remove_files_from_disk",
     "create_zip_archive",
     "cleanup_old_projects",
-    "get_file_icon"
+    "get_file_icon",
+    "LatencyStats"
 ]
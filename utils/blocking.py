@@ -0,0 +1,48 @@
+"""Shared thread pool for blocking helpers called from async code"""
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import config
+from .telemetry import registry
+
+T = TypeVar("T")
+
+BLOCKING_IN_FLIGHT = registry.gauge(
+    "metaforge_blocking_calls_in_flight", "Blocking helper calls submitted to the shared executor")
+BLOCKING_SECONDS = registry.histogram(
+    "metaforge_blocking_call_duration_seconds", "Run time of blocking helpers in the shared executor", ("fn",))
+BLOCKING_QUEUE_SECONDS = registry.histogram(
+    "metaforge_blocking_queue_wait_seconds", "Time blocking helpers waited for an executor thread")
+
+_executor = ThreadPoolExecutor(max_workers=config.BLOCKING_WORKERS, thread_name_prefix="metaforge-blocking")
+
+
+async def run_blocking(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run `fn(*args, **kwargs)` on the shared executor without blocking the event loop.
+
+    Used for disk writes, validation and syntax highlighting, so a large
+    build cannot stall every other session's UI.
+    The caller's context is copied, so spans opened by `fn` still nest under
+    the calling stage.
+    """
+    name = getattr(fn, "__name__", "call")
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def call():
+        started = time.perf_counter()
+        BLOCKING_QUEUE_SECONDS.observe(started - submitted)
+        try:
+            return context.run(fn, *args, **kwargs)
+        finally:
+            BLOCKING_SECONDS.observe(time.perf_counter() - started, fn=name)
+
+    BLOCKING_IN_FLIGHT.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, call)
+    finally:
+        BLOCKING_IN_FLIGHT.dec()
+
@@ -1,7 +1,14 @@
 """Code validation utilities"""
 import ast
 import re
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
+
+from .telemetry import span
+
+
+OPENING_TAG_RE = re.compile(r'<(\w+)[^>]*>')
+CLOSING_TAG_RE = re.compile(r'</(\w+)>')
+SELF_CLOSING_TAGS = {'img', 'br', 'hr', 'input', 'meta', 'link'}
 
 
 def validate_python(code: str) -> Tuple[bool, List[str]]:
@@ -64,14 +71,13 @@ def validate_html(code: str) -> Tuple[bool, List[str]]:
         errors.append("Missing <html> tag")
     
     # Check for balanced tags (simplified)
-    opening_tags = re.findall(r'<(\w+)[^>]*>', code)
-    closing_tags = re.findall(r'</(\w+)>', code)
-    
-    # Self-closing tags
-    self_closing = {'img', 'br', 'hr', 'input', 'meta', 'link'}
+    opening_tags = OPENING_TAG_RE.findall(code)
+    closed = {t.lower() for t in CLOSING_TAG_RE.findall(code)}
     
+    # One set lookup per tag keeps this linear in the document size
     for tag in opening_tags:
-        if tag.lower() not in self_closing and tag.lower() not in [t.lower() for t in closing_tags]:
+        name = tag.lower()
+        if name not in SELF_CLOSING_TAGS and name not in closed:
             errors.append(f"Unclosed tag: <{tag}>")
     
     return len(errors) == 0, errors
@@ -98,3 +104,19 @@ def validate_code(code: str, language: str) -> Tuple[bool, List[str]]:
     else:
         # Unknown language, skip validation
         return True, []
+
+
+def validate_files(files: Iterable) -> List[str]:
+    """
+    Validate every generated file
+    Returns: list of errors, each prefixed with the file's path
+    """
+    errors: List[str] = []
+    with span("validate") as s:
+        files = list(files)
+        for f in files:
+            ok, msgs = validate_code(f.content, f.language)
+            if not ok:
+                errors.extend(f"{f.path}: {m}" for m in msgs)
+        s.set(files=len(files), errors=len(errors))
+    return errors
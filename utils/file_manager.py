@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import List
 import shutil
 from context.models import GeneratedFile
+from .telemetry import span
 
 
 def write_files_to_disk(files: List[GeneratedFile], project_dir: Path) -> Path:
@@ -12,22 +13,41 @@ def write_files_to_disk(files: List[GeneratedFile], project_dir: Path) -> Path:
     Write generated files to disk
     Returns: Path to the project directory
     """
-    # Create project directory
-    project_dir.mkdir(parents=True, exist_ok=True)
-    
-    for file in files:
-        # Sanitize path: strip leading slashes and drive letters
-        clean_path = file.path.lstrip('/\\').split(':')[-1].lstrip('/\\')
-        file_path = project_dir / clean_path
+    with span("disk_write") as s:
+        # Create project directory
+        project_dir.mkdir(parents=True, exist_ok=True)
         
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(file.content)
+        written = 0
+        for file in files:
+            # Sanitize path: strip leading slashes and drive letters
+            clean_path = file.path.lstrip('/\\').split(':')[-1].lstrip('/\\')
+            file_path = project_dir / clean_path
+            
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(file.content)
+            written += 1
+        s.set(files=written)
     
     return project_dir
 
 
+def remove_files_from_disk(paths: List[str], project_dir: Path) -> int:
+    """
+    Delete files of a project (e.g. paths a restored version does not have)
+    Returns: Number of files removed
+    """
+    removed = 0
+    for path in paths:
+        clean_path = path.lstrip('/\\').split(':')[-1].lstrip('/\\')
+        file_path = project_dir / clean_path
+        if file_path.is_file():
+            file_path.unlink()
+            removed += 1
+    return removed
+
+
 def create_zip_archive(project_dir: Path, output_path: Path) -> Path:
     """
     Create a ZIP archive of the project
@@ -0,0 +1,137 @@
+"""Event-loop lag monitor with stack samples of whatever blocks the loop"""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Optional
+
+import config
+from .profiler import running_stack
+from .stats import LatencyStats
+from .telemetry import get_logger, registry
+
+logger = get_logger("loop_monitor")
+
+LOOP_LAG_SECONDS = registry.histogram(
+    "metaforge_event_loop_lag_seconds", "Scheduling delay of the event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+LOOP_LAG_QUANTILES = registry.gauge(
+    "metaforge_event_loop_lag_window_seconds", "Event loop lag percentiles over the recent window", ("quantile",))
+LOOP_STALLS = registry.counter(
+    "metaforge_event_loop_stalls_total", "Times the event loop was blocked longer than the stall threshold")
+
+
+class Stall:
+    """One period in which the loop did not get to run, with what it was running meanwhile"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.duration: Optional[float] = None
+        self.stacks: Counter = Counter()
+
+    def to_dict(self, top: int = 5) -> dict:
+        return {
+            "started": self.started,
+            "duration": self.duration,
+            "samples": sum(self.stacks.values()),
+            "stacks": [{"stack": stack, "samples": n} for stack, n in self.stacks.most_common(top)],
+        }
+
+
+class LoopMonitor:
+    """Measures how late the loop wakes up and samples it while it is stuck.
+
+    A coroutine sleeps `interval` seconds at a time. How much later than
+    asked it resumes is the scheduling delay every other coroutine sees as
+    well. A watchdog thread notices when that coroutine is overdue by more
+    than `stall_threshold`. While the loop stays stuck, the thread samples
+    the loop thread's stack every `interval`. The samples say which helper
+    held the loop; they are kept with the stall in collapsed-stack form.
+    """
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lag = LatencyStats(max_samples=3000)
+        self.stalls: Deque[Stall] = deque(maxlen=50)
+        self._current: Optional[Stall] = None
+        self._beat = 0.0
+        self._loop_thread = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Begin monitoring the running loop (idempotent)"""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop = threading.Event()
+        self._task = asyncio.get_running_loop().create_task(self._measure(), name="loop-monitor")
+        threading.Thread(target=self._watch, args=(self._stop,), name="metaforge-loop-watchdog",
+                         daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - started - self.interval)
+            self._beat = now
+            self.lag.record(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            stall = self._current
+            if stall is not None:
+                self._current = None
+                stall.duration = lag
+                LOOP_STALLS.inc()
+                top = stall.stacks.most_common(1)
+                logger.warning("Event loop blocked for %.2fs%s", lag,
+                               f" in {top[0][0].rsplit(';', 1)[-1]}" if top else "")
+
+    def _watch(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            overdue = time.perf_counter() - self._beat - self.interval
+            if overdue < self.stall_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stall = self._current
+            if stall is None:
+                stall = self._current = Stall(time.time() - overdue)
+                self.stalls.append(stall)
+            stack = running_stack(frame)
+            if stack:
+                stall.stacks[";".join(stack)] += 1
+
+    def _collect(self):
+        for quantile in (50, 90, 99):
+            value = self.lag.percentile(quantile)
+            if value is not None:
+                LOOP_LAG_QUANTILES.set(value, quantile=str(quantile / 100))
+
+    def report(self) -> dict:
+        """Lag percentiles (seconds) and the most recent stalls"""
+        return {
+            "interval": self.interval,
+            "stall_threshold": self.stall_threshold,
+            "lag": {**self.lag.snapshot(), "p99": self.lag.percentile(99)},
+            "stalls": [s.to_dict() for s in list(self.stalls)[-10:]],
+        }
+
+
+# Global loop monitor instance
+loop_monitor = LoopMonitor(config.LOOP_MONITOR_INTERVAL, config.LOOP_STALL_THRESHOLD)
+registry.on_collect(loop_monitor._collect)
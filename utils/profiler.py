@@ -0,0 +1,241 @@
+"""On-demand sampling profiler for a session's generation tasks"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import config
+from .telemetry import get_logger
+
+logger = get_logger("profiler")
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)  # co_qualname is Python 3.11+
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def running_stack(frame) -> List[str]:
+    """Frames of the running task's step, outermost first, without the event loop frames below it"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "_run" and code.co_filename.startswith(_ASYNCIO_DIR):
+            break  # Handle._run: everything further out is the loop itself
+        frames.append(_label(frame))
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _awaiting_stack(task: asyncio.Task) -> Optional[List[str]]:
+    """Where a suspended task is parked, following its await chain.
+
+    Returns None when the task only waits for other tasks (gather, wait_for
+    and friends): those tasks are sampled themselves, so counting the parent
+    too would double the wall time.
+    """
+    frames, awaited = [], task.get_coro()
+    while awaited is not None:
+        frame = getattr(awaited, "cr_frame", None) or getattr(awaited, "gi_frame", None) \
+            or getattr(awaited, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(_label(frame))
+        innermost = frame
+        awaited = getattr(awaited, "cr_await", None) or getattr(awaited, "gi_yieldfrom", None) \
+            or getattr(awaited, "ag_await", None)
+    if not frames:
+        return None
+    if isinstance(awaited, asyncio.Task) or type(awaited).__name__ == "_GatheringFuture" \
+            or innermost.f_code.co_filename.startswith(_ASYNCIO_DIR):
+        return None
+    frames.append("[await]")
+    return frames
+
+
+class ProfileRun:
+    """Collapsed-stack samples for one generation/refinement task and its children"""
+
+    def __init__(self, session_id: str, task: asyncio.Task):
+        self.session_id = session_id
+        self.name = task.get_name().split(":", 1)[0]
+        self.root = task
+        self.tasks: Set[asyncio.Task] = {task}
+        self.samples: Counter = Counter()
+        self.started = time.time()
+        self.path: Optional[Path] = None
+
+    def write(self, directory: Path) -> Path:
+        """`frame;frame;frame count` lines, the input format of flamegraph.pl and speedscope"""
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        self.path = directory / f"{self.session_id}-{self.name}-{stamp}.collapsed"
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        return self.path
+
+
+class SessionProfiler:
+    """Samples the event loop thread while armed sessions have tasks running.
+
+    Arming a session attaches a run to each of its generation/refinement tasks
+    (current and future). Tasks those runs create are owned too, through a
+    task factory that is only installed while something is being profiled.
+    A daemon thread wakes every PROFILE_INTERVAL_MS. If an owned task holds
+    the loop, it records the on-CPU Python stack (pydantic, pygments,
+    validators). Owned tasks that are suspended record their await chain
+    ending in `[await]` (model streams, disk I/O). Samples are therefore wall
+    time. When a run's root task finishes, its collapsed stacks are written
+    to PROFILE_DIR.
+
+    Nothing runs while no session is armed; `task_registry.start` only does
+    a set lookup.
+    """
+
+    def __init__(self, directory: Path, interval: float = 0.005):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.armed: Set[str] = set()
+        self.finished: List[dict] = []
+        self._owners: Dict[asyncio.Task, ProfileRun] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._previous_factory = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def is_armed(self, session_id: str) -> bool:
+        return session_id in self.armed
+
+    def arm(self, session_id: str, running: List[asyncio.Task] = ()):
+        """Profile the session's next tasks, and `running` ones right away"""
+        self.armed.add(session_id)
+        for task in running:
+            self.attach(session_id, task)
+        logger.info("Profiling armed for session %s", session_id)
+
+    def disarm(self, session_id: str):
+        """Stop profiling new tasks; runs already attached finish and are written"""
+        self.armed.discard(session_id)
+
+    def attach(self, session_id: str, task: asyncio.Task):
+        """Start sampling `task` (called on the loop thread)"""
+        if task.done() or task in self._owners:
+            return
+        run = ProfileRun(session_id, task)
+        with self._lock:
+            self._owners[task] = run
+        task.add_done_callback(self._root_done)
+        self._ensure_running(asyncio.get_running_loop())
+
+    def _ensure_running(self, loop: asyncio.AbstractEventLoop):
+        if self._loop is None:
+            self._loop = loop
+            self._loop_thread = threading.get_ident()
+            self._previous_factory = loop.get_task_factory()
+            loop.set_task_factory(self._task_factory)
+        if self._thread is None:
+            self._stop = threading.Event()  # per thread, so a stopping sampler never sees a later clear
+            self._thread = threading.Thread(target=self._sample_loop, args=(self._stop,),
+                                            name="metaforge-profiler", daemon=True)
+            self._thread.start()
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        run = self._owners.get(asyncio.current_task(loop)) if loop.is_running() else None
+        if run is not None:
+            with self._lock:
+                self._owners[task] = run
+                run.tasks.add(task)
+            task.add_done_callback(self._child_done)
+        return task
+
+    def _child_done(self, task: asyncio.Task):
+        with self._lock:
+            run = self._owners.pop(task, None)
+            if run is not None:
+                run.tasks.discard(task)
+
+    def _root_done(self, task: asyncio.Task):
+        with self._lock:
+            run = self._owners.pop(task, None)
+            if run is None:
+                return
+            for child in run.tasks:
+                self._owners.pop(child, None)
+            idle = not self._owners
+            samples = Counter(run.samples)
+        run.samples = samples
+        path = run.write(self.directory)
+        self.finished.append({"session_id": run.session_id, "name": run.name, "path": str(path),
+                              "samples": sum(run.samples.values()), "seconds": round(time.time() - run.started, 3)})
+        del self.finished[:-50]
+        logger.info("Profile for session %s written to %s (%d samples)",
+                    run.session_id, path, sum(run.samples.values()))
+        if idle:
+            self._shutdown()
+
+    def _shutdown(self):
+        self._stop.set()
+        self._thread = None
+        if self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+        self._loop, self._previous_factory = None, None
+
+    def _sample_loop(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:  # a task finished mid-walk; skip this tick
+                logger.debug("Profiler sample skipped: %s", e)
+
+    def _sample(self):
+        loop = self._loop
+        if loop is None:
+            return
+        with self._lock:
+            owners = list(self._owners.items())
+        # current_task() with an explicit loop is a lookup, safe from this sampling thread
+        running = asyncio.current_task(loop)
+        frame = sys._current_frames().get(self._loop_thread)
+        sampled = []
+        for task, run in owners:
+            if task.done():
+                continue
+            if task is running:
+                stack = running_stack(frame) if frame is not None else None
+            else:
+                stack = _awaiting_stack(task)
+            if stack:
+                sampled.append((run, ";".join([f"task:{run.name}", *stack])))
+        with self._lock:
+            for run, stack in sampled:
+                run.samples[stack] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            active = [{"session_id": r.session_id, "name": r.name, "tasks": len(r.tasks),
+                       "samples": sum(r.samples.values())}
+                      for r in {id(run): run for run in self._owners.values()}.values()]
+        return {
+            "armed": sorted(self.armed),
+            "active": active,
+            "finished": list(self.finished),
+        }
+
+
+# Global profiler instance
+session_profiler = SessionProfiler(config.PROFILE_DIR, config.PROFILE_INTERVAL_MS / 1000)
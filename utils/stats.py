@@ -0,0 +1,41 @@
+"""Lightweight latency statistics"""
+import math
+from collections import deque
+from typing import Dict, Optional
+
+
+class LatencyStats:
+    """Rolling window of latency samples (seconds) with percentile summaries"""
+
+    def __init__(self, max_samples: int = 1000):
+        self.samples: deque = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        """Add one sample"""
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile over the window (p in 0-100), None without samples"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Summary suitable for logging or JSON reports"""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self.samples) if self.samples else None,
+        }
@@ -0,0 +1,302 @@
+"""Spans, metrics and leveled logging with Prometheus text exposition"""
+import bisect
+import contextvars
+import functools
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import config
+
+LabelKey = Tuple[str, ...]
+
+# Seconds; spans from sub-millisecond helpers up to multi-minute builds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing total per label set"""
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+                for k, v in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    """Current value per label set (in-flight work, sizes)"""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+                for k, v in sorted(self.values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts: Dict[LabelKey, List[int]] = {}
+        self.sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sums[key] = self.sums.get(key, 0.0) + value
+
+    def _samples(self):
+        lines = []
+        for key, counts in sorted(self.counts.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self.sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """All metrics plus collectors that refresh gauges right before a scrape"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def on_collect(self, collector: Callable[[], None]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                get_logger("telemetry").warning("Metrics collector failed: %s", e)
+        return "\n".join(line for metric in self.metrics.values() for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "metaforge_stage_duration_seconds", "Duration of pipeline stages", ("stage", "outcome"))
+STAGES_IN_FLIGHT = registry.gauge(
+    "metaforge_stages_in_flight", "Pipeline stages currently running", ("stage",))
+AGENT_CALL_SECONDS = registry.histogram(
+    "metaforge_agent_call_duration_seconds", "Duration of agent model calls", ("agent", "model", "outcome"))
+AGENT_CALLS_IN_FLIGHT = registry.gauge(
+    "metaforge_agent_calls_in_flight", "Agent model calls currently running", ("agent",))
+AGENT_TOKENS = registry.counter(
+    "metaforge_agent_tokens_total", "Tokens used by agent model calls", ("agent", "model", "type"))
+
+
+class Span:
+    """One timed unit of work; attributes are free-form, outcome is ok/error/cancelled"""
+
+    __slots__ = ("name", "attributes", "parent", "started", "duration", "outcome")
+
+    def __init__(self, name: str, attributes: dict, parent: Optional[str]):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.started = time.time()
+        self.duration: Optional[float] = None
+        self.outcome = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "parent": self.parent, "started": self.started,
+                "duration": self.duration, "outcome": self.outcome, **self.attributes}
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("metaforge_span", default=None)
+recent_spans: Deque[dict] = deque(maxlen=500)
+
+
+class span:
+    """Time a block as a span: `with span("validate", session=sid) as s: ... s.set(files=3)`.
+
+    Records the stage histogram and in-flight gauge, nests under the current
+    span (asyncio tasks inherit it) and keeps the finished span in
+    `recent_spans`. Exceptions mark the outcome but are not swallowed.
+    """
+
+    def __init__(self, name: str, **attributes):
+        parent = _current_span.get()
+        self.span = Span(name, attributes, parent.name if parent else None)
+        self._token = None
+        self._started = 0.0
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        STAGES_IN_FLIGHT.inc(stage=self.span.name)
+        self._started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        s = self.span
+        s.duration = time.perf_counter() - self._started
+        if exc_type is not None:
+            s.outcome = "error" if issubclass(exc_type, Exception) else "cancelled"
+            s.attributes.setdefault("error", f"{exc_type.__name__}: {exc}")
+        STAGES_IN_FLIGHT.dec(stage=s.name)
+        STAGE_SECONDS.observe(s.duration, stage=s.name, outcome=s.outcome)
+        recent_spans.append(s.to_dict())
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            _current_span.set(None)  # exited in a different context (generator finalized elsewhere)
+        log = get_logger("span")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("span %s %s in %.3fs %s", s.name, s.outcome, s.duration, s.attributes)
+        return False
+
+
+def traced(name: str):
+    """Decorator running a coroutine function inside a span of the same name"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_agent_call(agent: str, model: str, duration: float, outcome: str,
+                      prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+    """Metrics and a span record for one finished agent model call"""
+    AGENT_CALL_SECONDS.observe(duration, agent=agent, model=model, outcome=outcome)
+    for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens), ("cached", cached_tokens)):
+        if count:
+            AGENT_TOKENS.inc(count, agent=agent, model=model, type=kind)
+    parent = _current_span.get()
+    recent_spans.append({
+        "name": "agent_call", "parent": parent.name if parent else None, "started": time.time() - duration,
+        "duration": duration, "outcome": outcome, "agent": agent, "model": model,
+        "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cached_tokens": cached_tokens,
+    })
+
+
+# Logging
+
+_configured = False
+_sample_counts: Dict[str, int] = {}
+
+
+def configure_logging(level: Optional[str] = None):
+    """Send metaforge.* logs to stderr as `[LEVEL] message` at config.LOG_LEVEL"""
+    global _configured
+    root = logging.getLogger("metaforge")
+    if not _configured:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+        _configured = True
+    root.setLevel((level or config.LOG_LEVEL).upper())
+
+
+def get_logger(name: str) -> logging.Logger:
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"metaforge.{name}")
+
+
+def log_sampled(logger: logging.Logger, key: str, msg: str, *args, level: int = logging.DEBUG):
+    """Log the first and then every config.LOG_SAMPLE_EVERY-th message for `key`"""
+    if not logger.isEnabledFor(level):
+        return
+    count = _sample_counts.get(key, 0) + 1
+    _sample_counts[key] = count
+    if count == 1 or count % config.LOG_SAMPLE_EVERY == 0:
+        logger.log(level, msg + " (x%d)", *args, count)